@@ -6,6 +6,7 @@ from langchain.tools import StructuredTool
 from shared.config import settings
 from shared.database import db_manager
 from shared.logging import setup_logger
+from shared.llm_executor import Lane, estimate_tokens, get_llm_executor
 from mcp_server.main import (
     search_market_news, 
     fetch_live_market_data, 
@@ -17,9 +18,21 @@ import json
 
 logger = setup_logger("agents.chat")
 
+class _ChatLaneGroq(ChatGroq):
+    """ChatGroq whose every model call (each agent step) takes its own chat-lane admission."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        async with get_llm_executor().slot(Lane.CHAT, estimate_tokens(messages, self.max_tokens)):
+            return await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async with get_llm_executor().slot(Lane.CHAT, estimate_tokens(messages, self.max_tokens)):
+            async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                yield chunk
+
 class ChatAgent:
     def __init__(self):
-        self.llm = ChatGroq(
+        self.llm = _ChatLaneGroq(
             model=settings.groq_model,
             api_key=settings.groq_api_key,
             temperature=0,
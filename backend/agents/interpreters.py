@@ -1,6 +1,9 @@
 from typing import Dict, Any, List, Optional
-import json
 from shared.config import settings
+from shared.llm_cache import canonical_json
+from shared.llm_executor import Lane, invoke_llm
+from shared.models import DraftContent, MeetingBriefContent
+from shared.structured_output import JSON_MODE, structured_invoke
 from reasoning.workflows import intelligence_workflow
 from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
@@ -11,14 +14,14 @@ from langchain_core.messages import SystemMessage, HumanMessage
 class RiskInterpretationAgent:
     """Wrapper for backward compatibility, now using deterministic workflow."""
     async def interpret(self, client_id: str, risk_event: dict, market_context: dict = None) -> dict:
-        return await intelligence_workflow.interpret_risk(client_id, risk_event, market_context)
+        return await intelligence_workflow.interpret_risk(client_id, risk_event, market_context, lane=Lane.CHAT)
 
 class PreMeetingBriefAgent:
     """Streamlined meeting brief generator."""
     def __init__(self):
-        self.llm = ChatGroq(model=settings.groq_model, temperature=0, api_key=settings.groq_api_key)
+        self.llm = ChatGroq(model=settings.groq_model, temperature=0, api_key=settings.groq_api_key, model_kwargs=JSON_MODE, max_retries=0)
 
-    async def generate_brief(self, client_id: str, client_name: str) -> dict:
+    async def generate_brief(self, client_id: str, client_name: str, lane: Lane = Lane.CHAT) -> dict:
         # Optimization: Fetch memory and portfolio structure once, then call LLM
         from mcp_server.main import get_client_portfolio_structure, get_tax_position, retrieve_relevant_memory
         
@@ -44,45 +47,43 @@ class PreMeetingBriefAgent:
         }
         """
         
-        human_input = f"Client: {client_name}\nPortfolio: {json.dumps(portfolio)}\nTax: {json.dumps(tax)}\nMemory: {json.dumps(memories)}"
+        human_input = f"Client: {client_name}\nPortfolio: {canonical_json(portfolio)}\nTax: {canonical_json(tax)}\nMemory: {canonical_json(memories)}"
         
-        response = await self.llm.ainvoke([SystemMessage(content=system_prompt), HumanMessage(content=human_input)])
-        content = response.content
-        import re
-        json_match = re.search(r'(\{.*\})', content, re.DOTALL)
-        if json_match:
-            clean = json_match.group(1)
-        else:
-            clean = content.strip().strip("```json").strip("```")
-        return json.loads(clean)
+        brief = await structured_invoke(
+            self.llm, [SystemMessage(content=system_prompt), HumanMessage(content=human_input)],
+            MeetingBriefContent, lane=lane
+        )
+        return brief.model_dump()
 
 class DraftingAgent:
     """Streamlined drafting generator."""
     def __init__(self):
-        self.llm = ChatGroq(model=settings.groq_model, temperature=0, api_key=settings.groq_api_key)
+        self.llm = ChatGroq(model=settings.groq_model, temperature=0, api_key=settings.groq_api_key, model_kwargs=JSON_MODE, max_retries=0)
 
     async def generate_draft(self, client_id: str, risk_event: dict) -> dict:
         system_prompt = "You are Atlas. Draft a proactive, opinionated email for this risk. Output JSON: { 'subject': 'string', 'body': 'string' }"
-        human_input = f"Risk: {json.dumps(risk_event)}"
+        human_input = f"Risk: {canonical_json(risk_event)}"
         
-        response = await self.llm.ainvoke([SystemMessage(content=system_prompt), HumanMessage(content=human_input)])
-        clean = response.content.strip().strip("```json").strip("```")
-        return json.loads(clean)
+        draft = await structured_invoke(
+            self.llm, [SystemMessage(content=system_prompt), HumanMessage(content=human_input)],
+            DraftContent, lane=Lane.CHAT
+        )
+        return draft.model_dump()
 
 class MorningIntelligenceAgent:
     """Wrapper for backward compatibility, now using deterministic workflow."""
     async def generate_report(self, clients: list[dict]) -> dict:
-        # Fetch market intel once
-        from mcp_server.main import fetch_comprehensive_market_intel
-        market_intel = await fetch_comprehensive_market_intel()
+        # Shared market intel snapshot
+        from mcp_server.main import market_intel_service
+        market_intel = await market_intel_service.get()
         return await intelligence_workflow.generate_morning_report(clients, market_intel)
 
 class ProactiveVoiceAgent:
     """Agent that generates opinionated, proactive 'opening gambits' for Atlas."""
     def __init__(self):
-        self.llm = ChatGroq(model=settings.groq_model, temperature=0.7, api_key=settings.groq_api_key)
+        self.llm = ChatGroq(model=settings.groq_model, temperature=0.7, api_key=settings.groq_api_key, max_retries=0)
 
-    async def generate_voice(self, context_summary: str, event_type: str) -> str:
+    async def generate_voice(self, context_summary: str, event_type: str, lane: Lane = Lane.CHAT) -> str:
         """
         Generates a proactive prose response.
         Format: [Situation] -> [Belief] -> [Action/Question]
@@ -101,11 +102,11 @@ class ProactiveVoiceAgent:
         human_input = f"Data Context:\n{context_summary}"
         
         try:
-            response = await self.llm.ainvoke([
+            content = await invoke_llm(self.llm, [
                 SystemMessage(content=system_prompt), 
                 HumanMessage(content=human_input)
-            ])
-            return response.content.strip()
+            ], lane=lane)
+            return content.strip()
         except Exception as e:
             from shared.logging import setup_logger
             logger = setup_logger("interpreters")
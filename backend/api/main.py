@@ -4,6 +4,9 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from shared.logging import setup_logger
 from shared.config import settings
+from api.services.stream_view import stream_view
+from api.services.broadcaster import broadcaster
+from api.services.transports import create_transport
 
 # Import Routers
 from api.routers import health, stream, clients, risks, meetings, drafts, chat, tasks
@@ -13,8 +16,16 @@ logger = setup_logger("api")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Atlas API starting up...")
+    broadcaster.use_transport(create_transport(settings.broadcast_transport, settings.database_url))
+    broadcaster.set_resolver(stream_view.resolve_delta, on_resync=stream_view.invalidate)
+    await broadcaster.start()
+    try:
+        await stream_view.ensure_built()
+    except Exception as e:
+        logger.error(f"Stream view warm-up failed, will build on first request: {e}")
     yield
     logger.info("Atlas API shutting down...")
+    await broadcaster.stop()
 
 app = FastAPI(title="Atlas Zero API", lifespan=lifespan)
 
@@ -29,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # /risk-events pagination
 )
 
 # Exception Handling
@@ -11,7 +11,7 @@ async def list_clients():
     try:
         # Optimization: Exclude heavy JSON profiles and metadata from list view
         summary_cols = "id, first_name, last_name, email, vulnerability_score, vulnerability_category"
-        resp = db_manager.client.table("clients").select(summary_cols).order("last_name").execute()
+        resp = await db_manager.aexecute(db_manager.client.table("clients").select(summary_cols).order("last_name"))
         return {"clients": resp.data or []}
     except Exception as e:
         logger.error(f"Error listing clients: {e}")
@@ -21,8 +21,10 @@ async def list_clients():
 async def get_client_portfolio(client_id: str):
     """Returns portfolio structure for a specific client."""
     try:
-        resp = db_manager.client.table("portfolios")\
-            .select("*").eq("client_id", client_id).execute()
+        resp = await db_manager.aexecute(
+            db_manager.client.table("portfolios")
+            .select("*").eq("client_id", client_id)
+        )
         if not resp.data:
             raise HTTPException(status_code=404, detail="Portfolio not found")
         return resp.data[0]
@@ -34,9 +36,11 @@ async def get_client_portfolio(client_id: str):
 async def get_client_memory(client_id: str):
     """Returns behavioural memory entries for a specific client."""
     try:
-        resp = db_manager.client.table("behavioural_memory")\
-            .select("*").eq("client_id", client_id)\
-            .order("created_at", desc=True).limit(10).execute()
+        resp = await db_manager.aexecute(
+            db_manager.client.table("behavioural_memory")
+            .select("*").eq("client_id", client_id)
+            .order("created_at", desc=True).limit(10)
+        )
         return resp.data
     except Exception as e:
         logger.error(f"Error fetching memory for {client_id}: {e}")
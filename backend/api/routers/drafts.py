@@ -2,6 +2,8 @@ from fastapi import APIRouter, HTTPException, Request
 from shared.database import db_manager
 from shared.logging import setup_logger
 from agents.interpreters import DraftingAgent
+from api.services.stream_view import stream_view
+from api.services.deltas import publish_delta, DRAFT_CREATED, DRAFT_UPDATED, DRAFT_APPROVED, DRAFT_REJECTED
 
 logger = setup_logger("api.drafts")
 router = APIRouter()
@@ -10,26 +12,31 @@ drafting_agent = DraftingAgent()
 @router.post("/risk-events/{event_id}/draft")
 async def generate_draft(event_id: str):
     """Generate client communication draft."""
-    event = db_manager.get_by_id("risk_events", event_id)
+    event = await db_manager.aget_by_id("risk_events", event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
         
     draft = await drafting_agent.generate_draft(event["client_id"], event)
     
-    db_manager.insert("draft_actions", {
+    draft_row = await db_manager.ainsert("draft_actions", {
         "risk_event_id": event_id,
         "client_id": event["client_id"],
         "action_type": "email",
         "draft_content": draft
     })
+    await stream_view.apply_draft(draft_row)
+    if draft_row:
+        await publish_delta(DRAFT_CREATED, [draft_row["id"]])
     
     return draft
 
 @router.post("/drafts/{draft_id}/approve")
 async def approve_draft(draft_id: str):
     """Approve and send a draft."""
-    db_manager.update("draft_actions", draft_id, {"status": "approved"})
-    db_manager.insert("action_logs", {
+    draft_row = await db_manager.aupdate("draft_actions", draft_id, {"status": "approved"})
+    await stream_view.apply_draft(draft_row)
+    await publish_delta(DRAFT_APPROVED, [draft_id])
+    await db_manager.ainsert("action_logs", {
         "entity_id": draft_id,
         "entity_type": "draft_action",
         "decision": "approved",
@@ -41,7 +48,7 @@ async def approve_draft(draft_id: str):
 async def edit_draft(draft_id: str, request: Request):
     """Edit draft content (subject, body)."""
     data = await request.json()
-    draft = db_manager.get_by_id("draft_actions", draft_id)
+    draft = await db_manager.aget_by_id("draft_actions", draft_id)
     if not draft:
         raise HTTPException(status_code=404, detail="Draft not found")
     
@@ -51,14 +58,18 @@ async def edit_draft(draft_id: str, request: Request):
     if "body" in data:
         content["body"] = data["body"]
     
-    db_manager.update("draft_actions", draft_id, {"draft_content": content})
+    draft_row = await db_manager.aupdate("draft_actions", draft_id, {"draft_content": content})
+    await stream_view.apply_draft(draft_row)
+    await publish_delta(DRAFT_UPDATED, [draft_id])
     return {"status": "updated", "draft_content": content}
 
 @router.post("/drafts/{draft_id}/reject")
 async def reject_draft(draft_id: str):
     """Dismiss/reject a draft."""
-    db_manager.update("draft_actions", draft_id, {"status": "rejected"})
-    db_manager.insert("action_logs", {
+    draft_row = await db_manager.aupdate("draft_actions", draft_id, {"status": "rejected"})
+    await stream_view.apply_draft(draft_row)
+    await publish_delta(DRAFT_REJECTED, [draft_id])
+    await db_manager.ainsert("action_logs", {
         "entity_id": draft_id,
         "entity_type": "draft_action",
         "decision": "dismissed",
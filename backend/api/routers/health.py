@@ -1,7 +1,27 @@
 from fastapi import APIRouter
+from shared.pricing import get_price_service
+from shared.embeddings import get_embedding_cache
+from shared.llm_cache import get_llm_cache
+from shared.llm_executor import get_llm_executor
+from shared.structured_output import structured_output_stats
+from api.services.broadcaster import broadcaster
+from mcp_server.main import market_intel_service
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
+
+@router.get("/metrics")
+async def metrics():
+    """Cache and fan-out counters for this API process."""
+    return {
+        "price_cache": get_price_service().stats(),
+        "market_intel": market_intel_service.stats(),
+        "embedding_cache": get_embedding_cache().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "llm_executor": get_llm_executor().stats(),
+        "structured_output": structured_output_stats.stats(),
+        "broadcaster": broadcaster.stats(),
+    }
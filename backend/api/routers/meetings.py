@@ -2,6 +2,8 @@ from fastapi import APIRouter
 from shared.database import db_manager
 from shared.logging import setup_logger
 from agents.interpreters import PreMeetingBriefAgent
+from api.services.stream_view import stream_view
+from api.services.deltas import publish_delta, BRIEF_READY, EVENT_RESOLVED
 from datetime import datetime
 
 logger = setup_logger("api.meetings")
@@ -13,7 +15,7 @@ async def get_meeting_brief(client_id: str):
     """Generate or retrieve meeting brief."""
     try:
         # Fetch client details first to get the name
-        client_data = db_manager.get_by_id("clients", client_id)
+        client_data = await db_manager.aget_by_id("clients", client_id)
         if not client_data:
             return {"error": "Client not found"}
             
@@ -23,14 +25,16 @@ async def get_meeting_brief(client_id: str):
         brief = await brief_agent.generate_brief(client_id, client_name)
         
         # Save to db
-        db_manager.insert("meeting_briefs", {
+        await db_manager.ainsert("meeting_briefs", {
             "client_id": client_id,
             "meeting_timestamp": datetime.utcnow().isoformat(),
             "brief_json": brief
         })
         
-        # Also create a risk event of type meeting_brief to show it in the stream
-        db_manager.insert("risk_events", {
+        # Also create a risk event of type meeting_brief to show it in the stream. Only one
+        # event per (client, type) may be open, so the previous brief is superseded first.
+        await _supersede_open_briefs(client_id)
+        brief_event = await db_manager.ainsert("risk_events", {
             "client_id": client_id,
             "event_type": "meeting_brief",
             "status": "open",
@@ -38,15 +42,27 @@ async def get_meeting_brief(client_id: str):
             "ai_interpretation": brief
         })
         
+        await stream_view.apply_events([brief_event])
+        
         # Trigger broadcast
-        from api.services.broadcaster import broadcaster
-        await broadcaster.broadcast({
-            "type": "meeting_brief_generated",
-            "client_id": client_id
-        })
+        await publish_delta(BRIEF_READY, [brief_event["id"]] if brief_event else [], client_id=client_id)
         
         return brief
     except Exception as e:
         import traceback
         logger.error(traceback.format_exc())
         return {"error": str(e), "traceback": traceback.format_exc()}
+
+async def _supersede_open_briefs(client_id: str):
+    """Auto-resolves the client's open meeting_brief event so the new one can be inserted."""
+    existing = await db_manager.aexecute(
+        db_manager.client.table("risk_events").select("id")
+        .eq("client_id", client_id)
+        .eq("event_type", "meeting_brief")
+        .eq("status", "open")
+    )
+    resolved = [row["id"] for row in existing.data or []]
+    for event_id in resolved:
+        await db_manager.aupdate("risk_events", event_id, {"status": "auto_resolved", "resolved_at": datetime.utcnow().isoformat()})
+        stream_view.remove_event(event_id)
+    await publish_delta(EVENT_RESOLVED, resolved)
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from typing import Optional
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response
 from shared.database import db_manager
 from shared.logging import setup_logger
 from agents.interpreters import RiskInterpretationAgent
+from api.services.stream_view import stream_view
+from api.services.deltas import publish_delta, EVENT_UPDATED, EVENT_RESOLVED
+from api.services.pagination import clamp_limit, decode_cursor, encode_cursor, keyset_filter, DEFAULT_PAGE_SIZE
 
 logger = setup_logger("api.risks")
 router = APIRouter()
@@ -10,18 +14,33 @@ router = APIRouter()
 interpretation_agent = RiskInterpretationAgent()
 
 @router.get("/risk-events")
-async def list_risk_events(status: str = "open"):
-    """List risk events (Optimized summary view)."""
+async def list_risk_events(response: Response, status: str = "open", limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+    """
+    List risk events (Optimized summary view), newest first.
+    Keyset-paginated on (created_at, id). The body stays a bare list; when there are more
+    rows, the X-Next-Cursor header holds the `cursor` for the next page.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page_size = clamp_limit(limit)
+
     try:
         # Optimization: Fetch only ID/Type/Urgency. Exclude heavy JSON blobs from list view.
         summary_cols = "id, client_id, event_type, urgency, status, created_at"
-        resp = db_manager.client.table("risk_events")\
+        query = db_manager.client.table("risk_events")\
             .select(summary_cols)\
-            .eq("status", status)\
-            .order("created_at", desc=True)\
-            .limit(50)\
-            .execute()
-        return resp.data
+            .eq("status", status)
+        if after:
+            query = query.or_(keyset_filter(*after))
+        resp = await db_manager.aexecute(
+            query.order("created_at", desc=True).order("id", desc=True).limit(page_size + 1)
+        )
+        rows = resp.data or []
+        if len(rows) > page_size:
+            response.headers["X-Next-Cursor"] = encode_cursor(rows[page_size - 1])
+        return rows[:page_size]
     except Exception as e:
         logger.error(f"Error fetching risk events: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -30,7 +49,7 @@ async def list_risk_events(status: str = "open"):
 async def interpret_risk(event_id: str):
     """Trigger AI interpretation for a risk event."""
     # 1. Fetch Event
-    event = db_manager.get_by_id("risk_events", event_id)
+    event = await db_manager.aget_by_id("risk_events", event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
         
@@ -38,7 +57,10 @@ async def interpret_risk(event_id: str):
     interpretation = await interpretation_agent.interpret(event["client_id"], event)
     
     # 3. Save interpretation to DB
-    db_manager.update("risk_events", event_id, {"ai_interpretation": interpretation})
+    updated = await db_manager.aupdate("risk_events", event_id, {"ai_interpretation": interpretation})
+    if updated:
+        await stream_view.apply_events([updated])
+        await publish_delta(EVENT_UPDATED, [event_id])
     
     return interpretation
 
@@ -46,9 +68,11 @@ async def interpret_risk(event_id: str):
 async def resolve_risk(event_id: str):
     """Mark a risk event as resolved/dismissed."""
     try:
-        db_manager.update("risk_events", event_id, {"status": "adviser_resolved", "resolved_at": "now()"})
+        await db_manager.aupdate("risk_events", event_id, {"status": "adviser_resolved", "resolved_at": "now()"})
+        stream_view.remove_event(event_id)
+        await publish_delta(EVENT_RESOLVED, [event_id])
         # Log the resolution
-        db_manager.insert("action_logs", {
+        await db_manager.ainsert("action_logs", {
             "entity_id": event_id,
             "entity_type": "risk_event",
             "decision": "resolved",
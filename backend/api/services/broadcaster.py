@@ -1,36 +1,233 @@
 import asyncio
-from typing import AsyncGenerator
+import json
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
 from shared.logging import setup_logger
+from api.services.transports import LocalTransport
 
 logger = setup_logger("sse.broadcaster")
 
+# Bare "refetch everything" ping. Any number of pending ones are equivalent to one.
+UPDATE = "update"
+
+# Identifies this process in envelopes so delivery stats can tell local from remote
+ORIGIN = f"{socket.gethostname()}:{os.getpid()}"
+
+# Published deltas waiting to be resolved in a listening process
+INBOX_SIZE = 1000
+
+class SubscriberQueue(asyncio.Queue):
+    """
+    Bounded queue for one SSE connection. The broadcaster only ever calls `offer`,
+    which never blocks: repeated "update" pings collapse into one, and when the queue
+    is full its backlog is replaced by a single "update" so the client refetches
+    instead of the server buffering on its behalf.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.dropped = 0
+        self.coalesced = 0
+        self._update_pending = False
+
+    def offer(self, message: str) -> bool:
+        """Enqueues without waiting. Returns False if the message was folded or dropped."""
+        if message == UPDATE and self._update_pending:
+            self.coalesced += 1
+            return False
+        if self.full():
+            while not self.empty():
+                self.get_nowait()
+                self.dropped += 1
+            self.put_nowait(UPDATE)
+            if message != UPDATE:
+                self.dropped += 1
+                return False
+            return True
+        self.put_nowait(message)
+        return True
+
+    def _put(self, item):
+        if item == UPDATE:
+            self._update_pending = True
+        super()._put(item)
+
+    def _get(self):
+        item = super()._get()
+        if item == UPDATE:
+            self._update_pending = False
+        return item
+
 class EventBroadcaster:
     """
     Manages Server-Sent Event (SSE) subscriptions for real-time frontend updates.
+    Each subscriber holds at most `max_queue_size` messages, so a stalled tab costs
+    constant memory and never slows delivery to the others.
+
+    Messages travel through a transport (in-process by default, Postgres LISTEN/NOTIFY
+    across processes) and are fanned out to local subscribers when they arrive back.
+    In a listening process with a resolver, JSON deltas are first resolved, in arrival
+    order, into the payload subscribers actually receive.
     """
-    def __init__(self):
-        self.queues = []
+    def __init__(self, max_queue_size: int = 32, transport=None):
+        self.max_queue_size = max_queue_size
+        self.subscribers: Set[SubscriberQueue] = set()
+        self.transport = transport or LocalTransport()
+        self.transport.bind(self._deliver)
+        self.publish_errors = 0
+        self.received_remote = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._latency_total_ms = 0.0
+        self._latency_samples = 0
+        self.resolver: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+        self.on_resync: Optional[Callable[[], None]] = None
+        self.resolve_errors = 0
+        self._inbox: Optional[asyncio.Queue] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self.broadcasts = 0
+        self.delivered = 0
+        self.last_fanout_ms = 0.0
+        self.max_fanout_ms = 0.0
+        # Counters from subscribers that have already disconnected
+        self._closed_dropped = 0
+        self._closed_coalesced = 0
 
-    async def connect(self) -> asyncio.Queue:
+    def use_transport(self, transport):
+        """Swaps the transport. Call before `start`."""
+        self.transport = transport
+        self.transport.bind(self._deliver)
+
+    def set_resolver(self, resolver: Callable[[Dict[str, Any]], Awaitable[Any]], on_resync: Optional[Callable[[], None]] = None):
+        """
+        Registers an async callable that turns a published delta into the message sent
+        to subscribers (None drops it). `on_resync` runs whenever a delta is lost and
+        subscribers are told to refetch instead. Call before `start`.
+        """
+        self.resolver = resolver
+        self.on_resync = on_resync
+
+    async def start(self, listen: bool = True):
+        """Starts the transport. Publish-only processes (the scheduler) pass listen=False."""
+        await self.transport.start(listen=listen)
+        if listen and self.resolver and self._pump_task is None:
+            self._inbox = asyncio.Queue(maxsize=INBOX_SIZE)
+            self._pump_task = asyncio.create_task(self._pump())
+        logger.info(f"Broadcaster using '{self.transport.name}' transport (listen={listen})")
+
+    async def stop(self):
+        if self._pump_task:
+            self._pump_task.cancel()
+            try:
+                await self._pump_task
+            except asyncio.CancelledError:
+                pass
+            self._pump_task = None
+            self._inbox = None
+        await self.transport.stop()
+
+    async def connect(self) -> SubscriberQueue:
         """Create a new connection queue."""
-        queue = asyncio.Queue()
-        self.queues.append(queue)
-        logger.info(f"New SSE client connected. Active clients: {len(self.queues)}")
+        queue = SubscriberQueue(self.max_queue_size)
+        self.subscribers.add(queue)
+        logger.info(f"New SSE client connected. Active clients: {len(self.subscribers)}")
         return queue
 
-    def disconnect(self, queue: asyncio.Queue):
+    def disconnect(self, queue: SubscriberQueue):
         """Remove a connection queue."""
-        if queue in self.queues:
-            self.queues.remove(queue)
-            logger.info(f"SSE client disconnected. Active clients: {len(self.queues)}")
+        if queue in self.subscribers:
+            self.subscribers.discard(queue)
+            self._closed_dropped += queue.dropped
+            self._closed_coalesced += queue.coalesced
+            logger.info(f"SSE client disconnected. Active clients: {len(self.subscribers)}")
 
     async def broadcast(self, message: dict | str):
-        """Send a message to all connected clients."""
-        import json
+        """Send a message to all connected clients, in every process sharing the transport."""
         msg_str = message if isinstance(message, str) else json.dumps(message)
         logger.debug(f"Broadcasting event: {msg_str[:50]}...")
-        for queue in self.queues:
-            await queue.put(msg_str)
+        envelope = {"origin": ORIGIN, "sent_at": time.time(), "message": msg_str}
+        try:
+            await self.transport.publish(envelope)
+        except Exception as e:
+            # Keep this process's own subscribers up to date even if the bus is down
+            self.publish_errors += 1
+            logger.error(f"Failed to publish via {self.transport.name} transport: {e}")
+            self._deliver(envelope)
+
+    def _deliver(self, envelope: Dict[str, Any]):
+        """Fans an envelope out to this process's subscribers."""
+        latency_ms = max(0.0, (time.time() - envelope.get("sent_at", time.time())) * 1000)
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self._latency_total_ms += latency_ms
+        self._latency_samples += 1
+        if envelope.get("origin") != ORIGIN:
+            self.received_remote += 1
+
+        msg_str = envelope.get("message", UPDATE)
+        if self._inbox is not None and msg_str.startswith("{"):
+            try:
+                self._inbox.put_nowait(msg_str)
+            except asyncio.QueueFull:
+                self._resync("delta inbox full")
+            return
+        self._fanout(msg_str)
+
+    async def _pump(self):
+        """Resolves queued deltas one at a time so subscribers see them in publish order."""
+        while True:
+            msg_str = await self._inbox.get()
+            try:
+                resolved = await self.resolver(json.loads(msg_str))
+            except Exception as e:
+                self._resync(f"failed to resolve delta: {e}")
+                continue
+            if resolved is not None:
+                self._fanout(resolved if isinstance(resolved, str) else json.dumps(resolved))
+
+    def _resync(self, reason: str):
+        self.resolve_errors += 1
+        logger.error(f"Stream delta lost ({reason}); asking subscribers to refetch")
+        if self.on_resync:
+            self.on_resync()
+        self._fanout(UPDATE)
+
+    def _fanout(self, msg_str: str):
+        start = time.perf_counter()
+        delivered = 0
+        for queue in list(self.subscribers):
+            if queue.offer(msg_str):
+                delivered += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.broadcasts += 1
+        self.delivered += delivered
+        self.last_fanout_ms = elapsed_ms
+        self.max_fanout_ms = max(self.max_fanout_ms, elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [q.qsize() for q in self.subscribers]
+        return {
+            "subscribers": len(depths),
+            "max_queue_size": self.max_queue_size,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "broadcasts": self.broadcasts,
+            "delivered": self.delivered,
+            "dropped": self._closed_dropped + sum(q.dropped for q in self.subscribers),
+            "coalesced": self._closed_coalesced + sum(q.coalesced for q in self.subscribers),
+            "last_fanout_ms": round(self.last_fanout_ms, 3),
+            "max_fanout_ms": round(self.max_fanout_ms, 3),
+            "transport": self.transport.name,
+            "publish_errors": self.publish_errors,
+            "resolve_errors": self.resolve_errors,
+            "inbox_depth": self._inbox.qsize() if self._inbox is not None else 0,
+            "received_remote": self.received_remote,
+            "last_delivery_latency_ms": round(self.last_latency_ms, 3),
+            "avg_delivery_latency_ms": round(self._latency_total_ms / self._latency_samples, 3) if self._latency_samples else 0.0,
+            "max_delivery_latency_ms": round(self.max_latency_ms, 3),
+        }
 
 # Global singleton
 broadcaster = EventBroadcaster()
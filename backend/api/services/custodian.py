@@ -1,36 +1,28 @@
-from yahooquery import Ticker
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from shared.database import db_manager
+from shared.pricing import PriceService, get_price_service
 from shared.logging import setup_logger
+from mcp_server.market_data import get_market_data_provider
 
 logger = setup_logger("custodian")
 
+def _prices() -> PriceService:
+    """The shared quote cache, routed on first use through the configured provider (Yahoo live, or a recorded replay offline)."""
+    get_market_data_provider()
+    return get_price_service()
+
 class LiveCustodianClient:
     """
     Simulates a live integration with a custodial platform (e.g., Transact, Interactive Brokers).
     In a real system, this would make an authenticated API call to the custodian's /positions endpoint.
-    Here, we read the static base holdings from Supabase and use `yahooquery` to simulate live market pricing
+    Here, we read the static base holdings from Supabase and use the market data provider (`yahooquery` live) to simulate live market pricing
     on those assets to generate a real-time portfolio snapshot.
     """
     
     @staticmethod
     def _get_live_price(ticker: str) -> Optional[float]:
-        try:
-            # First try as a standard ticker
-            tk = Ticker(ticker)
-            hist = tk.history(period="1d")
-            if not hist.empty and 'close' in hist.columns:
-                return float(hist["close"].iloc[-1])
-            
-            # If empty, try appending .L for London Stock Exchange
-            tk_l = Ticker(f"{ticker}.L")
-            hist_l = tk_l.history(period="1d")
-            if not hist_l.empty and 'close' in hist_l.columns:
-                return float(hist_l["close"].iloc[-1])
-                
-        except Exception as e:
-            logger.debug(f"Failed to fetch live price for {ticker}: {e}")
-        return None
+        # Shared quote cache: one multi-symbol fetch per TTL, `.L` fallback remembered per ticker
+        return _prices().get_price(ticker)
 
     @classmethod
     def get_live_portfolio(cls, client_id: str) -> Optional[Dict[str, Any]]:
@@ -43,49 +35,77 @@ class LiveCustodianClient:
             resp = db_manager.client.table("portfolios").select("*").eq("client_id", client_id).execute()
             if not resp.data:
                 return None
-                
-            base_portfolio = resp.data[0]
-            holdings = base_portfolio.get("holdings", [])
+            return cls.price_portfolio(resp.data[0])
+        except Exception as e:
+            logger.error(f"LiveCustodianClient failed for {client_id}: {e}")
+            return None
+
+    @classmethod
+    def get_live_portfolios(cls, base_portfolios: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Prices a batch of already-loaded portfolio rows.
+        Returns { client_id: live_portfolio } for every portfolio that priced successfully.
+        """
+        # Price every distinct ticker across the batch in one request up front
+        _prices().prefetch(
+            h.get("ticker") for p in base_portfolios for h in (p.get("holdings") or [])
+        )
+        live = {}
+        for base_portfolio in base_portfolios:
+            client_id = base_portfolio.get("client_id")
+            if client_id in live:
+                continue
+            try:
+                live[client_id] = cls.price_portfolio(base_portfolio, prefetch=False)
+            except Exception as e:
+                logger.error(f"LiveCustodianClient failed for {client_id}: {e}")
+        return live
+
+    @classmethod
+    def price_portfolio(cls, base_portfolio: Dict[str, Any], prefetch: bool = True) -> Dict[str, Any]:
+        """
+        Builds the live snapshot for a single base portfolio row. `prefetch=False` when
+        the caller has already prefetched the holdings' tickers.
+        """
+        holdings = base_portfolio.get("holdings", [])
+        if prefetch:
+            _prices().prefetch(h.get("ticker") for h in holdings)
+        
+        total_live_value = 0.0
+        live_holdings = []
+        
+        # 2. Simulate live pricing for each holding
+        for holding in holdings:
+            ticker = holding.get("ticker")
+            quantity = holding.get("quantity", 0)
+            base_price = holding.get("price_gbp", 0)
             
-            total_live_value = 0.0
-            live_holdings = []
+            live_price = cls._get_live_price(ticker) if ticker else None
             
-            # 2. Simulate live pricing for each holding
-            for holding in holdings:
-                ticker = holding.get("ticker")
-                quantity = holding.get("quantity", 0)
-                base_price = holding.get("price_gbp", 0)
-                
-                live_price = cls._get_live_price(ticker) if ticker else None
-                
-                # If we couldn't get a live price, fallback to base price with a simulated tiny drift
-                if live_price is None:
-                    live_price = base_price
-                
-                live_value = live_price * quantity
-                total_live_value += live_value
-                
-                live_holdings.append({
-                    **holding,
-                    "live_price_gbp": live_price,
-                    "live_value_gbp": live_value
-                })
+            # If we couldn't get a live price, fallback to base price with a simulated tiny drift
+            if live_price is None:
+                live_price = base_price
             
-            # 3. Recalculate exposures
-            for holding in live_holdings:
-                holding["exposure_percentage"] = float(holding["live_value_gbp"] / total_live_value) if total_live_value > 0 else 0
-
-            # 4. Return the live snapshot object (without saving over the base structure)
-            return {
-                "id": base_portfolio["id"], # Pass original ID for reference
-                "client_id": client_id,
-                "holdings": live_holdings,
-                "total_value_gbp": total_live_value,
-                "cash_balance_gbp": base_portfolio.get("cash_balance_gbp", 0),
-                "target_risk_score": base_portfolio.get("target_risk_score", 5),
-                "current_risk_score": base_portfolio.get("current_risk_score", 5) # In real life, recalculate this based on new exposures
-            }
+            live_value = live_price * quantity
+            total_live_value += live_value
             
-        except Exception as e:
-            logger.error(f"LiveCustodianClient failed for {client_id}: {e}")
-            return None
+            live_holdings.append({
+                **holding,
+                "live_price_gbp": live_price,
+                "live_value_gbp": live_value
+            })
+        
+        # 3. Recalculate exposures
+        for holding in live_holdings:
+            holding["exposure_percentage"] = float(holding["live_value_gbp"] / total_live_value) if total_live_value > 0 else 0
+
+        # 4. Return the live snapshot object (without saving over the base structure)
+        return {
+            "id": base_portfolio["id"], # Pass original ID for reference
+            "client_id": base_portfolio.get("client_id"),
+            "holdings": live_holdings,
+            "total_value_gbp": total_live_value,
+            "cash_balance_gbp": base_portfolio.get("cash_balance_gbp", 0),
+            "target_risk_score": base_portfolio.get("target_risk_score", 5),
+            "current_risk_score": base_portfolio.get("current_risk_score", 5) # In real life, recalculate this based on new exposures
+        }
@@ -0,0 +1,34 @@
+from typing import Any, Iterable
+from api.services.broadcaster import broadcaster
+
+# Typed stream changes. Producers publish ids only; each API worker's stream view
+# resolves them into formatted cards once and pushes those to its SSE subscribers.
+EVENT_CREATED = "event_created"
+EVENT_UPDATED = "event_updated"
+EVENT_RESOLVED = "event_resolved"
+DRAFT_CREATED = "draft_created"
+DRAFT_UPDATED = "draft_updated"
+DRAFT_APPROVED = "draft_approved"
+DRAFT_REJECTED = "draft_rejected"
+BRIEF_READY = "brief_ready"
+SNAPSHOT_CHANGED = "snapshot_changed"
+
+EVENT_DELTAS = {EVENT_CREATED, EVENT_UPDATED, EVENT_RESOLVED, BRIEF_READY}
+DRAFT_DELTAS = {DRAFT_CREATED, DRAFT_UPDATED, DRAFT_APPROVED, DRAFT_REJECTED}
+DELTA_TYPES = EVENT_DELTAS | DRAFT_DELTAS | {SNAPSHOT_CHANGED}
+
+# Keeps a published delta well inside the Postgres NOTIFY payload limit
+IDS_PER_MESSAGE = 100
+
+async def publish_delta(delta_type: str, ids: Iterable[str] = (), **fields: Any):
+    """
+    Broadcasts one typed delta per IDS_PER_MESSAGE ids. Event and draft deltas with
+    no ids are skipped; brief and snapshot deltas may be id-less.
+    """
+    if delta_type not in DELTA_TYPES:
+        raise ValueError(f"Unknown stream delta type: {delta_type!r}")
+    ids = [i for i in dict.fromkeys(ids) if i]
+    if not ids and delta_type not in (BRIEF_READY, SNAPSHOT_CHANGED):
+        return
+    for start in range(0, max(len(ids), 1), IDS_PER_MESSAGE):
+        await broadcaster.broadcast({"type": delta_type, "ids": ids[start:start + IDS_PER_MESSAGE], **fields})
@@ -4,9 +4,11 @@ from api.services.formatters import _drawer_title, _format_time, _format_date
 async def _get_client_memory(client_id: str, context_query: str = "general") -> list:
     """Fetch recent behavioural memory items for a client (chronological, fast)."""
     try:
-        resp = db_manager.client.table("behavioural_memory")\
-            .select("content, created_at").eq("client_id", client_id)\
-            .order("created_at", desc=True).limit(5).execute()
+        resp = await db_manager.aexecute(
+            db_manager.client.table("behavioural_memory")
+            .select("content, created_at").eq("client_id", client_id)
+            .order("created_at", desc=True).limit(5)
+        )
         return [
             {
                 "date": _format_date(m.get("created_at")),
@@ -50,8 +52,10 @@ async def _build_drawer_data_fast(client_id: str, event: dict, client: dict, por
             portfolio = portfolio_override
         else:
             try:
-                port_resp = db_manager.client.table("portfolios")\
-                    .select("holdings").eq("client_id", client_id).execute()
+                port_resp = await db_manager.aexecute(
+                    db_manager.client.table("portfolios")
+                    .select("holdings").eq("client_id", client_id)
+                )
                 if port_resp.data:
                     portfolio = port_resp.data[0]
             except Exception:
@@ -173,8 +177,10 @@ async def _build_meeting_drawer_fast(client_id: str, meeting: dict, brief: dict,
         portfolio = portfolio_override
     else:
         try:
-            port_resp = db_manager.client.table("portfolios")\
-                .select("holdings").eq("client_id", client_id).execute()
+            port_resp = await db_manager.aexecute(
+                db_manager.client.table("portfolios")
+                .select("holdings").eq("client_id", client_id)
+            )
             if port_resp.data:
                 portfolio = port_resp.data[0]
         except Exception:
@@ -87,6 +87,20 @@ def _event_to_text(event_type: str, client_name: str, classification: dict, inte
     return f"New intelligence for {client_name}."
 
 
+def _build_summary(interpretation: dict) -> list:
+    """Build summary bullet points from AI interpretation."""
+    if not interpretation:
+        return []
+    bullets = []
+    if interpretation.get("consequence_if_ignored"):
+        bullets.append(interpretation["consequence_if_ignored"])
+    if interpretation.get("behavioural_nuance"):
+        bullets.append(interpretation["behavioural_nuance"])
+    if interpretation.get("compliance_note"):
+        bullets.append(interpretation["compliance_note"])
+    return bullets
+
+
 def _build_chips(event_type: str, classification: dict, urgency: str) -> list:
     """Build intelligence chips for a card."""
     classification = classification or {}
@@ -0,0 +1,62 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple, Union
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def clamp_limit(limit: Optional[int], default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Bounds a client-supplied page size to 1..maximum."""
+    if not limit:
+        return default
+    return max(1, min(int(limit), maximum))
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque keyset cursor for a row ordered by (created_at DESC, id DESC)."""
+    raw = json.dumps([str(row.get("created_at") or ""), str(row["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Returns (created_at, id). Raises ValueError for anything that isn't a cursor we issued."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(created_at, str) or not isinstance(row_id, str) or not row_id:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    parse_timestamp(created_at)  # ValueError for a malformed timestamp
+    return created_at, row_id
+
+
+def parse_timestamp(value: Union[str, datetime, None]) -> datetime:
+    """
+    Timezone-aware datetime for a created_at value, so timestamps compare by instant
+    rather than by spelling (offsets, trailing zeros, 'Z'). Empty sorts oldest; naive is UTC.
+    """
+    if not value:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def sort_key(row: Dict[str, Any]) -> Tuple[datetime, str]:
+    """(created_at, id) sort key of a row, matching the (created_at DESC, id DESC) order."""
+    return parse_timestamp(row.get("created_at")), str(row["id"])
+
+
+def keyset_filter(created_at: str, row_id: str) -> str:
+    """
+    PostgREST `or=(...)` expression selecting rows strictly after the cursor in
+    (created_at DESC, id DESC) order.
+    """
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")'
+
+
+def is_after(key: Tuple[datetime, str], cursor_key: Tuple[str, str]) -> bool:
+    """In-memory equivalent of keyset_filter: `key` (from sort_key) against a decoded cursor."""
+    return key < (parse_timestamp(cursor_key[0]), cursor_key[1])
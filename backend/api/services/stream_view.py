@@ -0,0 +1,563 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+from shared.database import db_manager
+from shared.logging import setup_logger
+from api.services.formatters import _event_to_text, _build_chips, _build_summary, _format_time
+from api.services.drawer import _build_drawer_data_fast
+from api.services.pagination import encode_cursor, decode_cursor, is_after, sort_key, DEFAULT_PAGE_SIZE
+from api.services.deltas import EVENT_CREATED, EVENT_UPDATED, EVENT_RESOLVED, BRIEF_READY, DRAFT_DELTAS, SNAPSHOT_CHANGED
+
+logger = setup_logger("api.stream_view")
+
+TAB_LABELS = {
+    "market_risk": "Market Risk",
+    "isa_optimization": "ISA Optimization",
+    "cgt_exposure": "CGT Exposure",
+    "pension_allowance": "Pension Tapering",
+    "compliance_exposure": "Compliance",
+    "behavioural_risk": "Behavioural",
+    "vulnerability_alert": "Vulnerability",
+    "tax_opportunity": "Tax Window",
+    "market_interrupt": "Market Alert",
+    "morning_intelligence": "Morning Brief",
+}
+
+TYPE_SUMMARY_LABELS = {
+    "compliance_exposure": "Risk mandate drift detected for {n} clients",
+    "pension_allowance": "Pension Tapering alerts for {n} high-income clients",
+    "isa_optimization": "ISA allowance opportunities for {n} clients",
+    "tax_opportunity": "Tax optimization windows open for {n} clients",
+    "vulnerability_alert": "Consumer Duty: {n} clients flagged for vulnerability assessment",
+    "market_risk": "Market volatility thresholds breached for {n} clients",
+    "behavioural_risk": "Behavioural friction detected for {n} clients",
+    "cgt_exposure": "Capital Gains Tax exposure for {n} clients",
+}
+
+EVENT_COLUMNS = "id, client_id, event_type, urgency, status, deterministic_classification, ai_interpretation, created_at"
+DRAFT_COLUMNS = "id, risk_event_id, draft_content, status"
+
+
+@dataclass
+class _ViewState:
+    """Everything a rebuild loads, swapped into the view in one assignment."""
+    clients: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    portfolios: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    memories: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    drafts: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)  # risk_event_id -> pending drafts
+    entries: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # event_id -> prepared card entry
+    heartbeat_logs: List[Dict[str, Any]] = field(default_factory=list)
+    tab_counts: Dict[str, Dict[str, int]] = field(default_factory=dict)  # { event_type: { total, high, critical } }
+
+
+class StreamView:
+    """
+    In-process materialised model of the intelligence stream.
+    Built once from the database, then patched row-by-row whenever a job or endpoint
+    writes a risk event or draft. GET /stream only filters, pages and groups cached
+    cards, so a page load costs no PostgREST queries and no drawer formatting.
+    Tab counts come from the `risk_event_tab_counts` aggregate at build time and are
+    adjusted per patch, never recomputed by walking every event.
+
+    Writers in other processes (the standalone scheduler, other API workers) reach
+    the view through published deltas (see `resolve_delta`); anything missed is picked
+    up by a full rebuild once the view is older than `max_age_seconds`.
+
+    A rebuild assembles a new `_ViewState` off to the side and swaps it in at the end,
+    so reads and patches during its awaits see the previous state, never a mix.
+    """
+
+    def __init__(self, max_age_seconds: float = 300.0):
+        self.max_age_seconds = max_age_seconds
+        self._state = _ViewState()
+        self.version = 0
+        self._built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._render_cache: Dict[str, Dict[str, Any]] = {}
+        self._ordered: Optional[List[Dict[str, Any]]] = None
+
+    # ─── BUILD ───────────────────────────────────────────────
+
+    async def ensure_built(self):
+        if self._built_at is not None and time.monotonic() - self._built_at < self.max_age_seconds:
+            return
+        async with self._lock:
+            if self._built_at is not None and time.monotonic() - self._built_at < self.max_age_seconds:
+                return
+            await self._rebuild()
+
+    async def _rebuild(self):
+        started = time.perf_counter()
+        clients_rows, drafts_rows, portfolio_rows, memory_resp, event_rows, logs_resp = await asyncio.gather(
+            db_manager.aselect_all("clients", "id, first_name, last_name, behavioural_profile"),
+            db_manager.aselect_all("draft_actions", "id, risk_event_id, draft_content", filters={"status": "pending"}),
+            db_manager.aselect_all("portfolios", "id, client_id, holdings"),
+            db_manager.aexecute(
+                db_manager.client.table("behavioural_memory")
+                .select("client_id, content, created_at")
+                .order("created_at", desc=True)
+                .limit(100)
+            ),
+            db_manager.aselect_all("risk_events", EVENT_COLUMNS, filters={"status": "open"}),
+            db_manager.aexecute(
+                db_manager.client.table("heartbeat_logs")
+                .select("*").order("created_at", desc=True).limit(2)
+            ),
+        )
+
+        state = _ViewState(clients={c["id"]: c for c in clients_rows}, heartbeat_logs=logs_resp.data or [])
+        for p in portfolio_rows:
+            state.portfolios.setdefault(p["client_id"], p)
+        for m in (memory_resp.data or []):
+            if m.get("client_id"):
+                state.memories.setdefault(m["client_id"], []).append(m)
+        for d in drafts_rows:
+            if d.get("risk_event_id"):
+                state.drafts.setdefault(d["risk_event_id"], []).append(d)
+
+        for event in event_rows:
+            entry = await self._build_entry(event, state)
+            if entry:
+                state.entries[event["id"]] = entry
+        state.tab_counts = await self._load_tab_counts(state.entries)
+        self._state = state
+        self._built_at = time.monotonic()
+        self._touch()
+        logger.info(f"Stream view rebuilt: {len(state.entries)} open events in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    async def _load_tab_counts(self, entries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        try:
+            resp = await db_manager.aexecute(db_manager.client.rpc("risk_event_tab_counts", {}))
+            return {
+                row["event_type"]: {"total": row["total"], "high": row["high"], "critical": row["critical"]}
+                for row in (resp.data or []) if row.get("event_type")
+            }
+        except Exception as e:
+            # Function not deployed yet: derive the counts from the events we just loaded
+            logger.warning(f"risk_event_tab_counts RPC unavailable, counting in memory: {e}")
+            tab_counts: Dict[str, Dict[str, int]] = {}
+            for entry in entries.values():
+                _count(tab_counts, entry, 1)
+            return tab_counts
+
+    def invalidate(self):
+        """Forces a full rebuild on the next read."""
+        self._built_at = None
+
+    # ─── PATCHES ─────────────────────────────────────────────
+
+    async def apply_events(self, events: List[Dict[str, Any]]):
+        """Upserts written risk_events rows; rows that are no longer open are dropped."""
+        if self._built_at is None:
+            return
+        async with self._lock:
+            state = self._state
+            for event in events:
+                if not event or not event.get("id"):
+                    continue
+                if event.get("status", "open") != "open":
+                    self._drop_entry(event["id"])
+                    continue
+                entry = await self._build_entry(event, state)
+                if entry:
+                    self._drop_entry(event["id"])
+                    state.entries[event["id"]] = entry
+                    _count(state.tab_counts, entry, 1)
+            self._touch()
+
+    def remove_event(self, event_id: str):
+        if self._drop_entry(event_id):
+            self._touch()
+
+    def _drop_entry(self, event_id: str) -> bool:
+        entry = self._state.entries.pop(event_id, None)
+        if entry is None:
+            return False
+        _count(self._state.tab_counts, entry, -1)
+        return True
+
+    async def apply_draft(self, draft: Dict[str, Any]):
+        """Upserts a written draft_actions row, attaching or detaching it from its event card."""
+        if self._built_at is None or not draft or not draft.get("risk_event_id"):
+            return
+        async with self._lock:
+            state = self._state
+            event_id = draft["risk_event_id"]
+            pending = [d for d in state.drafts.get(event_id, []) if d["id"] != draft.get("id")]
+            if draft.get("status", "pending") == "pending":
+                pending.append(draft)
+            state.drafts[event_id] = pending
+            entry = state.entries.get(event_id)
+            if entry:
+                entry["draft_card"] = _draft_card(entry, state.drafts)
+            self._touch()
+
+    def add_heartbeat_log(self, log: Dict[str, Any]):
+        if self._built_at is None or not log:
+            return
+        self._state.heartbeat_logs = ([log] + self._state.heartbeat_logs)[:2]
+        self._touch()
+
+    def _touch(self):
+        self.version += 1
+        self._render_cache.clear()
+        self._ordered = None
+
+    def _ordered_entries(self) -> List[Dict[str, Any]]:
+        """Entries in (created_at DESC, id DESC) order, re-sorted only after a patch."""
+        if self._ordered is None:
+            self._ordered = sorted(self._state.entries.values(), key=lambda e: e["sort_key"], reverse=True)
+        return self._ordered
+
+    # ─── DELTAS ──────────────────────────────────────────────
+
+    async def resolve_delta(self, delta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Applies a published delta to this worker's view and returns what its SSE
+        subscribers receive: the delta type with formatted cards and current tab counts,
+        so browsers patch in place instead of refetching /stream. Rows are fetched once
+        per worker by id, and only when the view doesn't already hold them.
+        """
+        delta_type = delta.get("type")
+        ids = delta.get("ids") or []
+        await self.ensure_built()
+        resolved: Dict[str, Any] = {k: v for k, v in delta.items() if k != "ids"}
+
+        if delta_type in (EVENT_CREATED, EVENT_UPDATED, BRIEF_READY):
+            missing = ids if delta_type == EVENT_UPDATED else [i for i in ids if i not in self._state.entries]
+            if missing:
+                rows = await db_manager.aget_by_ids("risk_events", missing, EVENT_COLUMNS)
+                await self.apply_events(list(rows.values()))
+            entries = self._state.entries
+            resolved["items"] = [self._delta_item(entries[i]) for i in ids if i in entries]
+        elif delta_type == EVENT_RESOLVED:
+            for event_id in ids:
+                self.remove_event(event_id)
+            resolved["ids"] = ids
+        elif delta_type in DRAFT_DELTAS:
+            rows = await db_manager.aget_by_ids("draft_actions", ids, DRAFT_COLUMNS)
+            resolved["drafts"] = []
+            for draft in rows.values():
+                await self.apply_draft(draft)
+                entry = self._state.entries.get(draft.get("risk_event_id"))
+                resolved["drafts"].append({
+                    "id": draft["id"],
+                    "event_id": draft.get("risk_event_id"),
+                    "card": entry["draft_card"] if entry else None,
+                })
+        elif delta_type != SNAPSHOT_CHANGED:
+            logger.warning(f"Ignoring unknown stream delta: {delta_type}")
+            return None
+
+        resolved["tabs"] = _build_tabs(self._state.tab_counts)
+        resolved["version"] = self.version
+        return resolved
+
+    def _delta_item(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """One event as a delta payload: its cards, plus a ready-made message for a new group."""
+        event = entry["event"]
+        etype = event.get("event_type")
+        item = {
+            "id": event["id"],
+            "kind": entry["kind"],
+            "event_type": etype,
+            "cards": [entry["card"]] + ([entry["draft_card"]] if entry["draft_card"] else []),
+        }
+        if entry["kind"] == "grouped":
+            item["message"] = _group_message(etype, [entry])
+        elif entry["kind"] == "master":
+            item["message"] = _master_brief_message(event, entry["classification"])
+        return item
+
+    # ─── ENTRIES ─────────────────────────────────────────────
+
+    async def _build_entry(self, event: Dict[str, Any], state: _ViewState) -> Optional[Dict[str, Any]]:
+        """Formats one open event into its card once, so reads never re-run the drawer builder."""
+        try:
+            client = state.clients.get(event["client_id"]) or {}
+            client_name = f"{client.get('first_name', '')} {client.get('last_name', '')}".strip() or "Unknown Client"
+            cls = event.get("deterministic_classification") or {}
+            interp = event.get("ai_interpretation") or {}
+
+            is_master = cls.get("is_master_brief", False)
+            is_macro = cls.get("is_macro_grouping", False)
+            etype = event.get("event_type")
+            is_morning = etype in ["morning_intelligence", "market_interrupt"]
+            urgency = event.get("urgency", "medium")
+
+            drawer_data = await _build_drawer_data_fast(
+                event["client_id"], event, client,
+                portfolio_override=state.portfolios.get(event["client_id"]),
+                memory_override=state.memories.get(event["client_id"], [])
+            )
+
+            card = {
+                "id": event["id"],
+                "type": etype or "market_risk",
+                "urgency": urgency,
+                "chips": _build_chips(etype or "", cls, event.get("urgency", 3)),
+                "drawerData": drawer_data,
+                "isDraft": False,
+                "isMasterBrief": is_master,
+                "isMacroGrouping": is_macro,
+                "client": client_name,
+                "client_id": event["client_id"]
+            }
+
+            if is_master and is_morning:
+                kind = "master"
+            elif is_morning and (is_macro or etype == "morning_intelligence"):
+                kind = "morning_card"
+                if is_macro:
+                    card["client"] = cls.get("impact_title", "Macro Risk")
+                    card["drawerData"]["title"] = card["client"]
+                else:
+                    card["impact"] = _event_to_text(etype or "", client_name, cls, interp)
+            else:
+                kind = "grouped"
+
+            entry = {
+                "event": event,
+                "kind": kind,
+                "client_name": client_name,
+                "card": card,
+                "interpretation": interp,
+                "classification": cls,
+                "is_master": is_master,
+                "is_macro": is_macro,
+                "sort_key": sort_key(event),
+            }
+            entry["draft_card"] = _draft_card(entry, state.drafts)
+            return entry
+        except Exception as e:
+            logger.error(f"Error processing risk event {event.get('id')}: {e}")
+            return None
+
+    # ─── READ ────────────────────────────────────────────────
+
+    async def render(self, filter: str = "all", search: str = "", limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns { stream, tabs, next_cursor } for one page of at most `limit` events.
+        The morning brief and heartbeat logs ride on the first page only; later pages
+        continue in (created_at DESC, id DESC) order after `cursor`.
+        Raises ValueError for a malformed cursor.
+        """
+        cursor_key = decode_cursor(cursor) if cursor else None
+        await self.ensure_built()
+        cache_key = f"{filter}\x00{search.lower()}\x00{limit}"
+        cached = self._render_cache.get(cache_key) if cursor_key is None else None
+        if cached is not None:
+            return cached
+
+        messages = []
+        grouped_events = {}
+        morning_brief_msg = None
+        morning_brief_cards = []
+        page_size = 0
+        last_entry = None
+        has_more = False
+        sl = search.lower()
+
+        for entry in self._ordered_entries():
+            event = entry["event"]
+            etype = event.get("event_type")
+            cls = entry["classification"]
+
+            # Search filter
+            if search:
+                if (sl not in entry["client_name"].lower() and
+                    sl not in (etype or "").replace("_", " ").lower() and
+                    sl not in cls.get("reason", "").lower()):
+                    continue
+
+            if entry["kind"] == "master":
+                if cursor_key is None:
+                    morning_brief_msg = _master_brief_message(event, cls)
+                continue
+            if entry["kind"] == "morning_card":
+                if cursor_key is None:
+                    morning_brief_cards.append(entry["card"])
+                    if entry["draft_card"]:
+                        morning_brief_cards.append(entry["draft_card"])
+                continue
+
+            # Filter by action-cluster tab, then page
+            if filter != "all" and filter != etype:
+                continue
+            if cursor_key is not None and not is_after(entry["sort_key"], cursor_key):
+                continue
+            if page_size == limit:
+                has_more = True
+                break
+            grouped_events.setdefault(etype, []).append(entry)
+            page_size += 1
+            last_entry = entry
+
+        # Combine morning brief
+        if morning_brief_msg:
+            morning_brief_msg["cards"] = morning_brief_cards
+            messages.append(morning_brief_msg)
+
+        # Process grouped regular events
+        for etype, items in grouped_events.items():
+            messages.append(_group_message(etype, items))
+
+        # Heartbeat Logs — only on the first page of the "all" tab
+        if filter == "all" and cursor_key is None:
+            for log in self._state.heartbeat_logs:
+                summary = log.get("result_summary", "")
+                messages.append({
+                    "id": str(log.get("id", "")),
+                    "type": "heartbeat",
+                    "timestamp": _format_time(log.get("created_at")),
+                    "client": "System / AtlasEngine",
+                    "text": f"{log.get('sweep_type', 'Heartbeat').replace('_', ' ').title()} completed. {summary}",
+                    "cards": [],
+                    "timeAgo": _format_time(log.get("created_at")),
+                })
+
+        # morning_intelligence always on top, then chronologically (descending)
+        morning = [m for m in messages if m.get("type") == "morning_intelligence"]
+        rest = [m for m in messages if m.get("type") != "morning_intelligence"]
+        rest.sort(key=lambda x: str(x.get("timestamp", "")), reverse=True)
+        messages = morning + rest
+
+        result = {
+            "stream": messages,
+            "tabs": _build_tabs(self._state.tab_counts),
+            "next_cursor": encode_cursor(last_entry["event"]) if has_more and last_entry else None,
+        }
+        if not search and cursor_key is None:
+            self._render_cache[cache_key] = result
+        return result
+
+
+def _count(tab_counts: Dict[str, Dict[str, int]], entry: Dict[str, Any], delta: int):
+    """Adjusts tab counters for every non-master event."""
+    etype = entry["event"].get("event_type")
+    if not etype or entry["is_master"]:
+        return
+    urgency = entry["event"].get("urgency", "medium")
+    counts = tab_counts.setdefault(etype, {"total": 0, "high": 0, "critical": 0})
+    counts["total"] += delta
+    if urgency in ("high", "critical"):
+        counts["high"] += delta
+    if urgency == "critical":
+        counts["critical"] += delta
+    if counts["total"] <= 0:
+        del tab_counts[etype]
+
+
+def _draft_card(entry: Dict[str, Any], drafts: Dict[str, List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    event_drafts = drafts.get(entry["event"]["id"], [])
+    if not event_drafts or entry["is_master"] or entry["is_macro"]:
+        return None
+    draft = event_drafts[0]
+    return {
+        "id": draft["id"],
+        "type": "draft",
+        "risk_event_id": entry["event"]["id"],
+        "client": entry["client_name"],
+        "chips": ["Draft Ready", "Pending Approval"],
+        "drawerData": {
+            "title": "Draft Communication",
+            "isDraft": True,
+            "subject": (draft.get("draft_content") or {}).get("subject", ""),
+            "body": (draft.get("draft_content") or {}).get("body", ""),
+        },
+        "isDraft": True,
+    }
+
+
+def _master_brief_message(event: Dict[str, Any], cls: Dict[str, Any]) -> Dict[str, Any]:
+    market_summary = cls.get("market_summary", "")
+    critical_news = cls.get("critical_news", [])
+
+    summary_bullets = []
+    # 1. Critical News at the top
+    for news in critical_news:
+        summary_bullets.append(f"🚨 NEWS: {news}")
+
+    # 2. Market Summary
+    if market_summary:
+        summary_bullets.append(market_summary)
+
+    if not summary_bullets:
+        summary_bullets = ["Market analysis pending..."]
+
+    return {
+        "id": event["id"],
+        "type": "morning_intelligence",
+        "timestamp": _format_time(event.get("created_at")),
+        "client": "Adviser Dashboard",
+        "text": cls.get("proactive_thought") or f"Market Intelligence ({len(critical_news)})",
+        "summary": summary_bullets,
+        "timeAgo": _format_time(event.get("created_at")),
+    }
+
+
+def _group_message(etype: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if len(items) == 1:
+        item = items[0]
+        event = item["event"]
+        return {
+            "id": event["id"],
+            "type": etype,
+            "timestamp": _format_time(event.get("created_at")),
+            "client": item["client_name"],
+            "text": item["classification"].get("proactive_thought") or item["interpretation"].get("proactive_thought") or _event_to_text(etype, item["client_name"], item["classification"], item["interpretation"]),
+            "summary": _build_summary(item["interpretation"]),
+            "cards": [item["card"]] + ([item["draft_card"]] if item["draft_card"] else []),
+            "timeAgo": _format_time(event.get("created_at")),
+        }
+
+    first_item = items[0]
+    event = first_item["event"]
+    summary_text = TYPE_SUMMARY_LABELS.get(etype, "").format(n=len(items)) or f"Multiple {etype.replace('_', ' ').title()} events detected"
+
+    # Try to use proactive voice from the first item
+    first_interp = first_item.get("interpretation") or {}
+    first_cls = first_item.get("classification") or {}
+    proactive = first_cls.get("proactive_thought") or first_interp.get("proactive_thought")
+
+    cards = []
+    summaries = []
+    for itm in items:
+        cards.append(itm["card"])
+        if itm["draft_card"]:
+            cards.append(itm["draft_card"])
+        itm_summaries = _build_summary(itm["interpretation"])
+        if itm_summaries:
+            summaries.append(f"{itm['client_name']}: {itm_summaries[0]}")
+
+    return {
+        "id": f"group-{etype}-{event['id']}",
+        "type": etype,
+        "timestamp": _format_time(event.get("created_at")),
+        "client": "Strategic Alert",
+        "text": proactive or summary_text,
+        "summary": summaries[:3],
+        "cards": cards,
+        "timeAgo": _format_time(event.get("created_at")),
+        "clientCount": len(items),
+    }
+
+
+def _build_tabs(tab_counts: Dict[str, Dict[str, int]]) -> List[Dict[str, Any]]:
+    total_all = sum(v["total"] for v in tab_counts.values())
+    high_all = sum(v["high"] for v in tab_counts.values())
+
+    tabs = [{"key": "all", "label": "All", "count": total_all, "highCount": high_all}]
+    for etype, counts in sorted(tab_counts.items(), key=lambda x: x[1]["total"], reverse=True):
+        tabs.append({
+            "key": etype,
+            "label": TAB_LABELS.get(etype, etype.replace("_", " ").title()),
+            "count": counts["total"],
+            "highCount": counts["high"],
+        })
+    return tabs
+
+
+# Global singleton
+stream_view = StreamView()
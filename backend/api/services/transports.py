@@ -0,0 +1,137 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional
+from shared.logging import setup_logger
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+logger = setup_logger("sse.transport")
+
+Envelope = Dict[str, Any]
+DeliverFn = Callable[[Envelope], None]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+
+class LocalTransport:
+    """In-process delivery. Only subscribers in this worker see the message."""
+
+    name = "local"
+
+    def __init__(self):
+        self._deliver: Optional[DeliverFn] = None
+
+    def bind(self, deliver: DeliverFn):
+        self._deliver = deliver
+
+    async def start(self, listen: bool = True):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, envelope: Envelope):
+        if self._deliver:
+            self._deliver(envelope)
+
+class PostgresTransport:
+    """
+    Fan-out through Postgres LISTEN/NOTIFY. Every API worker holds one listening
+    connection; publishers (API workers, the scheduler) NOTIFY on a second one, and the
+    publishing worker receives its own message back through the same path as everyone else.
+    Needs a direct or session-mode connection string: transaction poolers drop LISTEN.
+    """
+
+    name = "postgres"
+
+    def __init__(self, dsn: str, channel: str = "atlas_stream", reconnect_delay: float = 2.0):
+        if asyncpg is None:
+            raise RuntimeError("broadcast_transport=postgres requires the asyncpg package")
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.reconnects = 0
+        self.oversized = 0
+        self._deliver: Optional[DeliverFn] = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+
+    def bind(self, deliver: DeliverFn):
+        self._deliver = deliver
+
+    async def start(self, listen: bool = True):
+        if listen and self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._listen_task:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+        if self._publish_conn is not None and not self._publish_conn.is_closed():
+            await self._publish_conn.close()
+        self._publish_conn = None
+
+    async def publish(self, envelope: Envelope):
+        payload = encode_envelope(envelope)
+        if payload is None:
+            self.oversized += 1
+            payload = encode_envelope({**envelope, "message": "update"})
+        async with self._publish_lock:
+            if self._publish_conn is None or self._publish_conn.is_closed():
+                self._publish_conn = await asyncpg.connect(self.dsn)
+            await self._publish_conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def _listen_forever(self):
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: closed.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                logger.info(f"Listening for stream events on channel '{self.channel}'")
+                await closed.wait()
+                logger.warning("Stream event listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stream event listener failed: {e}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            self.reconnects += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str):
+        try:
+            envelope = json.loads(payload)
+        except ValueError as e:
+            logger.error(f"Dropping malformed stream event: {e}")
+            return
+        if self._deliver:
+            self._deliver(envelope)
+
+def encode_envelope(envelope: Envelope) -> Optional[str]:
+    """Serialises an envelope for NOTIFY, or returns None if it would exceed the payload limit."""
+    payload = json.dumps(envelope, separators=(",", ":"))
+    if len(payload.encode()) > MAX_NOTIFY_BYTES:
+        return None
+    return payload
+
+def create_transport(kind: str, database_url: Optional[str] = None):
+    """Builds the transport named by `settings.broadcast_transport`."""
+    if kind == "local":
+        return LocalTransport()
+    if kind == "postgres":
+        if not database_url:
+            raise ValueError("broadcast_transport=postgres requires DATABASE_URL")
+        return PostgresTransport(database_url)
+    raise ValueError(f"Unknown broadcast transport: {kind!r}")
@@ -0,0 +1,97 @@
+"""
+Tokens, requests and wall time to interpret a sweep's worth of findings against the
+real LLM:
+
+  single   one interpret_risk request per finding (the pre-batching sweep)
+  batched  interpret_risks, `--batch-size` findings per request with the system
+           prompt and market context sent once
+
+Findings are synthetic and use made-up client ids, so the memory lookup finds nothing
+and both modes send the same inputs. The LLM cache is disabled for the run. Requests go
+through the LLM executor, so both modes are paced by the configured rate limits; keep
+--findings small on a free-tier key. Needs the backend's .env (shared.config).
+
+Usage:
+    python benchmarks/batch_interpretation.py --findings 24 --batch-size 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.llm_cache import get_llm_cache
+from shared.llm_executor import get_llm_executor
+from reasoning.workflows import intelligence_workflow
+
+SECTORS = ["Technology", "Energy", "Financials", "Healthcare", "Utilities", "Mining"]
+FINDINGS = [
+    ("market_risk", "Concentration Risk: {pct}% exposure to {sector}."),
+    ("market_risk", "Drawdown: portfolio down {pct}% over 5 days, led by {sector}."),
+    ("tax_opportunity", "ISA allowance: £{amount:,} unused with {days} days to tax year end."),
+    ("compliance_exposure", "Suitability review overdue by {days} days."),
+]
+MARKET = {
+    "indices": {"ftse_100": 8123.4, "ftse_250": 20011.2},
+    "sectors": {"Technology": -0.021, "Energy": 0.013, "Financials": -0.004},
+    "news_headlines": ["BoE holds rates at 5%", "Oil rallies on supply cuts", "Gilt yields edge higher"],
+    "geopolitical_context": ["Trade talks stall"],
+}
+
+def synthetic_findings(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    clients = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(max(1, count // 3))]
+    events = []
+    for n in range(count):
+        event_type, template = rng.choice(FINDINGS)
+        reason = template.format(pct=rng.randint(5, 40), sector=rng.choice(SECTORS), amount=rng.randint(1, 20) * 1000, days=rng.randint(5, 90))
+        events.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "client_id": rng.choice(clients),
+            "event_type": event_type,
+            "urgency": rng.choice(["medium", "high"]),
+            "deterministic_classification": {"reason": reason, "trigger": event_type},
+        })
+    return events
+
+async def measure(label: str, run) -> dict:
+    executor = get_llm_executor()
+    requests, tokens = sum(executor.completed.values()), executor.tokens_used
+    started = time.perf_counter()
+    results = await run()
+    elapsed = time.perf_counter() - started
+    row = {
+        "mode": label,
+        "requests": sum(executor.completed.values()) - requests,
+        "tokens": executor.tokens_used - tokens,
+        "seconds": elapsed,
+        "fallbacks": sum(1 for r in results if "error" in r),
+    }
+    print(f"{label:<8} {row['requests']:>9} {row['tokens']:>9,} {row['seconds']:>9.1f} {row['fallbacks']:>10}")
+    return row
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=24)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    get_llm_cache().enabled = False
+    events = synthetic_findings(args.findings)
+    print(f"{args.findings} findings, batch size {args.batch_size}\n")
+    print(f"{'mode':<8} {'requests':>9} {'tokens':>9} {'seconds':>9} {'fallbacks':>10}")
+
+    single = await measure("single", lambda: asyncio.gather(*(
+        intelligence_workflow.interpret_risk(e["client_id"], e, MARKET, memories=[]) for e in events
+    )))
+    batched = await measure("batched", lambda: intelligence_workflow.interpret_risks(events, MARKET, batch_size=args.batch_size))
+
+    if single["tokens"] and single["seconds"]:
+        print(f"\nbatched uses {batched['tokens'] / single['tokens']:.0%} of the tokens and {batched['seconds'] / single['seconds']:.0%} of the wall time")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Times the per-client RiskClassifier loop against the vectorised BookClassifier on a
+synthetic book, and checks both produce the same findings. Runs offline.
+
+"full" builds every finding; "sweep" is what run_heartbeat does, where most findings
+are already open and are masked out before being formatted.
+
+Usage:
+    python benchmarks/classifier_throughput.py --clients 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reasoning.classifiers import RiskClassifier
+from reasoning.book_classifier import BookClassifier, DEFAULT_RULES
+
+SECTORS = ["Technology", "Energy", "Financials", "Healthcare", "Utilities", "Real Estate",
+           "Consumer Staples", "Industrials", "Materials", "Telecoms", "Mining", "Pharma"]
+
+def synthetic_book(n: int, seed: int):
+    rng = random.Random(seed)
+    snapshot = {"sector_performance": {s: round(rng.uniform(-0.05, 0.03), 4) for s in SECTORS}}
+    pairs = []
+    for i in range(n):
+        holdings = [
+            {"ticker": f"T{rng.randint(0, 999)}", "sector": rng.choice(SECTORS), "exposure_percentage": round(rng.uniform(0.01, 0.3), 3)}
+            for _ in range(rng.randint(3, 15))
+        ]
+        client = {
+            "id": f"client-{i}",
+            "tax_profile": {
+                "isa_allowance_remaining": rng.choice([0, 2000, 8000, 20000]),
+                "estimated_gross_income": rng.randint(40_000, 400_000),
+            },
+            "behavioural_profile": {"panic_score": rng.randint(0, 10), "sensitivity_sector": rng.choice(SECTORS)},
+        }
+        portfolio = {
+            "holdings": holdings,
+            "cash_balance_gbp": rng.randint(0, 100_000),
+            "unrealized_gains_gbp": rng.randint(0, 20_000),
+            "target_risk_score": rng.randint(2, 8),
+            "current_risk_score": round(rng.uniform(1, 9), 1),
+        }
+        pairs.append((client, portfolio))
+    return pairs, snapshot
+
+def scalar(pairs, snapshot):
+    out = []
+    for client, portfolio in pairs:
+        findings = [
+            RiskClassifier.classify_market_risk(portfolio, snapshot),
+            RiskClassifier.classify_tax_opportunity(client, portfolio),
+            RiskClassifier.classify_pension_allowance(client),
+            RiskClassifier.classify_compliance_exposure(portfolio),
+            RiskClassifier.classify_behavioural_risk(client, snapshot),
+        ]
+        out.append([f for f in findings if f])
+    return out
+
+def scalar_sweep(pairs, snapshot, open_keys):
+    """The pre-vectorised heartbeat: classify, then drop findings whose key is already open."""
+    seen = set(open_keys)
+    out = []
+    for client, findings in zip((c for c, _ in pairs), scalar(pairs, snapshot)):
+        kept = []
+        for finding in findings:
+            key = (client["id"], finding["event_type"])
+            if key not in seen:
+                seen.add(key)
+                kept.append(finding)
+        out.append(kept)
+    return out
+
+def main(n: int, seed: int, open_share: float):
+    pairs, snapshot = synthetic_book(n, seed)
+    holdings = sum(len(p["holdings"]) for _, p in pairs)
+    print(f"{n:,} clients, {holdings:,} holdings")
+
+    start = time.perf_counter()
+    expected = scalar(pairs, snapshot)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    book = BookClassifier.pack(pairs, snapshot)
+    pack_s = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = BookClassifier.evaluate(book, DEFAULT_RULES)
+    eval_s = time.perf_counter() - start
+
+    findings = sum(len(f) for f in expected)
+    print(f"  scalar loop     {scalar_s * 1000:9.1f}ms  ({n / scalar_s:,.0f} clients/s)")
+    print(f"  vector pack     {pack_s * 1000:9.1f}ms")
+    print(f"  vector evaluate {eval_s * 1000:9.1f}ms  ({findings:,} findings)")
+    print(f"  vector total    {(pack_s + eval_s) * 1000:9.1f}ms  speed-up x{scalar_s / (pack_s + eval_s):.1f}")
+    print(f"  parity: {'OK' if actual == expected else 'MISMATCH'}")
+
+    # Sweep: `open_share` of findings already open from previous sweeps
+    rng = random.Random(seed)
+    open_keys = {
+        (client["id"], f["event_type"])
+        for (client, _), found in zip(pairs, expected) for f in found
+        if rng.random() < open_share
+    }
+    start = time.perf_counter()
+    expected_sweep = scalar_sweep(pairs, snapshot, open_keys)
+    scalar_sweep_s = time.perf_counter() - start
+    start = time.perf_counter()
+    actual_sweep = BookClassifier.evaluate(book, DEFAULT_RULES, exclude=open_keys)
+    sweep_eval_s = time.perf_counter() - start
+    new = sum(len(f) for f in expected_sweep)
+    print(f"\nsweep with {len(open_keys):,} open keys ({new:,} new findings)")
+    print(f"  scalar loop + dedup {scalar_sweep_s * 1000:9.1f}ms")
+    print(f"  vector evaluate     {sweep_eval_s * 1000:9.1f}ms  (+ pack {pack_s * 1000:.1f}ms)  speed-up x{scalar_sweep_s / (pack_s + sweep_eval_s):.1f}")
+    print(f"  parity: {'OK' if actual_sweep == expected_sweep else 'MISMATCH'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--open-share", type=float, default=0.9, help="share of findings already open in sweep mode")
+    args = parser.parse_args()
+    main(args.clients, args.seed, args.open_share)
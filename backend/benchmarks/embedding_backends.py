@@ -0,0 +1,94 @@
+"""
+Throughput and vector parity of the embedding backends on risk-reason-like texts:
+
+  remote     HuggingFace inference endpoint (needs HUGGINGFACEHUB_API_TOKEN)
+  onnx       all-MiniLM-L6-v2 fp32 on CPU through ONNX Runtime
+  onnx-int8  the int8-quantised graph
+
+Parity is cosine similarity against the reference backend (remote, or fp32 ONNX with
+--skip-remote), reported as mean and minimum over all texts. Needs the backend's .env
+(shared.config) plus `pip install onnxruntime`.
+
+Usage:
+    python benchmarks/embedding_backends.py --texts 512
+    python benchmarks/embedding_backends.py --skip-remote --int8-file onnx/model_qint8_arm64.onnx
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.embeddings import OnnxEmbeddings, create_embeddings_client
+
+SECTORS = ["Technology", "Energy", "Financials", "Healthcare", "Utilities", "Real Estate", "Mining", "Pharma"]
+TEMPLATES = [
+    "Concentration Risk: {pct}% exposure to {sector}.",
+    "Market Sensitivity: {sector} moved {move}% today against a {pct}% allocation.",
+    "Mandate Drift: current risk score {cur} vs target {tgt}.",
+    "ISA allowance of £{amount:,} unused with £{cash:,} idle cash.",
+    "Unrealised gains of £{amount:,} exceed the annual CGT exemption.",
+    "Pension tapering: adjusted income £{income:,} reduces the annual allowance.",
+    "Client panicked during the last {sector} sell-off and asked to move to cash.",
+]
+
+def synthetic_texts(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            pct=rng.randint(20, 60), sector=rng.choice(SECTORS), move=round(rng.uniform(-6, 3), 1),
+            cur=round(rng.uniform(1, 9), 1), tgt=rng.randint(2, 8), amount=rng.randint(1, 40) * 500,
+            cash=rng.randint(1, 100) * 1000, income=rng.randint(200, 400) * 1000,
+        )
+        for _ in range(n)
+    ]
+
+def _run(client, texts: list):
+    client.embed_documents(texts[:8])  # warm-up: model load, first request
+    start = time.perf_counter()
+    vectors = np.array(client.embed_documents(texts), dtype=np.float32)
+    return vectors, time.perf_counter() - start
+
+def _parity(reference: np.ndarray, vectors: np.ndarray):
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    vec = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    cosine = (ref * vec).sum(axis=1)
+    return float(cosine.mean()), float(cosine.min())
+
+def main(n: int, seed: int, batch_size: int, skip_remote: bool, fp32_file: str, int8_file: str, model_dir):
+    texts = synthetic_texts(n, seed)
+    print(f"{n} texts, {len(set(texts))} distinct, batch size {batch_size}")
+
+    backends = []
+    if not skip_remote:
+        backends.append(("remote", create_embeddings_client("remote")))
+    backends.append(("onnx", OnnxEmbeddings(model_file=fp32_file, model_dir=model_dir, batch_size=batch_size)))
+    backends.append(("onnx-int8", OnnxEmbeddings(model_file=int8_file, model_dir=model_dir, batch_size=batch_size)))
+
+    reference = None
+    for label, client in backends:
+        vectors, elapsed = _run(client, texts)
+        line = f"  {label:<10} {elapsed * 1000:9.1f}ms  {n / elapsed:8.1f} texts/s  dim={vectors.shape[1]}"
+        if reference is None:
+            reference = vectors
+            line += "  (reference)"
+        else:
+            mean, worst = _parity(reference, vectors)
+            line += f"  cosine vs reference mean={mean:.5f} min={worst:.5f}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--skip-remote", action="store_true", help="compare the ONNX graphs only (offline)")
+    parser.add_argument("--fp32-file", default="onnx/model.onnx")
+    parser.add_argument("--int8-file", default="onnx/model_quint8_avx2.onnx")
+    parser.add_argument("--model-dir", default=None, help="local copy of all-MiniLM-L6-v2 instead of the Hub")
+    args = parser.parse_args()
+    main(args.texts, args.seed, args.batch_size, args.skip_remote, args.fp32_file, args.int8_file, args.model_dir)
@@ -0,0 +1,66 @@
+"""
+Measures GET /live-strip latency against a running API, first idle and then while a
+heartbeat sweep runs inside the same API process (via GET /tasks/heartbeat).
+
+Usage:
+    python benchmarks/live_strip_latency.py --base-url http://localhost:8000 --requests 300 --concurrency 10
+
+Before the async data-access layer every PostgREST call in the heartbeat blocked the
+event loop, so p99 here tracked the slowest sweep query rather than /live-strip itself.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+
+async def _sample(client: httpx.AsyncClient, n: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            resp = await client.get("/live-strip")
+            resp.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    return latencies
+
+
+def _report(label: str, latencies: list[float]):
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{label:<22} n={len(latencies):<5} p50={q[49]:8.1f}ms  p95={q[94]:8.1f}ms  p99={q[98]:8.1f}ms  max={max(latencies):8.1f}ms")
+
+
+async def main(base_url: str, n: int, concurrency: int, cron_secret: str):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        # Warm-up: news cache, connection pool, thread pool
+        await _sample(client, min(20, n), concurrency)
+
+        _report("idle", await _sample(client, n, concurrency))
+
+        heartbeat = asyncio.create_task(
+            client.get("/tasks/heartbeat", headers={"x-vercel-cron": cron_secret}, timeout=1800.0)
+        )
+        await asyncio.sleep(0.5)  # let the sweep start its bulk loads
+        loaded = await _sample(client, n, concurrency)
+        _report("during heartbeat", loaded)
+
+        started = time.perf_counter()
+        await heartbeat
+        print(f"heartbeat finished {time.perf_counter() - started:.1f}s after sampling ended")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--cron-secret", default=os.getenv("CRON_SECRET", "atlas_cron_secret_123"))
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.requests, args.concurrency, args.cron_secret))
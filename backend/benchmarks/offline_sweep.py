@@ -0,0 +1,94 @@
+"""
+Sentinel and heartbeat runs against replayed market data, so sweeps can be timed and
+load-tested without Yahoo or DuckDuckGo:
+
+  record   capture live quotes for the index and sector symbols, plus the sweep's news
+           queries, into a JSON lines recording (needs yahooquery and ddgs)
+  run      replay a recording (or a synthetic one with --ticks ticks and a --move FTSE
+           move between them): one sentinel run per tick, then the heartbeat, at
+           --latency-ms simulated latency per market data call
+
+Holdings tickers missing from the recording get stable synthetic prices, so a book of
+any size (see reseed_atlas.py) prices offline. The runs still use the database in the
+backend's .env, and the heartbeat still calls the LLM for new findings.
+
+Usage:
+    python benchmarks/offline_sweep.py record --out market.jsonl
+    python benchmarks/offline_sweep.py run --recording market.jsonl --latency-ms 150
+    python benchmarks/offline_sweep.py run --ticks 4 --move 0.03
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp_server.market_data import YahooProvider, write_recording
+
+INDEX_SYMBOLS = ["^FTSE", "^FTMC"]
+SECTOR_SYMBOLS = ["HSBA.L", "BARC.L", "LLOY.L", "SHEL.L", "BP.L", "SGE.L", "AUTO.L", "AZN.L", "GSK.L"]
+NEWS_QUERIES = ["UK financial market news today", "geopolitical events UK markets", "FTSE 100 UK market today"]
+
+def record(out: str):
+    provider = YahooProvider()
+    quotes = provider.fetch_quotes(INDEX_SYMBOLS + SECTOR_SYMBOLS)
+    headlines = [dict(item, query=query) for query in NEWS_QUERIES for item in provider.search_news(query, 5)]
+    write_recording(out, {0: quotes}, {0: headlines})
+    print(f"Recorded {len(quotes)} quotes and {len(headlines)} headlines to {out}")
+
+def synthetic_recording(ticks: int, move: float) -> str:
+    """FTSE 100 moving by `move` each tick, so the sentinel sees an abnormal move."""
+    quotes, ftse = {}, 8000.0
+    for tick in range(ticks):
+        previous = ftse
+        if tick:
+            ftse *= 1 - move if tick % 2 else 1 + move
+        quotes[tick] = {"^FTSE": {"close": round(ftse, 2), "prev_close": round(previous, 2)}}
+    headlines = {0: [{"title": "BoE holds rates"}, {"title": "Gilt yields edge higher"}, {"title": "Oil rallies on supply cuts"}]}
+    path = os.path.join(tempfile.mkdtemp(), "synthetic_market.jsonl")
+    write_recording(path, quotes, headlines)
+    return path
+
+async def run(recording: str, latency_ms: float):
+    # Select the replay provider before anything reads the settings
+    os.environ["MARKET_DATA_PROVIDER"] = "replay"
+    os.environ["MARKET_DATA_REPLAY_PATH"] = recording
+    os.environ["MARKET_DATA_REPLAY_LATENCY_MS"] = str(latency_ms)
+    from mcp_server.market_data import get_market_data_provider
+    from reasoning.sentinel import run_sentinel
+    from reasoning.heartbeat import run_heartbeat
+
+    provider = get_market_data_provider()
+    print(f"{'run':<12} {'tick':>5} {'seconds':>9} {'provider calls':>15}")
+    for n in range(len(provider.ticks)):
+        calls, started = provider.calls, time.perf_counter()
+        await run_sentinel()
+        print(f"{'sentinel':<12} {provider.tick:>5} {time.perf_counter() - started:>9.2f} {provider.calls - calls:>15}")
+        if n < len(provider.ticks) - 1:
+            provider.advance()
+    calls, started = provider.calls, time.perf_counter()
+    await run_heartbeat()
+    print(f"{'heartbeat':<12} {provider.tick:>5} {time.perf_counter() - started:>9.2f} {provider.calls - calls:>15}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("--out", required=True)
+    rep = sub.add_parser("run")
+    rep.add_argument("--recording")
+    rep.add_argument("--ticks", type=int, default=3)
+    rep.add_argument("--move", type=float, default=0.03)
+    rep.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.out)
+    else:
+        asyncio.run(run(args.recording or synthetic_recording(args.ticks, args.move), args.latency_ms))
+
+if __name__ == "__main__":
+    main()
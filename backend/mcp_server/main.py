@@ -2,49 +2,36 @@ import os
 import asyncio
 import json
 import re
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
+from shared.config import settings
 from shared.database import db_manager
+from shared.pricing import get_price_service, quote_change
+from shared.market_intel import MarketIntelService
 from shared.logging import setup_logger
+from mcp_server.market_data import get_market_data_provider
 from datetime import datetime, timedelta, timezone
 
-try:
-    from ddgs import DDGS
-except ImportError:
-    DDGS = None
-
-try:
-    from yahooquery import Ticker
-except ImportError:
-    Ticker = None
-
 mcp = FastMCP("AtlasZero")
 logger = setup_logger("mcp_server")
 
+# Yahoo + DuckDuckGo live, or a recorded replay offline (MARKET_DATA_PROVIDER)
+market_data_provider = get_market_data_provider()
+price_service = get_price_service()
+
 
 # ─── WEB SEARCH TOOLS ───────────────────────────────────────
 
 @mcp.tool()
 async def search_market_news(query: str = "UK financial markets FTSE today", max_results: int = 5) -> List[Dict[str, Any]]:
     """
-    Searches for the latest market and financial news using DuckDuckGo.
+    Searches for the latest market and financial news (DuckDuckGo, or the replay recording).
     Returns a list of news articles with title, body, source, date, and URL.
     """
-    if not DDGS:
-        return [{"error": "ddgs package not installed. Run: pip install ddgs"}]
-    
     try:
-        results = []
-        with DDGS() as ddgs:
-            news_results = ddgs.news(query, max_results=max_results)
-            for item in news_results:
-                results.append({
-                    "title": item.get("title", ""),
-                    "body": item.get("body", ""),
-                    "source": item.get("source", ""),
-                    "date": item.get("date", ""),
-                    "url": item.get("url", ""),
-                })
+        results = await asyncio.to_thread(market_data_provider.search_news, query, max_results)
         logger.info(f"Web search for '{query}' returned {len(results)} results")
         return results
     except Exception as e:
@@ -58,22 +45,8 @@ async def search_geopolitical_events(query: str = "geopolitical risk oil energy
     Searches for geopolitical events that may impact UK financial markets.
     Useful for detecting market interrupts (oil shocks, trade wars, conflicts).
     """
-    if not DDGS:
-        return [{"error": "ddgs package not installed. Run: pip install ddgs"}]
-    
     try:
-        results = []
-        with DDGS() as ddgs:
-            news_results = ddgs.news(query, max_results=max_results)
-            for item in news_results:
-                results.append({
-                    "title": item.get("title", ""),
-                    "body": item.get("body", ""),
-                    "source": item.get("source", ""),
-                    "date": item.get("date", ""),
-                    "url": item.get("url", ""),
-                    "relevance": "geopolitical"
-                })
+        results = [dict(item, relevance="geopolitical") for item in await asyncio.to_thread(market_data_provider.search_news, query, max_results)]
         logger.info(f"Geopolitical search for '{query}' returned {len(results)} results")
         return results
     except Exception as e:
@@ -87,37 +60,84 @@ async def search_client_news(client_name: str, company: str = "", max_results: i
     Searches for news about a specific client's company or sector holdings.
     Helps prepare meeting briefs and proactive insights.
     """
-    if not DDGS:
-        return [{"error": "ddgs package not installed. Run: pip install ddgs"}]
-    
     query = f"{company} financial news" if company else f"{client_name} investment portfolio news"
     
     try:
-        results = []
-        with DDGS() as ddgs:
-            news_results = ddgs.news(query, max_results=max_results)
-            for item in news_results:
-                results.append({
-                    "title": item.get("title", ""),
-                    "body": item.get("body", ""),
-                    "source": item.get("source", ""),
-                    "date": item.get("date", ""),
-                    "url": item.get("url", ""),
-                })
-        return results
+        return await asyncio.to_thread(market_data_provider.search_news, query, max_results)
     except Exception as e:
         logger.error(f"Client news search error: {e}")
         return [{"error": str(e)}]
 
 
+# Sector proxies (UK specific)
+SECTOR_PROXIES = {
+    "Financials": ["HSBA.L", "BARC.L", "LLOY.L"],
+    "Energy": ["SHEL.L", "BP.L"],
+    "Technology": ["SGE.L", "AUTO.L"],
+    "Healthcare": ["AZN.L", "GSK.L"]
+}
+
+MARKET_SYMBOLS = ["^FTSE", "^FTMC"] + [t for tickers in SECTOR_PROXIES.values() for t in tickers]
+
+# Quote fetches get their own small pool. A timed-out fetch keeps its thread until the
+# provider returns (threads can't be cancelled), so it must not tie up the default executor.
+_quote_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="quotes")
+
+async def _fetch_quotes(symbols: List[str], timeout: float) -> Tuple[Dict[str, Dict[str, float]], Dict[str, float]]:
+    """
+    Quotes for `symbols` without blocking the event loop. One multi-symbol request runs
+    on the quote pool (through the shared quote cache). If it answered in time, symbols
+    it did not return are fetched one by one in parallel, except those another fetch is
+    already working on. Every call is bounded by `timeout`; symbols that don't arrive in
+    time are left out. Also returns each symbol's fetch latency in ms.
+    """
+    loop = asyncio.get_running_loop()
+    latency_ms: Dict[str, float] = {}
+    quotes: Dict[str, Dict[str, float]] = {}
+    started = time.perf_counter()
+    timed_out = False
+    try:
+        await asyncio.wait_for(loop.run_in_executor(_quote_executor, price_service.prefetch, symbols), timeout)
+    except asyncio.TimeoutError:
+        # The request is still running; retrying symbol by symbol would only pile up threads
+        timed_out = True
+        logger.warning(f"Multi-symbol quote request timed out after {timeout}s")
+    batch_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    pending = []
+    for symbol in symbols:
+        cached, quote = price_service.peek(symbol)
+        if not cached:
+            if not timed_out and not price_service.in_flight(symbol):
+                pending.append(symbol)
+            continue
+        latency_ms[symbol] = batch_ms
+        if quote:
+            quotes[symbol] = quote
+
+    async def fetch_one(symbol: str):
+        symbol_started = time.perf_counter()
+        try:
+            quote = await asyncio.wait_for(loop.run_in_executor(_quote_executor, price_service.get_quote, symbol), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Quote for {symbol} timed out after {timeout}s")
+            return
+        latency_ms[symbol] = round((time.perf_counter() - symbol_started) * 1000, 1)
+        if quote:
+            quotes[symbol] = quote
+
+    await asyncio.gather(*(fetch_one(symbol) for symbol in pending))
+    return quotes, latency_ms
+
 @mcp.tool()
 async def fetch_live_market_data(query: Optional[str] = None) -> Dict[str, Any]:
     """
-    Fetches real-time UK market data using yahooquery.
-    Returns FTSE 100, FTSE 250, and sector-level signals based on proxy UK stocks.
+    Fetches real-time UK market data from the market data provider (yahooquery live).
+    Returns FTSE 100, FTSE 250, and sector-level signals based on proxy UK stocks,
+    plus any symbols that timed out and each symbol's fetch latency.
     """
-    if not Ticker:
-        return {"error": "yahooquery package not installed. Run: pip install yahooquery"}
+    if not price_service.available:
+        return {"error": f"Market data provider '{market_data_provider.name}' unavailable (yahooquery not installed? Run: pip install yahooquery)"}
     
     try:
         market_data = {
@@ -125,45 +145,28 @@ async def fetch_live_market_data(query: Optional[str] = None) -> Dict[str, Any]:
             "ftse_250_value": None,
             "sector_performance": {},
             "headlines": [],
-            "source": "Yahoo Finance",
+            "source": "Yahoo Finance" if market_data_provider.name == "yahoo" else f"{market_data_provider.name} provider",
             "fetched_at": datetime.now(timezone.utc).isoformat()
         }
         
+        quotes, latency_ms = await _fetch_quotes(MARKET_SYMBOLS, settings.market_data_timeout_seconds)
+        
         # 1. FTSE 100
-        ftse_ticker = Ticker("^FTSE")
-        ftse_data = ftse_ticker.history(period="1d")
-        if not ftse_data.empty and 'close' in ftse_data.columns:
-            market_data["ftse_100_value"] = round(float(ftse_data["close"].iloc[-1]), 2)
+        if "^FTSE" in quotes:
+            market_data["ftse_100_value"] = round(quotes["^FTSE"]["close"], 2)
             
         # 2. FTSE 250
-        ftse250_ticker = Ticker("^FTMC")
-        ftse250_data = ftse250_ticker.history(period="1d")
-        if not ftse250_data.empty and 'close' in ftse250_data.columns:
-            market_data["ftse_250_value"] = round(float(ftse250_data["close"].iloc[-1]), 2)
+        if "^FTMC" in quotes:
+            market_data["ftse_250_value"] = round(quotes["^FTMC"]["close"], 2)
             
-        # 3. Sector proxies (UK specific)
-        sector_proxies = {
-            "Financials": ["HSBA.L", "BARC.L", "LLOY.L"],
-            "Energy": ["SHEL.L", "BP.L"],
-            "Technology": ["SGE.L", "AUTO.L"],
-            "Healthcare": ["AZN.L", "GSK.L"]
-        }
-        
-        for sector, tickers in sector_proxies.items():
-            sector_perf = 0.0
-            valid_tickers = 0
-            for t in tickers:
-                tk = Ticker(t)
-                hist = tk.history(period="2d")
-                if not hist.empty and len(hist) >= 2:
-                    prev_close = hist["close"].iloc[-2]
-                    curr_close = hist["close"].iloc[-1]
-                    pct_change = (curr_close - prev_close) / prev_close
-                    sector_perf += pct_change
-                    valid_tickers += 1
-            if valid_tickers > 0:
-                market_data["sector_performance"][sector] = round(float(sector_perf / valid_tickers), 4)
-
+        # 3. Sector proxies (from whichever proxies arrived)
+        for sector, tickers in SECTOR_PROXIES.items():
+            changes = [c for c in (quote_change(quotes.get(t)) for t in tickers) if c is not None]
+            if changes:
+                market_data["sector_performance"][sector] = round(float(sum(changes) / len(changes)), 4)
+
+        market_data["missing_symbols"] = [s for s in MARKET_SYMBOLS if s not in quotes]
+        market_data["latency_ms"] = latency_ms
         return market_data
     except Exception as e:
         logger.error(f"Error fetching live market data: {e}")
@@ -174,7 +177,7 @@ async def fetch_comprehensive_market_intel(query: Optional[str] = None) -> Dict[
     """
     Fetches a full 360-degree UK market intelligence report in one call.
     Includes indices, sector performance, news, and geopolitical context.
-    Parallelizes requests to minimize latency.
+    Parallelizes requests to minimize latency: quotes and searches all run in worker threads.
     """
     logger.info("Performing comprehensive market intelligence sweep")
     
@@ -196,6 +199,9 @@ async def fetch_comprehensive_market_intel(query: Optional[str] = None) -> Dict[
         "fetched_at": datetime.now(timezone.utc).isoformat()
     }
 
+# Sweeps and agents take the shared snapshot instead of each fetching their own intel
+market_intel_service = MarketIntelService(fetch_comprehensive_market_intel, ttl_seconds=settings.market_intel_ttl_seconds)
+
 
 # ─── MARKET TOOLS ────────────────────────────────────────────
 
@@ -203,11 +209,12 @@ async def fetch_comprehensive_market_intel(query: Optional[str] = None) -> Dict[
 async def get_market_snapshot(query: Optional[str] = None) -> Dict[str, Any]:
     """Retrieves the latest UK market snapshot from the database."""
     try:
-        response = db_manager.client.table("market_snapshots")\
-            .select("*")\
-            .order("timestamp", desc=True)\
-            .limit(1)\
-            .execute()
+        response = await db_manager.aexecute(
+            db_manager.client.table("market_snapshots")
+            .select("*")
+            .order("timestamp", desc=True)
+            .limit(1)
+        )
         return response.data[0] if response.data else {"error": "No market data found"}
     except Exception as e:
         logger.error(f"Error fetching market snapshot: {e}")
@@ -229,10 +236,11 @@ async def get_client_portfolio_structure(client_id: str) -> Dict[str, Any]:
     """Retrieves the portfolio structure for a specific client."""
     logger.info(f"TOOL_CALL: get_client_portfolio_structure for {client_id}")
     try:
-        response = db_manager.client.table("portfolios")\
-            .select("*")\
-            .eq("client_id", client_id)\
-            .execute()
+        response = await db_manager.aexecute(
+            db_manager.client.table("portfolios")
+            .select("*")
+            .eq("client_id", client_id)
+        )
         result = response.data[0] if response.data else {"error": "Portfolio not found"}
         logger.info(f"TOOL_RESULT: get_client_portfolio_structure success? {'error' not in result}")
         return result
@@ -258,7 +266,7 @@ async def create_portfolio_snapshot(client_id: str, trigger_event_id: Optional[s
             "trigger_event_id": trigger_event_id
         }
         
-        response = db_manager.client.table("portfolio_snapshots").insert(snapshot_data).execute()
+        response = await db_manager.aexecute(db_manager.client.table("portfolio_snapshots").insert(snapshot_data))
         return response.data[0]
     except Exception as e:
         logger.error(f"Error creating portfolio snapshot for {client_id}: {e}")
@@ -271,7 +279,7 @@ async def create_portfolio_snapshot(client_id: str, trigger_event_id: Optional[s
 async def get_tax_position(client_id: str) -> Dict[str, Any]:
     """Retrieves the current tax position and profile for a client."""
     try:
-        response = db_manager.client.table("clients").select("tax_profile").eq("id", client_id).execute()
+        response = await db_manager.aexecute(db_manager.client.table("clients").select("tax_profile").eq("id", client_id))
         return response.data[0]["tax_profile"] if response.data else {"error": "Client not found"}
     except Exception as e:
         logger.error(f"Error fetching tax position for {client_id}: {e}")
@@ -281,13 +289,14 @@ async def get_tax_position(client_id: str) -> Dict[str, Any]:
 # ─── MEMORY TOOLS ────────────────────────────────────────────
 
 from shared.embeddings import generate_embedding
+from shared.memory_ingest import ingest_memories
 
 @mcp.tool()
 async def store_memory_item(client_id: str, content: str, source: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Stores a behavioural memory item for a client with a semantic vector embedding."""
     try:
         # Generate embedding for the content
-        embedding = generate_embedding(content)
+        embedding = await asyncio.to_thread(generate_embedding, content)
         
         data = {
             "client_id": client_id,
@@ -296,29 +305,45 @@ async def store_memory_item(client_id: str, content: str, source: str, metadata:
             "source_reference": source,
             "metadata": metadata or {}
         }
-        response = db_manager.client.table("behavioural_memory").insert(data).execute()
+        response = await db_manager.aexecute(db_manager.client.table("behavioural_memory").insert(data))
         return response.data[0]
     except Exception as e:
         logger.error(f"Error storing memory for {client_id}: {e}")
         return {"error": str(e)}
 
+@mcp.tool()
+async def store_memory_items(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Stores many behavioural memory items at once. Each item has client_id, content and
+    source, plus optional metadata; embeddings and inserts are batched.
+    """
+    try:
+        stats = await ingest_memories(
+            (item["client_id"], item["content"], item.get("source", ""), item.get("metadata")) for item in items
+        )
+        return {"stored": stats.rows, "failed": stats.failed, "rows_per_second": round(stats.rows_per_second, 1), "errors": stats.errors}
+    except Exception as e:
+        logger.error(f"Error storing {len(items)} memories: {e}")
+        return {"error": str(e)}
+
 @mcp.tool()
 async def retrieve_relevant_memory(client_id: str, query: str) -> List[Dict[str, Any]]:
     """Retrieves relevant behavioural memories for a client using semantic similarity search."""
     try:
         # 1. Embed the query to find similar past behavior
-        query_embedding = generate_embedding(query)
+        query_embedding = await asyncio.to_thread(generate_embedding, query)
         
         # 2. Call the pgvector match_memory RPC
         params = {
             "query_embedding": query_embedding,
             "match_threshold": 0.5,
-            "match_count": 5
+            "match_count": 5,
+            "ef_search": settings.memory_ef_search
         }
         if client_id:
             params["client_id_filter"] = client_id
             
-        response = db_manager.client.rpc("match_memory", params).execute()
+        response = await db_manager.aexecute(db_manager.client.rpc("match_memory", params))
         return response.data or []
     except Exception as e:
         logger.error(f"Error retrieving memory for {client_id}: {e}")
@@ -337,7 +362,7 @@ async def create_draft_action(risk_event_id: str, client_id: str, action_type: s
             "action_type": action_type,
             "draft_content": draft_content
         }
-        response = db_manager.client.table("draft_actions").insert(data).execute()
+        response = await db_manager.aexecute(db_manager.client.table("draft_actions").insert(data))
         return response.data[0]
     except Exception as e:
         logger.error(f"Error creating draft action: {e}")
@@ -353,7 +378,7 @@ async def log_action_decision(entity_id: str, entity_type: str, decision: str, m
             "decision": decision,
             "metadata": metadata or {}
         }
-        response = db_manager.client.table("action_logs").insert(data).execute()
+        response = await db_manager.aexecute(db_manager.client.table("action_logs").insert(data))
         return response.data[0]
     except Exception as e:
         logger.error(f"Error logging action decision: {e}")
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+from shared.logging import setup_logger
+
+try:
+    from yahooquery import Ticker
+except ImportError:
+    Ticker = None
+
+try:
+    from ddgs import DDGS
+except ImportError:
+    try:
+        from duckduckgo_search import DDGS  # the package's previous name, still in requirements.txt
+    except ImportError:
+        DDGS = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+logger = setup_logger("market_data")
+
+# {symbol: {"close": float, "prev_close": float (optional)}}
+Quotes = Dict[str, Dict[str, float]]
+
+NEWS_FIELDS = ("title", "body", "source", "date", "url")
+
+class MarketDataProvider(ABC):
+    """
+    Source of quotes and news headlines for the sentinel, the sweeps and the custodian.
+    Methods are synchronous (the live SDKs are); async callers run them in worker threads.
+    """
+    name: str = ""
+
+    @property
+    @abstractmethod
+    def available(self) -> bool:
+        """Whether quotes can be fetched at all (e.g. the SDK is installed)."""
+
+    @abstractmethod
+    def fetch_quotes(self, symbols: List[str]) -> Quotes:
+        """The last two closes for every symbol that priced; unknown symbols are left out."""
+
+    @abstractmethod
+    def search_news(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        """News items with title, body, source, date and url."""
+
+class YahooProvider(MarketDataProvider):
+    """Live quotes from Yahoo Finance (yahooquery) and headlines from DuckDuckGo."""
+    name = "yahoo"
+
+    @property
+    def available(self) -> bool:
+        return Ticker is not None
+
+    def fetch_quotes(self, symbols: List[str]) -> Quotes:
+        if not symbols or Ticker is None:
+            return {}
+        return _parse_history(Ticker(symbols).history(period="5d"))
+
+    def search_news(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        if DDGS is None:
+            raise RuntimeError("ddgs package not installed. Run: pip install ddgs")
+        with DDGS() as ddgs:
+            return [{f: item.get(f, "") for f in NEWS_FIELDS} for item in ddgs.news(query, max_results=max_results)]
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Deterministic offline stand-in serving recorded quotes and headlines from a JSON lines
+    (or Parquet) file, one record per row:
+
+      {"type": "quote", "tick": 0, "symbol": "^FTSE", "close": 8100.5, "prev_close": 8072.1}
+      {"type": "headline", "tick": 0, "query": "UK financial market news today", "title": "..."}
+
+    `tick` defaults to 0 and `query` to "any query". advance() steps to the next recorded
+    tick (wrapping), so repeated sentinel runs see the market move. Symbols missing from
+    the recording get a stable synthetic quote unless `synthesize_missing` is off, so books
+    of any size price. Every call sleeps `latency_ms` to stand in for the network.
+    """
+    name = "replay"
+
+    def __init__(self, path: str, latency_ms: float = 0.0, synthesize_missing: bool = True):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.synthesize_missing = synthesize_missing
+        self._quotes: Dict[int, Quotes] = {}
+        self._headlines: Dict[int, List[Dict[str, Any]]] = {}
+        for record in _read_records(path):
+            tick = int(record.get("tick") or 0)
+            if record.get("type") == "quote":
+                quote = {"close": float(record["close"])}
+                if record.get("prev_close") is not None:
+                    quote["prev_close"] = float(record["prev_close"])
+                self._quotes.setdefault(tick, {})[record["symbol"]] = quote
+            elif record.get("type") == "headline":
+                self._headlines.setdefault(tick, []).append(record)
+        self.ticks = sorted(set(self._quotes) | set(self._headlines)) or [0]
+        self.position = 0
+        self.calls = 0
+        logger.info(f"Replaying market data from {path}: {len(self.ticks)} ticks")
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def tick(self) -> int:
+        return self.ticks[self.position]
+
+    def advance(self) -> int:
+        self.position = (self.position + 1) % len(self.ticks)
+        return self.tick
+
+    def _wait(self):
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def fetch_quotes(self, symbols: List[str]) -> Quotes:
+        self._wait()
+        recorded = self._quotes.get(self.tick, {})
+        quotes = {}
+        for symbol in symbols:
+            if symbol in recorded:
+                quotes[symbol] = dict(recorded[symbol])
+            elif self.synthesize_missing:
+                quotes[symbol] = _synthetic_quote(symbol, self.tick)
+        return quotes
+
+    def search_news(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+        self._wait()
+        items = self._headlines.get(self.tick, [])
+        matching = [h for h in items if h.get("query") in (None, query)] or items
+        return [{f: h.get(f) or "" for f in NEWS_FIELDS} for h in matching[:max_results]]
+
+def _synthetic_quote(symbol: str, tick: int) -> Dict[str, float]:
+    """A stable price for `symbol` that drifts a little from tick to tick."""
+    seed = int(hashlib.sha256(symbol.encode("utf-8")).hexdigest()[:8], 16)
+    prev_close = 5 + (seed % 50_000) / 100
+    close = prev_close * (1 + ((seed + tick) % 21 - 10) / 1000)
+    return {"close": round(close, 4), "prev_close": round(prev_close, 4)}
+
+def _read_records(path: str) -> Iterable[Dict[str, Any]]:
+    if path.endswith(".parquet"):
+        if pd is None:
+            raise RuntimeError("pandas (with pyarrow) is required to replay Parquet recordings")
+        # Parquet pads missing columns with NaN; drop them so defaults apply
+        return [{k: v for k, v in row.items() if v is not None and v == v} for row in pd.read_parquet(path).to_dict("records")]
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def write_recording(path: str, quotes_by_tick: Dict[int, Quotes], headlines_by_tick: Optional[Dict[int, List[Dict[str, Any]]]] = None):
+    """Writes quotes and headlines in the JSON lines format ReplayProvider reads."""
+    with open(path, "w") as f:
+        for tick, quotes in sorted(quotes_by_tick.items()):
+            for symbol, quote in sorted(quotes.items()):
+                f.write(json.dumps({"type": "quote", "tick": tick, "symbol": symbol, **quote}) + "\n")
+        for tick, headlines in sorted((headlines_by_tick or {}).items()):
+            for headline in headlines:
+                f.write(json.dumps({"type": "headline", "tick": tick, **headline}) + "\n")
+
+def _parse_history(history) -> Quotes:
+    """Splits a yahooquery multi-symbol history result into per-symbol quotes."""
+    frames = {}
+    if isinstance(history, dict):
+        # yahooquery returns a dict when some symbols error out
+        for symbol, frame in history.items():
+            if hasattr(frame, "empty") and not frame.empty:
+                frames[symbol] = frame
+    elif hasattr(history, "empty") and not history.empty:
+        if "symbol" in (history.index.names or []):
+            for symbol, frame in history.groupby(level="symbol"):
+                frames[symbol] = frame
+
+    quotes = {}
+    for symbol, frame in frames.items():
+        if "close" not in frame.columns:
+            continue
+        closes = frame["close"].dropna()
+        if closes.empty:
+            continue
+        quote = {"close": float(closes.iloc[-1])}
+        if len(closes) >= 2:
+            quote["prev_close"] = float(closes.iloc[-2])
+        quotes[symbol] = quote
+    return quotes
+
+def create_market_data_provider(name: str, replay_path: Optional[str] = None, latency_ms: float = 0.0) -> MarketDataProvider:
+    """Builds the provider named by MARKET_DATA_PROVIDER: "yahoo" or "replay"."""
+    if name == "yahoo":
+        return YahooProvider()
+    if name == "replay":
+        if not replay_path:
+            raise ValueError("MARKET_DATA_PROVIDER=replay needs MARKET_DATA_REPLAY_PATH")
+        return ReplayProvider(replay_path, latency_ms=latency_ms)
+    raise ValueError(f"Unknown market data provider: {name!r} (expected 'yahoo' or 'replay')")
+
+_provider: Optional[MarketDataProvider] = None
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Lazy-load the configured provider and route the shared quote cache through it."""
+    global _provider
+    if _provider is None:
+        from shared.config import settings
+        from shared.pricing import get_price_service
+        _provider = create_market_data_provider(
+            settings.market_data_provider, settings.market_data_replay_path, settings.market_data_replay_latency_ms
+        )
+        get_price_service().use_provider(_provider)
+    return _provider
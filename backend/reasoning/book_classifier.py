@@ -0,0 +1,240 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from shared.models import EventType
+from reasoning.classifiers import (
+    _concentration_finding, _sensitivity_finding, _isa_finding, _cgt_finding,
+    _pension_finding, _drift_finding, _behavioural_finding,
+)
+from reasoning.uk_finance import (
+    PENSION_STANDARD_ALLOWANCE, PENSION_THRESHOLD_INCOME, PENSION_ADJUSTED_INCOME_LIMIT,
+    PENSION_MIN_ALLOWANCE, PENSION_TAPER_RATE,
+)
+
+# Rule order of run_heartbeat; callers may pass their own
+DEFAULT_RULES = ("market", "tax", "pension", "compliance", "behavioural")
+
+RULE_EVENT_TYPES = {
+    "market": EventType.MARKET_RISK.value,
+    "tax": EventType.TAX_OPPORTUNITY.value,
+    "pension": EventType.TAX_OPPORTUNITY.value,
+    "compliance": EventType.COMPLIANCE_EXPOSURE.value,
+    "behavioural": EventType.BEHAVIOURAL_RISK.value,
+}
+
+# Same constants as RiskClassifier / UKFinanceLogic, computed the same way
+_CGT_THRESHOLD = 3000.0 * 0.8
+_NOT_PRESENT = np.iinfo(np.int64).max
+
+@dataclass
+class PackedBook:
+    """Columnar view of (client, portfolio) pairs: one row per pair, one column per sector."""
+    clients: List[Dict[str, Any]]
+    portfolios: List[Dict[str, Any]]
+    sectors: List[Any]
+    sector_performance: Dict[str, Any]
+    exposure: np.ndarray         # (n, S) summed exposure_percentage per sector
+    first_seen: np.ndarray       # (n, S) index of the first holding in that sector, _NOT_PRESENT if none
+    performance: np.ndarray      # (S,) sector performance from the snapshot, 0 if missing
+    isa_remaining: np.ndarray
+    cash_balance: np.ndarray
+    unrealized_gains: np.ndarray
+    income: np.ndarray
+    target_risk: np.ndarray
+    current_risk: np.ndarray
+    panic_score: np.ndarray
+    nightmare_sector: np.ndarray  # (n,) sector column of behavioural_profile.sensitivity_sector
+
+class BookClassifier:
+    """
+    Whole-book RiskClassifier. Packs every client's holdings and profile into arrays
+    once, evaluates each rule as a vector expression over all clients, and only builds
+    finding dicts for the rows that fire. Findings are identical to calling the
+    RiskClassifier methods client by client.
+
+    Formatting a finding costs far more than detecting it, so sweeps pass the
+    (client_id, event_type) keys that are already open as `exclude`: those rows are
+    masked out before any dict is built.
+
+    With multi=True every breached rule is returned, matching RiskClassifier.evaluate.
+    """
+
+    @staticmethod
+    def classify_book(pairs: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]], market_snapshot: Dict[str, Any], rules: Sequence[str] = DEFAULT_RULES, exclude: Optional[Iterable[Tuple[str, str]]] = None, multi: bool = False) -> List[List[Dict[str, Any]]]:
+        """Returns, for each (client, portfolio) pair, its findings in `rules` order."""
+        return BookClassifier.evaluate(BookClassifier.pack(pairs, market_snapshot), rules, exclude, multi)
+
+    @staticmethod
+    def pack(pairs: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]], market_snapshot: Dict[str, Any]) -> PackedBook:
+        sector_performance = market_snapshot.get("sector_performance", {}) or {}
+        sector_index: Dict[Any, int] = {}
+        h_row, h_sector, h_exposure, h_position = [], [], [], []
+        isa, cash, gains, income, target, current, panic, nightmare = ([] for _ in range(8))
+
+        for row, (client, portfolio) in enumerate(pairs):
+            for position, holding in enumerate(portfolio.get("holdings", []) or []):
+                sector = holding.get("sector", "Unknown")
+                h_row.append(row)
+                h_sector.append(sector_index.setdefault(sector, len(sector_index)))
+                h_exposure.append(holding.get("exposure_percentage", 0))
+                h_position.append(position)
+
+            tax_profile = client.get("tax_profile", {}) or {}
+            profile = client.get("behavioural_profile", {}) or {}
+            isa.append(tax_profile.get("isa_allowance_remaining", 0))
+            income.append(tax_profile.get("estimated_gross_income", 0))
+            cash.append(portfolio.get("cash_balance_gbp", 0))
+            gains.append(portfolio.get("unrealized_gains_gbp", 0))
+            target.append(portfolio.get("target_risk_score", 5))
+            current.append(portfolio.get("current_risk_score", 5))
+            panic.append(profile.get("panic_score", 0))
+            nightmare.append(sector_index.setdefault(profile.get("sensitivity_sector", "Energy"), len(sector_index)))
+
+        n, s = len(pairs), len(sector_index)
+        exposure = np.zeros((n, s))
+        first_seen = np.full((n, s), _NOT_PRESENT, dtype=np.int64)
+        if h_row:
+            idx = (np.asarray(h_row), np.asarray(h_sector))
+            # add.at accumulates repeated (row, sector) pairs in holding order, like the dict sum
+            np.add.at(exposure, idx, np.asarray(h_exposure, dtype=float))
+            np.minimum.at(first_seen, idx, np.asarray(h_position, dtype=np.int64))
+
+        sectors = list(sector_index)
+        return PackedBook(
+            clients=[c for c, _ in pairs],
+            portfolios=[p for _, p in pairs],
+            sectors=sectors,
+            sector_performance=sector_performance,
+            exposure=exposure,
+            first_seen=first_seen,
+            performance=np.array([sector_performance.get(sec, 0) for sec in sectors], dtype=float),
+            isa_remaining=np.asarray(isa, dtype=float),
+            cash_balance=np.asarray(cash, dtype=float),
+            unrealized_gains=np.asarray(gains, dtype=float),
+            income=np.asarray(income, dtype=float),
+            target_risk=np.asarray(target, dtype=float),
+            current_risk=np.asarray(current, dtype=float),
+            panic_score=np.asarray(panic, dtype=float),
+            nightmare_sector=np.asarray(nightmare, dtype=np.int64),
+        )
+
+    @staticmethod
+    def evaluate(book: PackedBook, rules: Sequence[str] = DEFAULT_RULES, exclude: Optional[Iterable[Tuple[str, str]]] = None, multi: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Without `exclude`, every finding of every rule. With it, findings whose
+        (client id, event_type) is in `exclude` are skipped and, unless `multi`, each
+        client gets at most one finding per event_type (the first in `rules` order).
+        """
+        evaluators = {
+            "market": _market_findings,
+            "tax": _tax_findings,
+            "pension": _pension_findings,
+            "compliance": _compliance_findings,
+            "behavioural": _behavioural_findings,
+        }
+        n = len(book.clients)
+        results: List[List[Dict[str, Any]]] = [[] for _ in range(n)]
+        taken: Optional[Dict[str, np.ndarray]] = None
+        if exclude is not None:
+            row_of = {c.get("id"): row for row, c in enumerate(book.clients)}
+            taken = {etype: np.zeros(n, dtype=bool) for etype in set(RULE_EVENT_TYPES.values())}
+            for client_id, etype in exclude:
+                row = row_of.get(client_id)
+                if row is not None and etype in taken:
+                    taken[etype][row] = True
+
+        everyone = np.ones(n, dtype=bool)
+        for rule in rules:
+            etype = RULE_EVENT_TYPES[rule]
+            allowed = ~taken[etype] if taken is not None else everyone
+            for row, finding in evaluators[rule](book, allowed, multi):
+                results[row].append(finding)
+                if taken is not None and not multi:
+                    taken[etype][row] = True
+        return results
+
+def _first_sector(candidates: np.ndarray, first_seen: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per row, the matching sector that appeared first in the holdings (dict insertion order)."""
+    keyed = np.where(candidates, first_seen, _NOT_PRESENT)
+    col = keyed.argmin(axis=1) if keyed.shape[1] else np.zeros(len(keyed), dtype=np.int64)
+    hit = keyed[np.arange(len(keyed)), col] != _NOT_PRESENT if keyed.shape[1] else np.zeros(len(keyed), dtype=bool)
+    return hit, col
+
+def _in_holding_order(book: PackedBook, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Every (row, sector) cell in `mask`, ordered by row then first appearance in the holdings."""
+    rows, cols = np.nonzero(mask)
+    order = np.lexsort((book.first_seen[rows, cols], rows))
+    return rows[order], cols[order]
+
+def _market_findings(book: PackedBook, allowed: np.ndarray, multi: bool = False):
+    present = book.first_seen != _NOT_PRESENT
+    falling = book.performance < 0
+    risk = np.where(falling, book.exposure * np.abs(book.performance), 0.0)
+
+    if multi:
+        concentrated = present & (book.exposure > 0.3)
+        sensitive = present & (risk > 0.004) & ~concentrated
+        for mask, build in ((concentrated, False), (sensitive, True)):
+            rows, cols = _in_holding_order(book, mask & allowed[:, None])
+            for row, col, exposure, score in zip(rows.tolist(), cols.tolist(), book.exposure[rows, cols].tolist(), risk[rows, cols].tolist()):
+                sector = book.sectors[col]
+                if build:
+                    yield row, _sensitivity_finding(sector, book.sector_performance.get(sector, 0), exposure, score)
+                else:
+                    yield row, _concentration_finding(sector, exposure)
+        return
+
+    # 1. Concentration: first sector above 30%
+    conc_hit, conc_col = _first_sector(present & (book.exposure > 0.3), book.first_seen)
+    rows = np.flatnonzero(conc_hit & allowed)
+    cols = conc_col[rows]
+    for row, col, exposure in zip(rows.tolist(), cols.tolist(), book.exposure[rows, cols].tolist()):
+        yield row, _concentration_finding(book.sectors[col], exposure)
+
+    # 2. Sensitivity: exposure * drop, only where concentration didn't already fire
+    sens_hit, sens_col = _first_sector(present & (risk > 0.004), book.first_seen)
+    rows = np.flatnonzero(sens_hit & ~conc_hit & allowed)
+    cols = sens_col[rows]
+    for row, col, exposure, score in zip(rows.tolist(), cols.tolist(), book.exposure[rows, cols].tolist(), risk[rows, cols].tolist()):
+        sector = book.sectors[col]
+        yield row, _sensitivity_finding(sector, book.sector_performance.get(sector, 0), exposure, score)
+
+def _tax_findings(book: PackedBook, allowed: np.ndarray, multi: bool = False):
+    isa_hit = (book.isa_remaining > 5000) & (book.cash_balance > 10000)
+    cgt_hit = book.unrealized_gains > _CGT_THRESHOLD
+    if not multi:
+        cgt_hit &= ~isa_hit
+    for row in np.flatnonzero(isa_hit & allowed).tolist():
+        tax_profile = book.clients[row].get("tax_profile", {}) or {}
+        yield row, _isa_finding(tax_profile.get("isa_allowance_remaining", 0), book.portfolios[row].get("cash_balance_gbp", 0))
+    for row in np.flatnonzero(cgt_hit & allowed).tolist():
+        yield row, _cgt_finding(book.portfolios[row].get("unrealized_gains_gbp", 0))
+
+def _pension_findings(book: PackedBook, allowed: np.ndarray, multi: bool = False):
+    excess = book.income - PENSION_ADJUSTED_INCOME_LIMIT
+    allowance = np.where(
+        book.income <= PENSION_ADJUSTED_INCOME_LIMIT, PENSION_STANDARD_ALLOWANCE,
+        np.maximum(PENSION_MIN_ALLOWANCE, PENSION_STANDARD_ALLOWANCE - excess / PENSION_TAPER_RATE)
+    )
+    rows = np.flatnonzero((book.income > PENSION_THRESHOLD_INCOME) & (allowance < PENSION_STANDARD_ALLOWANCE) & allowed)
+    for row, row_allowance in zip(rows.tolist(), allowance[rows].tolist()):
+        income = (book.clients[row].get("tax_profile", {}) or {}).get("estimated_gross_income", 0)
+        yield row, _pension_finding(income, row_allowance)
+
+def _compliance_findings(book: PackedBook, allowed: np.ndarray, multi: bool = False):
+    drift = np.abs(book.current_risk - book.target_risk)
+    threshold = np.where(book.target_risk < 4, 0.5, 1.2)
+    rows = np.flatnonzero((drift >= threshold) & allowed)
+    for row, row_threshold in zip(rows.tolist(), threshold[rows].tolist()):
+        portfolio = book.portfolios[row]
+        target = portfolio.get("target_risk_score", 5)
+        current = portfolio.get("current_risk_score", 5)
+        yield row, _drift_finding(target, current, abs(current - target), row_threshold)
+
+def _behavioural_findings(book: PackedBook, allowed: np.ndarray, multi: bool = False):
+    perf = book.performance[book.nightmare_sector]
+    hit = ((book.panic_score >= 6) & (perf < -0.01)) | (perf < -0.04)
+    for row in np.flatnonzero(hit & allowed).tolist():
+        profile = book.clients[row].get("behavioural_profile", {}) or {}
+        sector = profile.get("sensitivity_sector", "Energy")
+        yield row, _behavioural_finding(profile.get("panic_score", 0), sector, book.sector_performance.get(sector, 0))
@@ -1,11 +1,55 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from shared.models import EventType, UrgencyLevel
-from reasoning.uk_finance import UKFinanceLogic
+from reasoning.uk_finance import UKFinanceLogic, PENSION_STANDARD_ALLOWANCE, PENSION_THRESHOLD_INCOME
 
 class RiskClassifier:
     """Strategic advisor logic for risk classification. Thinking beyond simple thresholds."""
     
+    @staticmethod
+    def evaluate(client: Dict[str, Any], portfolio: Dict[str, Any], market_snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Single pass over one client: every breached rule, not just the first per method.
+        Flags every concentrated sector, every sensitive sector that isn't already
+        concentrated, ISA and CGT together, pension taper, mandate drift and behavioural
+        friction. Each finding carries a 0..1 `severity` in its classification.
+        """
+        findings = []
+        sector_performance = market_snapshot.get("sector_performance", {}) or {}
+        sector_exposures = {}
+        for holding in portfolio.get("holdings", []) or []:
+            sector = holding.get("sector", "Unknown")
+            sector_exposures[sector] = sector_exposures.get(sector, 0) + holding.get("exposure_percentage", 0)
+
+        concentrated = set()
+        for sector, exposure in sector_exposures.items():
+            if exposure > 0.3:
+                concentrated.add(sector)
+                findings.append(_concentration_finding(sector, exposure))
+        for sector, exposure in sector_exposures.items():
+            performance = sector_performance.get(sector, 0)
+            risk_score = exposure * abs(performance) if performance < 0 else 0
+            if sector not in concentrated and risk_score > 0.004:
+                findings.append(_sensitivity_finding(sector, performance, exposure, risk_score))
+
+        tax_profile = client.get("tax_profile", {}) or {}
+        isa_remaining = tax_profile.get("isa_allowance_remaining", 0)
+        cash_balance = portfolio.get("cash_balance_gbp", 0)
+        if UKFinanceLogic.check_isa_optimization(isa_remaining, cash_balance):
+            findings.append(_isa_finding(isa_remaining, cash_balance))
+        unrealized_gains = portfolio.get("unrealized_gains_gbp", 0)
+        if UKFinanceLogic.check_cgt_exposure(unrealized_gains):
+            findings.append(_cgt_finding(unrealized_gains))
+
+        for single in (
+            RiskClassifier.classify_pension_allowance(client),
+            RiskClassifier.classify_compliance_exposure(portfolio),
+            RiskClassifier.classify_behavioural_risk(client, market_snapshot),
+        ):
+            if single:
+                findings.append(single)
+        return findings
+
     @staticmethod
     def classify_market_risk(portfolio: Dict[str, Any], market_snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -25,16 +69,7 @@ class RiskClassifier:
 
         for sector, exposure in sector_exposures.items():
             if exposure > 0.3: # 30% is a strategic red flag for HNW clients
-                return {
-                    "event_type": EventType.MARKET_RISK.value,
-                    "urgency": (UrgencyLevel.HIGH.value if exposure > 0.45 else UrgencyLevel.MEDIUM.value),
-                    "deterministic_classification": {
-                        "reason": f"Strategic Concentration Risk: {sector} makes up {exposure*100:.1f}% of total portfolio.",
-                        "type": "concentration",
-                        "sector": sector,
-                        "exposure": exposure
-                    }
-                }
+                return _concentration_finding(sector, exposure)
 
         # 2. Check for COMBINED RISK (Exposure * Performance)
         for sector, exposure in sector_exposures.items():
@@ -46,17 +81,7 @@ class RiskClassifier:
             risk_score = exposure * abs(performance) if performance < 0 else 0
             
             if risk_score > 0.004: # Equivalent to 20% exposure * 2% drop
-                return {
-                    "event_type": EventType.MARKET_RISK.value,
-                    "urgency": (UrgencyLevel.HIGH.value if risk_score > 0.01 else UrgencyLevel.MEDIUM.value),
-                    "deterministic_classification": {
-                        "reason": f"Sensitivity Alert: {sector} drop ({performance*100:.1f}%) impacting high exposure ({exposure:.1f}%)",
-                        "type": "sensitivity",
-                        "sector": sector,
-                        "performance": performance,
-                        "exposure": exposure
-                    }
-                }
+                return _sensitivity_finding(sector, performance, exposure, risk_score)
         return None
 
     @staticmethod
@@ -71,27 +96,12 @@ class RiskClassifier:
         
         # ISA Optimization
         if UKFinanceLogic.check_isa_optimization(isa_remaining, cash_balance):
-            return {
-                "event_type": EventType.TAX_OPPORTUNITY.value,
-                "urgency": UrgencyLevel.MEDIUM.value,
-                "deterministic_classification": {
-                    "reason": f"Strategic Tax Opportunity: High cash (£{cash_balance:,.0f}) with unused ISA (£{isa_remaining:,.0f}).",
-                    "isa_remaining": isa_remaining,
-                    "cash_balance": cash_balance
-                }
-            }
+            return _isa_finding(isa_remaining, cash_balance)
 
         # CGT Exposure
         unrealized_gains = portfolio.get("unrealized_gains_gbp", 0)
         if UKFinanceLogic.check_cgt_exposure(unrealized_gains):
-            return {
-                "event_type": EventType.TAX_OPPORTUNITY.value,
-                "urgency": UrgencyLevel.MEDIUM.value,
-                "deterministic_classification": {
-                    "reason": f"UK CGT Warning: Unrealized gains (£{unrealized_gains:,.0f}) approaching 2024/25 allowance.",
-                    "unrealized_gains": unrealized_gains
-                }
-            }
+            return _cgt_finding(unrealized_gains)
             
         return None
 
@@ -101,18 +111,10 @@ class RiskClassifier:
         Detects pension allowance tapering or looming limits.
         """
         income = client.get("tax_profile", {}).get("estimated_gross_income", 0)
-        if income > 200000:
+        if income > PENSION_THRESHOLD_INCOME:
             allowance = UKFinanceLogic.calculate_pension_annual_allowance(income)
-            if allowance < 60000:
-                return {
-                    "event_type": EventType.TAX_OPPORTUNITY.value,
-                    "urgency": (UrgencyLevel.HIGH.value if allowance < 20000 else UrgencyLevel.MEDIUM.value),
-                    "deterministic_classification": {
-                        "reason": f"Pension Tapering: High income (£{income:,.0f}) reduced available allowance to £{allowance:,.0f}.",
-                        "income": income,
-                        "available_allowance": allowance
-                    }
-                }
+            if allowance < PENSION_STANDARD_ALLOWANCE:
+                return _pension_finding(income, allowance)
         return None
 
     @staticmethod
@@ -129,16 +131,7 @@ class RiskClassifier:
         threshold = 0.5 if target_risk < 4 else 1.2
         
         if drift >= threshold:
-            return {
-                "event_type": EventType.COMPLIANCE_EXPOSURE.value,
-                "urgency": (UrgencyLevel.HIGH.value if drift > (threshold * 2) else UrgencyLevel.MEDIUM.value),
-                "deterministic_classification": {
-                    "reason": f"Mandate Drift: Client target is {target_risk}, currently operating at {current_risk:.1f}",
-                    "drift": drift,
-                    "target": target_risk,
-                    "current": current_risk
-                }
-            }
+            return _drift_finding(target_risk, current_risk, drift, threshold)
         return None
 
     @staticmethod
@@ -155,18 +148,149 @@ class RiskClassifier:
         perf = sector_performance.get(nightmare_sector, 0)
         
         if (panic_score >= 6 and perf < -0.01) or (perf < -0.04):
-            return {
-                "event_type": EventType.BEHAVIOURAL_RISK.value,
-                "urgency": (UrgencyLevel.HIGH.value if panic_score > 8 else UrgencyLevel.MEDIUM.value),
-                "deterministic_classification": {
-                    "reason": f"Behavioural Friction: Client has high sensitivity to {nightmare_sector} which is currently down {perf*100:.1f}%",
-                    "panic_score": panic_score,
-                    "trigger_sector": nightmare_sector,
-                    "trigger_performance": perf
-                }
-            }
+            return _behavioural_finding(panic_score, nightmare_sector, perf)
         return None
 
+# ─── FINDING BUILDERS ─────────────────────────────────────────
+# Shared by RiskClassifier and the vectorised BookClassifier so both emit identical dicts.
+# Enum values are resolved once here; a sweep builds hundreds of thousands of findings.
+
+_MARKET_RISK = EventType.MARKET_RISK.value
+_TAX_OPPORTUNITY = EventType.TAX_OPPORTUNITY.value
+_COMPLIANCE_EXPOSURE = EventType.COMPLIANCE_EXPOSURE.value
+_BEHAVIOURAL_RISK = EventType.BEHAVIOURAL_RISK.value
+_HIGH = UrgencyLevel.HIGH.value
+_MEDIUM = UrgencyLevel.MEDIUM.value
+_URGENCY_RANK = {UrgencyLevel.LOW.value: 0, _MEDIUM: 1, _HIGH: 2, UrgencyLevel.CRITICAL.value: 3}
+
+def _severity(value: float, trigger: float, high: float) -> float:
+    """
+    0..1 score on a common scale: 0.5 at the rule's trigger threshold and 0.75 where
+    the rule escalates to high urgency, linear in between and beyond.
+    """
+    score = 0.5 + 0.25 * (value - trigger) / (high - trigger)
+    return round(min(1.0, max(0.0, score)), 4)
+
+def _concentration_finding(sector: str, exposure: float) -> Dict[str, Any]:
+    return {
+        "event_type": _MARKET_RISK,
+        "urgency": (_HIGH if exposure > 0.45 else _MEDIUM),
+        "deterministic_classification": {
+            "reason": f"Strategic Concentration Risk: {sector} makes up {exposure*100:.1f}% of total portfolio.",
+            "type": "concentration",
+            "sector": sector,
+            "exposure": exposure,
+            "severity": _severity(exposure, 0.3, 0.45)
+        }
+    }
+
+def _sensitivity_finding(sector: str, performance: float, exposure: float, risk_score: float) -> Dict[str, Any]:
+    return {
+        "event_type": _MARKET_RISK,
+        "urgency": (_HIGH if risk_score > 0.01 else _MEDIUM),
+        "deterministic_classification": {
+            "reason": f"Sensitivity Alert: {sector} drop ({performance*100:.1f}%) impacting high exposure ({exposure:.1f}%)",
+            "type": "sensitivity",
+            "sector": sector,
+            "performance": performance,
+            "exposure": exposure,
+            "severity": _severity(risk_score, 0.004, 0.01)
+        }
+    }
+
+def _isa_finding(isa_remaining: float, cash_balance: float) -> Dict[str, Any]:
+    return {
+        "event_type": _TAX_OPPORTUNITY,
+        "urgency": _MEDIUM,
+        "deterministic_classification": {
+            "reason": f"Strategic Tax Opportunity: High cash (£{cash_balance:,.0f}) with unused ISA (£{isa_remaining:,.0f}).",
+            "isa_remaining": isa_remaining,
+            "cash_balance": cash_balance,
+            "severity": _severity(min(isa_remaining / 5000, cash_balance / 10000), 1, 4)
+        }
+    }
+
+def _cgt_finding(unrealized_gains: float) -> Dict[str, Any]:
+    return {
+        "event_type": _TAX_OPPORTUNITY,
+        "urgency": _MEDIUM,
+        "deterministic_classification": {
+            "reason": f"UK CGT Warning: Unrealized gains (£{unrealized_gains:,.0f}) approaching 2024/25 allowance.",
+            "unrealized_gains": unrealized_gains,
+            "severity": _severity(unrealized_gains, 2400, 9600)
+        }
+    }
+
+def _pension_finding(income: float, allowance: float) -> Dict[str, Any]:
+    return {
+        "event_type": _TAX_OPPORTUNITY,
+        "urgency": (_HIGH if allowance < 20000 else _MEDIUM),
+        "deterministic_classification": {
+            "reason": f"Pension Tapering: High income (£{income:,.0f}) reduced available allowance to £{allowance:,.0f}.",
+            "income": income,
+            "available_allowance": allowance,
+            "severity": _severity(PENSION_STANDARD_ALLOWANCE - allowance, 0, 40000)
+        }
+    }
+
+def _drift_finding(target_risk: float, current_risk: float, drift: float, threshold: float) -> Dict[str, Any]:
+    return {
+        "event_type": _COMPLIANCE_EXPOSURE,
+        "urgency": (_HIGH if drift > (threshold * 2) else _MEDIUM),
+        "deterministic_classification": {
+            "reason": f"Mandate Drift: Client target is {target_risk}, currently operating at {current_risk:.1f}",
+            "drift": drift,
+            "target": target_risk,
+            "current": current_risk,
+            "severity": _severity(drift, threshold, threshold * 2)
+        }
+    }
+
+def _behavioural_finding(panic_score: float, sector: str, perf: float) -> Dict[str, Any]:
+    return {
+        "event_type": _BEHAVIOURAL_RISK,
+        "urgency": (_HIGH if panic_score > 8 else _MEDIUM),
+        "deterministic_classification": {
+            "reason": f"Behavioural Friction: Client has high sensitivity to {sector} which is currently down {perf*100:.1f}%",
+            "panic_score": panic_score,
+            "trigger_sector": sector,
+            "trigger_performance": perf,
+            "severity": max(
+                _severity(panic_score, 6, 9) if perf < -0.01 else 0,
+                _severity(-perf, 0.04, 0.08) if perf < -0.04 else 0,
+            )
+        }
+    }
+
+def collapse_findings(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Folds one client's findings into one per event_type, since at most one event per
+    type is open at a time. The most severe finding leads, the event takes the highest
+    urgency in the group, and the rest are kept under `related_findings`.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for finding in findings:
+        etype = finding["event_type"]
+        groups.setdefault(etype.value if hasattr(etype, "value") else str(etype), []).append(finding)
+
+    collapsed = []
+    for group in groups.values():
+        if len(group) == 1:
+            collapsed.append(group[0])
+            continue
+        lead = max(group, key=lambda f: f["deterministic_classification"].get("severity", 0))
+        urgency = max((f["urgency"] for f in group), key=lambda u: _URGENCY_RANK.get(getattr(u, "value", u), 1))
+        classification = dict(lead["deterministic_classification"])
+        classification["related_findings"] = [
+            {
+                "reason": f["deterministic_classification"].get("reason", ""),
+                "severity": f["deterministic_classification"].get("severity", 0),
+            }
+            for f in group if f is not lead
+        ]
+        collapsed.append({**lead, "urgency": urgency, "deterministic_classification": classification})
+    return collapsed
+
 class VulnerabilityAssessor:
     """
     FCA-aligned vulnerability assessment logic.
@@ -1,21 +1,34 @@
 import asyncio
-from datetime import datetime, timezone
-from reasoning.classifiers import RiskClassifier
+from datetime import datetime, timedelta, timezone
+from reasoning.classifiers import VulnerabilityAssessor, collapse_findings
+from reasoning.book_classifier import BookClassifier
 from reasoning.workflows import intelligence_workflow
 from shared.models import EventStatus, EventType
 from api.services.custodian import LiveCustodianClient
-from api.services.broadcaster import broadcaster
+from api.services.deltas import publish_delta, EVENT_CREATED
+from api.services.stream_view import stream_view
 from shared.database import db_manager
+from shared.config import settings
 from shared.logging import setup_logger
-from mcp_server.main import fetch_comprehensive_market_intel
+from shared.llm_executor import Lane
+from shared.market_intel import MarketIntelSnapshot
+from mcp_server.main import market_intel_service
 
 logger = setup_logger("heartbeat")
 
+# A sweep that dies between claiming events and storing their interpretations leaves them
+# open with a null ai_interpretation, and the open-key index keeps later sweeps from claiming
+# them again. Later sweeps re-interpret those once they are older than any live sweep.
+STRANDED_AFTER = timedelta(minutes=15)
+STRANDED_LIMIT = 200
+
 async def run_heartbeat():
     """
     Heartbeat Engine: Every 30 minutes, detect new risk events.
-    1. Check for global Market Interrupts via Agent (Pulse check).
-    2. Scan all portfolios for deterministic risks.
+    1. Bulk-load the book (clients, portfolios, memories, open events) in set-based queries.
+    2. Run deterministic classifiers over the whole book as vector operations, plus vulnerability checks.
+    3. Claim new findings in one idempotent insert, then interpret only the claimed
+       events (plus any stranded by an earlier sweep) through a bounded-concurrency LLM worker pool.
     """
     logger.info("Starting agent-led heartbeat cycle")
     
@@ -24,11 +37,12 @@ async def run_heartbeat():
     
     try:
         # 1. Pull market snapshot
-        market_snapshot_resp = db_manager.client.table("market_snapshots")\
-            .select("*")\
-            .order("timestamp", desc=True)\
-            .limit(1)\
-            .execute()
+        market_snapshot_resp = await db_manager.aexecute(
+            db_manager.client.table("market_snapshots")
+            .select("*")
+            .order("timestamp", desc=True)
+            .limit(1)
+        )
         
         if not market_snapshot_resp.data:
             logger.warning("No market snapshot found. Skipping heartbeat.")
@@ -36,91 +50,135 @@ async def run_heartbeat():
             
         market_snapshot = market_snapshot_resp.data[0]
         
-        # PROACTIVE: Fetch comprehensive market intel once for all agent analysis
-        logger.info("Fetching shared market intelligence context for workflow")
-        market_intel = await fetch_comprehensive_market_intel()
+        # PROACTIVE: Take the shared market intel snapshot once for all agent analysis
+        market_intel = await market_intel_service.get()
+        logger.info(f"Using market intel snapshot {market_intel.version}")
+        
+        # 2. Bulk-load the whole book once instead of querying per client
+        all_clients, base_portfolios, memory_rows, open_rows = await asyncio.gather(
+            db_manager.aselect_all("clients"),
+            db_manager.aselect_all("portfolios"),
+            db_manager.aselect_all("behavioural_memory", "client_id, content"),
+            db_manager.aselect_all("risk_events", "client_id, event_type", filters={"status": EventStatus.OPEN.value}),
+        )
         
-        # 2. PROACTIVE: Market Pulse Check (Deterministic)
-        # We can move this to a deterministic rule or a simple LLM call if needed.
-        # For now, we rely on deterministic RiskClassifier in the loop.
+        memories_by_client = {}
+        for m in memory_rows:
+            memories_by_client.setdefault(m["client_id"], []).append(m["content"])
+        open_keys = {(e["client_id"], e["event_type"]) for e in open_rows}
+        live_portfolios = await asyncio.to_thread(LiveCustodianClient.get_live_portfolios, base_portfolios)
+        logger.info(f"Loaded book: {len(all_clients)} clients, {len(live_portfolios)} portfolios, {len(open_keys)} open events")
         
-        # 3. Get all clients for proactive sweep
-        all_clients = db_manager.get_all("clients")
+        checked_at = datetime.now(timezone.utc).isoformat()
+        vulnerability_updates = []
         
+        # 3. Proactive Vulnerability Assessment
         for client in all_clients:
-            client_id = client["id"]
-            
-            # 4. Proactive Vulnerability Assessment
-            memories_resp = db_manager.client.table("behavioural_memory")\
-                .select("content").eq("client_id", client_id).execute()
-            memories = [m["content"] for m in memories_resp.data] if memories_resp.data else []
-            
-            from reasoning.classifiers import VulnerabilityAssessor
-            v_report = VulnerabilityAssessor.assess(client, memories)
-            
-            db_manager.update("clients", client_id, {
+            v_report = VulnerabilityAssessor.assess(client, memories_by_client.get(client["id"], []))
+            vulnerability_updates.append({
+                "id": client["id"],
                 **v_report,
-                "last_proactive_check": datetime.now(timezone.utc).isoformat()
+                "last_proactive_check": checked_at
             })
 
-            portfolio = LiveCustodianClient.get_live_portfolio(client_id)
-            if not portfolio: continue
-                
-            portfolios_scanned += 1
-            
-            # 5. Standard deterministic filters (RiskClassifier)
-            risks = []
-            m_risk = RiskClassifier.classify_market_risk(portfolio, market_snapshot)
-            if m_risk: risks.append(m_risk)
-            
-            t_opp = RiskClassifier.classify_tax_opportunity(client, portfolio)
-            if t_opp: risks.append(t_opp)
-            
-            p_risk = RiskClassifier.classify_pension_allowance(client)
-            if p_risk: risks.append(p_risk)
-            
-            c_exp = RiskClassifier.classify_compliance_exposure(portfolio)
-            if c_exp: risks.append(c_exp)
-            
-            b_risk = RiskClassifier.classify_behavioural_risk(client, market_snapshot)
-            if b_risk: risks.append(b_risk)
-            
-            # 6. Deduplicate and Insert
-            for risk in risks:
-                etype = risk["event_type"]
-                etype_str = etype.value if hasattr(etype, "value") else str(etype)
-                
-                existing = db_manager.client.table("risk_events")\
-                    .select("*")\
-                    .eq("client_id", client_id)\
-                    .eq("event_type", etype_str)\
-                    .eq("status", EventStatus.OPEN.value)\
-                    .execute()
-                
-                if not existing.data:
-                    # PROACTIVE: Call IntelligenceWorkflow with SHARED market intel
-                    interpretation = await intelligence_workflow.interpret_risk(client_id, risk, market_context=market_intel)
-                    
-                    risk_data = {
-                        "client_id": client_id,
-                        "event_type": risk["event_type"],
-                        "urgency": risk["urgency"],
-                        "deterministic_classification": risk["deterministic_classification"],
-                        "ai_interpretation": interpretation,
-                        "status": EventStatus.OPEN
-                    }
-                    db_manager.insert("risk_events", risk_data)
-                    risks_found += 1
+        # 4. Deterministic filters for every priced portfolio in one pass. Every breach is
+        # reported with a severity; keys already open are masked out before findings are
+        # built, and each client's findings collapse to one event per type
+        pairs = [(client, live_portfolios[client["id"]]) for client in all_clients if live_portfolios.get(client["id"])]
+        portfolios_scanned = len(pairs)
+        findings = BookClassifier.classify_book(pairs, market_snapshot, exclude=open_keys, multi=True)
+        pending = [(client["id"], risk) for (client, _), risks in zip(pairs, findings) for risk in collapse_findings(risks)]
+        
+        # Identical reports are grouped, so the whole refresh is a handful of requests
+        v_result = await db_manager.aupdate_many("clients", vulnerability_updates)
+        logger.info(f"Vulnerability refresh: {len(vulnerability_updates)} clients in {v_result.requests} requests, {len(v_result.failed)} failed")
+        
+        # 5. Claim new findings in one set-based insert. A sweep running concurrently (e.g.
+        # one triggered by the sentinel) loses the race on the open-key index instead of
+        # duplicating events, and only events this sweep created are interpreted
+        claimed = await _claim_events(pending)
+        risks_found = len(claimed)
+        stranded = await load_stranded_events()
+        logger.info(
+            f"Interpreting {len(claimed)}/{len(pending)} claimed findings and {len(stranded)} stranded events "
+            f"(batch size {settings.interpret_batch_size})"
+        )
+        inserted_events = await _interpret_claimed(claimed + stranded, market_intel)
+        await stream_view.apply_events(inserted_events)
+        await publish_delta(EVENT_CREATED, [row["id"] for row in inserted_events])
 
         summary = f"Proactive sweep complete. {portfolios_scanned} portfolios scanned. {risks_found} events found. Vulnerability assessments updated."
-        _log_heartbeat("book_sweep", portfolios_scanned, risks_found, summary)
-        
-        if risks_found > 0:
-            await broadcaster.broadcast("update")
+        await _log_heartbeat("book_sweep", portfolios_scanned, risks_found, summary)
         
     except Exception as e:
         logger.error(f"Error in heartbeat cycle: {e}")
-        _log_heartbeat("book_sweep", portfolios_scanned, risks_found, f"Error: {str(e)}")
+        await _log_heartbeat("book_sweep", portfolios_scanned, risks_found, f"Error: {str(e)}")
+
+async def _claim_events(pending: list) -> list:
+    """Inserts (client_id, risk) pairs as open events; returns only the rows created."""
+    if not pending:
+        return []
+    rows = [
+        {
+            "client_id": client_id,
+            "event_type": risk["event_type"],
+            "urgency": risk["urgency"],
+            "deterministic_classification": risk["deterministic_classification"],
+        }
+        for client_id, risk in pending
+    ]
+    claimed = await db_manager.ainsert_open_events(rows)
+    for failure in claimed.failed:
+        logger.error(f"Failed to insert risk event for {failure['row'].get('client_id')}: {failure['error']}")
+    return claimed.rows
+
+async def load_stranded_events() -> list:
+    """Open events claimed more than STRANDED_AFTER ago whose interpretation was never stored."""
+    cutoff = (datetime.now(timezone.utc) - STRANDED_AFTER).isoformat()
+    try:
+        resp = await db_manager.aexecute(
+            db_manager.client.table("risk_events")
+            .select("*")
+            .eq("status", EventStatus.OPEN.value)
+            .is_("ai_interpretation", "null")
+            .lt("created_at", cutoff)
+            # The master brief and market interrupts carry no interpretation by design
+            .neq("event_type", EventType.MORNING_INTELLIGENCE.value)
+            .neq("event_type", EventType.MARKET_INTERRUPT.value)
+            .order("created_at")
+            .limit(STRANDED_LIMIT)
+        )
+        return resp.data or []
+    except Exception as e:
+        logger.error(f"Failed to load stranded risk events: {e}")
+        return []
+
+async def _interpret_claimed(claimed: list, market_intel: MarketIntelSnapshot) -> list:
+    """
+    Interprets claimed events in batched LLM requests (see IntelligenceWorkflow.interpret_risks),
+    then writes the interpretations back in one bulk upsert. Returns every claimed row;
+    events whose write failed keep their deterministic card.
+    """
+    if not claimed:
+        return []
+    # PROACTIVE: Call IntelligenceWorkflow with SHARED market intel
+    interpretations = await intelligence_workflow.interpret_risks(claimed, market_context=market_intel, lane=Lane.SWEEP)
+    # Status is left out so an event resolved meanwhile stays resolved
+    updates = [
+        {
+            "id": event["id"],
+            "client_id": event["client_id"],
+            "event_type": event["event_type"],
+            "deterministic_classification": event["deterministic_classification"],
+            "ai_interpretation": interpretation,
+        }
+        for event, interpretation in zip(claimed, interpretations)
+    ]
+    written = await db_manager.aupsert_many("risk_events", updates)
+    for failure in written.failed:
+        logger.error(f"Failed to store interpretation for event {failure['row'].get('id')}: {failure['error']}")
+    interpreted = {row["id"]: row for row in written.rows}
+    return [interpreted.get(event["id"], event) for event in claimed]
 
 def _trigger_global_interrupt(pulse: dict):
     """Simplified helper to trigger a market interrupt for dummy reference."""
@@ -153,14 +211,15 @@ def _trigger_global_interrupt(pulse: dict):
     except Exception as e:
         logger.error(f"Failed to trigger global interrupt: {e}")
 
-def _log_heartbeat(sweep_type: str, portfolios_scanned: int, risks_found: int, summary: str):
+async def _log_heartbeat(sweep_type: str, portfolios_scanned: int, risks_found: int, summary: str):
     try:
-        db_manager.insert("heartbeat_logs", {
+        log = await db_manager.ainsert("heartbeat_logs", {
             "sweep_type": sweep_type,
             "portfolios_scanned": portfolios_scanned,
             "risks_found": risks_found,
             "result_summary": summary
         })
+        stream_view.add_heartbeat_log(log)
     except Exception: pass
 
 if __name__ == "__main__":
@@ -2,11 +2,15 @@ import asyncio
 from datetime import datetime, timezone
 from shared.database import db_manager
 from shared.logging import setup_logger
-from reasoning.classifiers import RiskClassifier
+from shared.llm_executor import Lane
+from reasoning.book_classifier import BookClassifier
+from reasoning.classifiers import collapse_findings
 from reasoning.workflows import intelligence_workflow
 from shared.models import EventType, UrgencyLevel, EventStatus
-from api.services.broadcaster import broadcaster
-from mcp_server.main import fetch_comprehensive_market_intel
+from api.services.deltas import publish_delta, BRIEF_READY, EVENT_CREATED
+from api.services.stream_view import stream_view
+from reasoning.heartbeat import load_stranded_events
+from mcp_server.main import market_intel_service
 
 logger = setup_logger("morning_brief")
 
@@ -21,15 +25,15 @@ async def run_morning_analysis():
     
     try:
         # 1. Macro Analysis
-        clients = db_manager.get_all("clients")
+        clients = await db_manager.aget_all("clients")
         if not clients:
             logger.warning("No clients found for morning brief.")
             return
 
-        # SHARED CONTEXT: Fetch comprehensive market intel once for all polished insights
+        # SHARED CONTEXT: One market intel snapshot for all polished insights
         logger.info("Fetching shared market intelligence context for workflow")
         try:
-            market_intel = await asyncio.wait_for(fetch_comprehensive_market_intel(), timeout=15.0)
+            market_intel = await asyncio.wait_for(market_intel_service.get(), timeout=15.0)
         except Exception as e:
             logger.warning(f"Market intel fetch failed or timed out: {e}. Using empty context.")
             market_intel = {"market_news": [], "geopolitical_events": [], "macro_indicators": {}}
@@ -45,11 +49,12 @@ async def run_morning_analysis():
         master_data = report.get("book_summary_card", {})
         if master_data:
             # Check if a Master Brief already exists for today
-            existing_master = db_manager.client.table("risk_events")\
-                .select("id")\
-                .eq("event_type", EventType.MORNING_INTELLIGENCE.value)\
-                .eq("status", EventStatus.OPEN.value)\
-                .execute()
+            existing_master = await db_manager.aexecute(
+                db_manager.client.table("risk_events")
+                .select("id")
+                .eq("event_type", EventType.MORNING_INTELLIGENCE.value)
+                .eq("status", EventStatus.OPEN.value)
+            )
             
             if not existing_master.data:
                 risk_data = {
@@ -65,47 +70,41 @@ async def run_morning_analysis():
                     },
                     "status": EventStatus.OPEN
                 }
-                db_manager.insert("risk_events", risk_data)
+                master_row = await db_manager.ainsert("risk_events", risk_data)
+                await stream_view.apply_events([master_row])
+                if master_row:
+                    await publish_delta(BRIEF_READY, [master_row["id"]])
             else:
                 logger.info("Morning master brief already exists. Skipping insertion.")
 
         # 2b. Deterministic Scanning for all clients
         # Get latest market snapshot for deterministic rules
-        snapshots = db_manager.client.table("market_snapshots").select("*").order("timestamp", desc=True).limit(1).execute()
+        snapshots = await db_manager.aexecute(
+            db_manager.client.table("market_snapshots").select("*").order("timestamp", desc=True).limit(1)
+        )
         snapshot = snapshots.data[0] if snapshots.data else {}
 
+        # 1. Bulk-load portfolios (first per client) and the open (client, type) keys, then
+        # classify the whole book in one pass: Market Risk, Pension Tapering, ISA/CGT,
+        # Behavioural Friction, Mandate Drift. Every breach is reported; keys already open are skipped.
+        portfolio_rows, open_rows = await asyncio.gather(
+            db_manager.aselect_all("portfolios"),
+            db_manager.aselect_all("risk_events", "client_id, event_type", filters={"status": EventStatus.OPEN.value}),
+        )
+        portfolios = {}
+        for p in portfolio_rows:
+            portfolios.setdefault(p["client_id"], p)
+        open_keys = {(e["client_id"], e["event_type"]) for e in open_rows}
+        pairs = [(client, portfolios[client["id"]]) for client in clients if client["id"] in portfolios]
+        book_findings = BookClassifier.classify_book(
+            pairs, snapshot, rules=("market", "pension", "tax", "behavioural", "compliance"),
+            exclude=open_keys, multi=True
+        )
+
         count = 0
-        for client in clients:
+        pending = []
+        for (client, portfolio), findings in zip(pairs, book_findings):
             try:
-                # 1. Fetch portfolio
-                port_resp = db_manager.client.table("portfolios").select("*").eq("client_id", client["id"]).execute()
-                if not port_resp.data:
-                    continue
-                portfolio = port_resp.data[0]
-
-                # 2. Run Deterministic Classifiers
-                findings = []
-                
-                # Market Risk (Concentration + Sensitivity)
-                m_risk = RiskClassifier.classify_market_risk(portfolio, snapshot)
-                if m_risk: findings.append(m_risk)
-                
-                # Pension Allowance (UK Tapering)
-                p_risk = RiskClassifier.classify_pension_allowance(client)
-                if p_risk: findings.append(p_risk)
-                
-                # Tax Opportunity (ISA/CGT focus)
-                t_opp = RiskClassifier.classify_tax_opportunity(client, portfolio)
-                if t_opp: findings.append(t_opp)
-                
-                # Behavioural Risk (Strategic Friction)
-                b_risk = RiskClassifier.classify_behavioural_risk(client, snapshot)
-                if b_risk: findings.append(b_risk)
-                
-                # Compliance (Mandate Drift)
-                c_exp = RiskClassifier.classify_compliance_exposure(portfolio)
-                if c_exp: findings.append(c_exp)
-
                 if findings:
                     logger.info(f"Client {client['first_name']} has {len(findings)} deterministic findings.")
                 else:
@@ -122,61 +121,62 @@ async def run_morning_analysis():
                         }
                     })
 
-                # 3. If any finding, use Workflow to POLISH it
-                for finding in findings:
-                    try:
-                        print(f"DEBUG: Processing risk {finding['event_type']} for {client['first_name']}")
-                        # DEDUPLICATION: Check if this risk already exists as OPEN
-                        # Ensure event_type is a string for the query
-                        etype = finding["event_type"]
-                        etype_str = etype.value if hasattr(etype, "value") else str(etype)
-
-                        existing_risk = db_manager.client.table("risk_events")\
-                            .select("id")\
-                            .eq("client_id", client["id"])\
-                            .eq("event_type", etype_str)\
-                            .eq("status", EventStatus.OPEN.value)\
-                            .execute()
-                        
-                        if existing_risk.data:
-                            print(f"DEBUG: Risk {etype_str} already open for {client['first_name']}. Skipping.")
-                            continue
-
-                        print(f"DEBUG: Interpreting risk {etype_str} for {client['first_name']}...")
-                        # Polishing step: connecting memory to the deterministic risk
-                        interpretation = await intelligence_workflow.interpret_risk(client["id"], finding, market_context=market_intel)
-                        
-                        risk_data = {
+                # 3. One event per type: the most severe breach leads, the rest ride along
+                for finding in collapse_findings(findings):
+                    etype = finding["event_type"]
+                    etype_str = etype.value if hasattr(etype, "value") else str(etype)
+                    if (client["id"], etype_str) not in open_keys:
+                        pending.append({
                             "client_id": client["id"],
                             "event_type": finding["event_type"],
                             "urgency": finding["urgency"],
                             "deterministic_classification": finding["deterministic_classification"],
-                            "ai_interpretation": {
-                                "headline": interpretation.get("headline"),
-                                "consequence": interpretation.get("consequence_if_ignored"),
-                                "behavioural_nuance": interpretation.get("behavioural_nuance"),
-                                "suggested_actions": [interpretation.get("headline")] 
-                            },
-                            "status": EventStatus.OPEN
-                        }
-                        
-                        print(f"DEBUG: Inserting risk {etype_str} for {client['first_name']} into DB...")
-                        res = db_manager.insert("risk_events", risk_data)
-                        if res:
-                            print(f"DEBUG: Successfully inserted {etype_str} for {client['first_name']}")
-                        else:
-                            print(f"DEBUG: FAILED to insert {etype_str} for {client['first_name']}")
+                        })
 
-                    except Exception as ie:
-                        print(f"DEBUG: EXCEPTION for {client['first_name']} risk {finding['event_type']}: {ie}")
-                        logger.error(f"Workflow interpretation failed for {client['id']}: {ie}")
-                
                 count += 1
             except Exception as ce:
                 logger.error(f"Error processing client {client.get('id')}: {ce}")
 
+        # 4. Claim every finding in one idempotent insert; keys opened meanwhile by a
+        # heartbeat are skipped by the database, and only claimed events (plus any an
+        # earlier sweep claimed but never interpreted) are polished
+        claimed_rows = []
+        if pending:
+            claimed = await db_manager.ainsert_open_events(pending)
+            for failure in claimed.failed:
+                logger.error(f"Failed to insert risk event for {failure['row'].get('client_id')}: {failure['error']}")
+            logger.info(f"Claimed {len(claimed.rows)}/{len(pending)} risk events in {claimed.requests} requests.")
+            claimed_rows = claimed.rows
+        to_polish = claimed_rows + await load_stranded_events()
+
+        if to_polish:
+            # Polishing step: connecting memory to the deterministic risk, in batched requests
+            interpretations = await intelligence_workflow.interpret_risks(to_polish, market_context=market_intel, lane=Lane.SWEEP)
+            updates = []
+            for event, interpretation in zip(to_polish, interpretations):
+                updates.append({
+                    "id": event["id"],
+                    "client_id": event["client_id"],
+                    "event_type": event["event_type"],
+                    "deterministic_classification": event["deterministic_classification"],
+                    "ai_interpretation": {
+                        "headline": interpretation.get("headline"),
+                        "consequence": interpretation.get("consequence_if_ignored"),
+                        "behavioural_nuance": interpretation.get("behavioural_nuance"),
+                        "suggested_actions": [interpretation.get("headline")]
+                    },
+                })
+
+            events = {event["id"]: event for event in to_polish}
+            if updates:
+                written = await db_manager.aupsert_many("risk_events", updates)
+                for failure in written.failed:
+                    logger.error(f"Failed to store interpretation for event {failure['row'].get('id')}: {failure['error']}")
+                events.update((row["id"], row) for row in written.rows)
+            await stream_view.apply_events(list(events.values()))
+            await publish_delta(EVENT_CREATED, list(events))
+
         logger.info(f"Deterministic scan completed for {count} clients.")
-        await broadcaster.broadcast("update")
         
     except Exception as e:
         logger.error(f"Error in morning analysis: {e}")
@@ -1,9 +1,11 @@
 import asyncio
 from datetime import datetime, timedelta, timezone
+from shared.config import settings
 from shared.database import db_manager
 from shared.logging import setup_logger
+from shared.llm_executor import Lane
 from agents.interpreters import PreMeetingBriefAgent
-from api.services.broadcaster import broadcaster
+from api.services.deltas import publish_delta, BRIEF_READY
 
 logger = setup_logger("proactor")
 brief_agent = PreMeetingBriefAgent()
@@ -25,7 +27,7 @@ async def run_proactive_briefing():
         # For now, let's look for any meeting scheduled today.
         
         # 1. Fetch all clients
-        clients = db_manager.get_all("clients")
+        clients = await db_manager.aget_all("clients")
         
         # 2. To simulate "1 hour before", we'll check for any client 
         # who has a meeting record in our 'meeting_briefs' table 
@@ -40,42 +42,59 @@ async def run_proactive_briefing():
         #     .execute()
         
         # DEMO LOGIC: 
-        # Iterate over clients and generate a proactive brief for the first one that doesn't have one today.
+        # Generate a proactive brief for every client that doesn't have one today.
         
-        clients_resp = db_manager.client.table("clients").select("*").execute()
+        clients_resp = await db_manager.aexecute(db_manager.client.table("clients").select("*"))
         
-        for client in (clients_resp.data or []):
-            client_id = client["id"]
-            client_name = f"{client.get('first_name', '')} {client.get('last_name', '')}".strip()
-            
-            # Check if we already have a brief generated today
-            today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
-            existing = db_manager.client.table("meeting_briefs")\
-                .select("*").eq("client_id", client_id).gte("created_at", today_start).execute()
-            
-            if not existing.data:
-                logger.info(f"Proactively generating brief for {client_name}")
-                brief = await brief_agent.generate_brief(client_id, client_name)
-                
-                # Only save if it actually succeeded (avoid saving max iteration errors)
-                if brief and "error" not in brief:
-                    db_manager.insert("meeting_briefs", {
-                        "client_id": client_id,
-                        "meeting_timestamp": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
-                        "brief_json": brief
-                    })
-                    logger.info(f"Proactive brief ready for {client_name}")
-                    
-                    # Trigger SSE push
-                    await broadcaster.broadcast("update")
-                else:
-                    logger.error(f"Failed to generate brief for {client_name}: {brief.get('error', 'Unknown Error')}")
-                
-                # Only do one client per cycle to protect rate limits!
-                break
+        # Clients that already have a brief generated today, in one query
+        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        briefed = await db_manager.aexecute(
+            db_manager.client.table("meeting_briefs").select("client_id").gte("created_at", today_start)
+        )
+        briefed_ids = {row["client_id"] for row in (briefed.data or [])}
+        pending = [client for client in (clients_resp.data or []) if client["id"] not in briefed_ids]
+        # A brief is several LLM calls; capped so a run finishes well inside its 15-minute
+        # interval (and the cron timeout). Clients briefed now drop out of the next run's list
+        batch = pending[:max(0, settings.proactor_max_per_cycle)]
+        if len(pending) > len(batch):
+            logger.info(f"Briefing {len(batch)} of {len(pending)} pending clients this cycle")
+        
+        # Briefs run in the lowest-priority lane, behind chat and sweep traffic. The executor
+        # only gates the model calls, so the fan-out is bounded too: each brief's DB reads,
+        # tool calls and embedding lookups would otherwise hit the whole book at once
+        limit = asyncio.Semaphore(max(1, settings.proactor_concurrency))
+
+        async def bounded(client: dict):
+            async with limit:
+                await _brief_client(client)
+
+        await asyncio.gather(*(bounded(client) for client in batch))
                 
     except Exception as e:
         logger.error(f"Error in meeting proactor: {e}")
 
+async def _brief_client(client: dict):
+    client_id = client["id"]
+    client_name = f"{client.get('first_name', '')} {client.get('last_name', '')}".strip()
+    try:
+        logger.info(f"Proactively generating brief for {client_name}")
+        brief = await brief_agent.generate_brief(client_id, client_name, lane=Lane.PROACTOR)
+        
+        # Only save if it actually succeeded (avoid saving max iteration errors)
+        if brief and "error" not in brief:
+            await db_manager.ainsert("meeting_briefs", {
+                "client_id": client_id,
+                "meeting_timestamp": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+                "brief_json": brief
+            })
+            logger.info(f"Proactive brief ready for {client_name}")
+            
+            # Trigger SSE push
+            await publish_delta(BRIEF_READY, client_id=client_id)
+        else:
+            logger.error(f"Failed to generate brief for {client_name}: {(brief or {}).get('error', 'Unknown Error')}")
+    except Exception as e:
+        logger.error(f"Error generating proactive brief for {client_name}: {e}")
+
 if __name__ == "__main__":
     asyncio.run(run_proactive_briefing())
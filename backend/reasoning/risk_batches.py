@@ -0,0 +1,101 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from shared.models import RiskInterpretation
+from shared.structured_output import extract_json_object
+from shared.logging import setup_logger
+
+logger = setup_logger("risk_batches")
+
+BATCH_RISK_SYSTEM_PROMPT = """
+You are Atlas, a Senior Financial Advisor Brain. For EACH detected risk below, generate a punchy, personalized headline.
+
+Inputs: the current UK market context (shared by all findings), then a list of findings, each
+with a key, the deterministic risk finding and that client's behavioural memory.
+
+Goal: Articulate the strategic consequence of every finding. Be opinionated.
+
+Output MUST be a valid JSON object with one entry per finding, using the finding's key:
+{
+  "interpretations": [
+    {
+      "key": "string (the finding key, e.g. r0)",
+      "headline": "string (Personalized high-signal headline)",
+      "consequence_if_ignored": "string",
+      "behavioural_nuance": "string",
+      "proactive_thought": "string (Opinionated Situation-Belief-Action prose)",
+      "suggested_action_type": "exactly 'draft_email' or 'dismiss'"
+    }
+  ]
+}
+"""
+
+def parse_batch(content: str, keys: Dict[str, int]) -> Dict[str, dict]:
+    """The valid interpretations in a batched answer, by finding key."""
+    items = (extract_json_object(content) or {}).get("interpretations")
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or str(item.get("key")) not in keys:
+            continue
+        try:
+            parsed[str(item["key"])] = RiskInterpretation.model_validate(item).model_dump()
+        except ValidationError:
+            pass
+    return parsed
+
+def fallback_interpretation(risk_event: dict, error: Exception) -> dict:
+    """The deterministic interpretation stored when the model could not produce one."""
+    return {
+        "headline": f"Risk detected: {risk_event.get('event_type')}",
+        "consequence_if_ignored": "Technical analysis required.",
+        "behavioural_nuance": "N/A",
+        "proactive_thought": f"The {risk_event.get('event_type')} event requires immediate attention. My analysis suggests this could impact client stability. Should we prepare a proactive update?",
+        "suggested_action_type": "dismiss",
+        "error": str(error)
+    }
+
+async def interpret_in_batches(
+    events: List[dict],
+    batch_size: int,
+    ask_batch: Callable[[Dict[str, int]], Awaitable[str]],
+    ask_single: Callable[[int], Awaitable[dict]],
+) -> Tuple[List[dict], int]:
+    """
+    One interpretation per event, in order, plus the number of requests made. Events are
+    grouped by (client_id, event_type) and sent `batch_size` per `ask_batch` call, which
+    gets {finding key: event index} and returns the raw answer. Findings missing or invalid
+    in an answer are retried in halves, down to `ask_single`. A failed request (outage,
+    exhausted 429 retries, timeout) is not split: its findings get the fallback directly.
+    """
+    results: List[Optional[dict]] = [None] * len(events)
+    requests = 0
+
+    async def run(indices: List[int]):
+        nonlocal requests
+        requests += 1
+        if len(indices) == 1:
+            results[indices[0]] = await ask_single(indices[0])
+            return
+
+        keys = {f"r{n}": i for n, i in enumerate(indices)}
+        try:
+            parsed = parse_batch(await ask_batch(keys), keys)
+        except Exception as e:
+            logger.error(f"Batched interpretation of {len(indices)} risks failed: {e}")
+            for i in indices:
+                results[i] = fallback_interpretation(events[i], e)
+            return
+
+        missing = []
+        for key, i in keys.items():
+            if key in parsed:
+                results[i] = parsed[key]
+            else:
+                missing.append(i)
+        if missing:
+            half = (len(missing) + 1) // 2
+            await asyncio.gather(*(run(part) for part in (missing[:half], missing[half:]) if part))
+
+    order = sorted(range(len(events)), key=lambda i: (str(events[i]["client_id"]), str(events[i].get("event_type"))))
+    await asyncio.gather(*(run(order[start:start + batch_size]) for start in range(0, len(order), batch_size)))
+    return results, requests
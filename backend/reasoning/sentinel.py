@@ -2,7 +2,8 @@ import asyncio
 from datetime import datetime
 from shared.database import db_manager
 from shared.logging import setup_logger
-from mcp_server.main import fetch_live_market_data, search_market_news
+from api.services.deltas import publish_delta, SNAPSHOT_CHANGED
+from mcp_server.main import fetch_live_market_data, search_market_news, market_intel_service
 
 logger = setup_logger("sentinel")
 
@@ -33,11 +34,12 @@ async def run_sentinel():
         news_headlines = [n.get("title", "") for n in news_results if not n.get("error")]
         
         # 3. Compare with previous snapshot
-        prev_resp = db_manager.client.table("market_snapshots")\
-            .select("*")\
-            .order("timestamp", desc=True)\
-            .limit(1)\
-            .execute()
+        prev_resp = await db_manager.aexecute(
+            db_manager.client.table("market_snapshots")
+            .select("*")
+            .order("timestamp", desc=True)
+            .limit(1)
+        )
         
         if prev_resp.data and ftse_100:
             prev = prev_resp.data[0]
@@ -50,8 +52,9 @@ async def run_sentinel():
                 if abs(delta) > 0.02:
                     logger.warning(f"Abnormal market movement detected: {delta*100:.2f}%")
                     logger.warning(f"Headlines: {news_headlines}")
-                    # Trigger immediate heartbeat
+                    # Trigger immediate heartbeat on fresh intel, not the pre-move snapshot
                     from reasoning.heartbeat import run_heartbeat
+                    market_intel_service.invalidate()
                     await run_heartbeat()
         
         # 4. Store new snapshot with real data
@@ -62,7 +65,8 @@ async def run_sentinel():
             "timestamp": datetime.utcnow().isoformat(),
         }
         
-        db_manager.insert("market_snapshots", snapshot_data)
+        await db_manager.ainsert("market_snapshots", snapshot_data)
+        await publish_delta(SNAPSHOT_CHANGED, ftse_100=snapshot_data["ftse_100_value"], timestamp=snapshot_data["timestamp"])
         logger.info(f"Stored market snapshot: FTSE100={ftse_100}, sectors={len(sectors)}")
         
         logger.info("Sentinel check completed")
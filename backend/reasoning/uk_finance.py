@@ -1,6 +1,13 @@
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+# Pension annual allowance taper (2024/25), shared with the vectorised BookClassifier
+PENSION_STANDARD_ALLOWANCE = 60000.0
+PENSION_THRESHOLD_INCOME = 200000.0  # below this, adjusted income is not checked
+PENSION_ADJUSTED_INCOME_LIMIT = 260000.0
+PENSION_MIN_ALLOWANCE = 10000.0
+PENSION_TAPER_RATE = 2.0  # £1 of allowance lost per £2 of income over the limit
+
 class UKFinanceLogic:
     """
     Purely deterministic UK financial logic. 
@@ -15,17 +22,12 @@ class UKFinanceLogic:
         Tapering starts at Adjusted Income > £260,000.
         Min allowance: £10,000.
         """
-        standard_allowance = 60000.0
-        threshold_income = 200000.0 # Threshold for starting to check adjusted income
-        adjusted_income_limit = 260000.0
-        min_allowance = 10000.0
-        
-        if gross_income <= adjusted_income_limit:
-            return standard_allowance
+        if gross_income <= PENSION_ADJUSTED_INCOME_LIMIT:
+            return PENSION_STANDARD_ALLOWANCE
         
-        excess = gross_income - adjusted_income_limit
-        reduction = excess / 2.0
-        final_allowance = max(min_allowance, standard_allowance - reduction)
+        excess = gross_income - PENSION_ADJUSTED_INCOME_LIMIT
+        reduction = excess / PENSION_TAPER_RATE
+        final_allowance = max(PENSION_MIN_ALLOWANCE, PENSION_STANDARD_ALLOWANCE - reduction)
         return final_allowance
 
     @staticmethod
@@ -1,14 +1,36 @@
-import json
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from shared.logging import setup_logger
 from shared.database import db_manager
 from shared.config import settings
+from shared.embeddings import generate_embedding, generate_embeddings
+from shared.llm_cache import canonical_json
+from shared.llm_executor import Lane, invoke_llm
+from shared.market_intel import MarketIntelSnapshot, market_context_text
+from shared.models import MorningReport, RiskInterpretation
+from shared.structured_output import JSON_MODE, structured_invoke
+from reasoning.risk_batches import BATCH_RISK_SYSTEM_PROMPT, parse_batch, fallback_interpretation, interpret_in_batches
 from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, HumanMessage
 
 logger = setup_logger("workflows")
 
+def _risk_text(risk_event: dict) -> str:
+    """The text a risk is embedded as for memory search."""
+    classification = risk_event.get("deterministic_classification") or {}
+    return classification.get("reason") or str(risk_event.get("event_type", ""))
+
+# Fields of a risk_events row the model sees. Row ids, timestamps and status would leak
+# internal ids into the prompt and make every prompt (and its cache key) unique.
+_RISK_PROMPT_FIELDS = ("event_type", "urgency", "deterministic_classification")
+
+def _risk_prompt(risk_event: dict) -> str:
+    """The finding as prompt text: the classifier's output only."""
+    return canonical_json({f: risk_event.get(f) for f in _RISK_PROMPT_FIELDS})
+
+# Completion budget per finding in a batched interpretation request
+_BATCH_TOKENS_PER_RISK = 350
+
 class IntelligenceWorkflow:
     """
     Deterministic workflow that assembles context and invokes the LLM directly.
@@ -20,56 +42,80 @@ class IntelligenceWorkflow:
             model=settings.groq_model,
             temperature=0,
             api_key=settings.groq_api_key,
-            max_tokens=1000
+            max_tokens=1000,
+            model_kwargs=JSON_MODE,
+            max_retries=0  # 429s are retried by the LLM executor, which paces every caller
+        )
+        self.batch_llm = ChatGroq(
+            model=settings.groq_model,
+            temperature=0,
+            api_key=settings.groq_api_key,
+            max_tokens=_BATCH_TOKENS_PER_RISK * max(2, settings.interpret_batch_size),
+            model_kwargs=JSON_MODE,
+            max_retries=0
         )
 
-    def _optimize_market_context(self, market_intel: Dict[str, Any]) -> str:
+    def _optimize_market_context(self, market_intel: Union[MarketIntelSnapshot, Dict[str, Any], None]) -> str:
         """
         Optimizes context by extracting only high-signal headlines and indicators.
-        Reduces token usage and noise.
+        A MarketIntelSnapshot carries the text already rendered, so a sweep renders it once.
         """
-        if not market_intel:
-            return "No market context available."
-            
-        indices = market_intel.get("indices", {})
-        sectors = market_intel.get("sectors", {})
-        news = market_intel.get("news_headlines", [])
-        geo = market_intel.get("geopolitical_context", [])
-        
-        context_str = "Latest Market Intelligence:\n"
-        if indices:
-            context_str += f"- Indices: FTSE 100 ({indices.get('ftse_100')}), FTSE 250 ({indices.get('ftse_250')})\n"
-        
-        if sectors:
-            perf_str = ", ".join([f"{s}: {v*100:+.1f}%" for s, v in sectors.items()])
-            context_str += f"- Sector Performance: {perf_str}\n"
-            
-        if news:
-            context_str += "- Key Headlines: " + " | ".join(news[:3]) + "\n"
-            
-        if geo:
-            context_str += "- Geopolitical Context: " + " | ".join(geo[:2]) + "\n"
-            
-        return context_str
-
-    async def interpret_risk(self, client_id: str, risk_event: dict, market_context: dict = None) -> dict:
+        return market_context_text(market_intel)
+
+    async def fetch_memories_many(self, queries: List[Tuple[str, dict]], match_count: int = 3) -> Optional[List[List[str]]]:
+        """
+        Memory lookup for many (client_id, risk_event) pairs: one batched embedding call
+        for the risk texts, then one match_memory_many round trip. Returns one list of
+        memories per query, or None if the lookup failed.
+        """
+        if not queries:
+            return []
+        try:
+            texts = [_risk_text(risk_event) for _, risk_event in queries]
+            embeddings = await asyncio.to_thread(generate_embeddings, texts)
+            response = await db_manager.aexecute(db_manager.client.rpc(
+                "match_memory_many",
+                {
+                    "queries": [{"client_id": cid, "embedding": emb} for (cid, _), emb in zip(queries, embeddings)],
+                    "match_threshold": 0.4,
+                    "match_count": match_count,
+                    "ef_search": settings.memory_ef_search
+                }
+            ))
+        except Exception as e:
+            logger.error(f"Batched memory lookup failed for {len(queries)} queries: {e}")
+            return None
+        memories: List[List[str]] = [[] for _ in queries]
+        for row in response.data or []:
+            memories[row["query_index"]].append(row["content"])
+        return memories
+
+    async def interpret_risk(self, client_id: str, risk_event: dict, market_context: Union[MarketIntelSnapshot, dict] = None, memories: Optional[List[str]] = None, lane: Lane = Lane.SWEEP) -> dict:
         """
         Workflow for Risk Interpretation:
-        1. Fetch client memory.
+        1. Fetch client memory (skipped when `memories` were prefetched with fetch_memories_many).
         2. Optimize market context.
         3. Single LLM call for a personalized headline.
         """
         # 1. Fetch relevant memory (Direct DB call, no agent search)
-        memories_resp = db_manager.client.rpc(
-            "match_memory",
-            {
-                "query_embedding": [0.0]*384, # Dummy for now, ideally we use the risk text
-                "match_threshold": 0.4,
-                "match_count": 3,
-                "client_id_filter": client_id
-            }
-        ).execute()
-        memories = [m["content"] for m in memories_resp.data] if memories_resp.data else ["No prior relevant behavioral history."]
+        if memories is None:
+            try:
+                query_embedding = await asyncio.to_thread(generate_embedding, _risk_text(risk_event))
+                memories_resp = await db_manager.aexecute(db_manager.client.rpc(
+                    "match_memory",
+                    {
+                        "query_embedding": query_embedding,
+                        "match_threshold": 0.4,
+                        "match_count": 3,
+                        "client_id_filter": client_id,
+                        "ef_search": settings.memory_ef_search
+                    }
+                ))
+                memories = [m["content"] for m in memories_resp.data] if memories_resp.data else []
+            except Exception as e:
+                logger.error(f"Memory lookup failed for {client_id}: {e}")
+                memories = []
+        memories = memories or ["No prior relevant behavioral history."]
         
         # 2. Optimize market context
         optimized_market = self._optimize_market_context(market_context)
@@ -95,43 +141,61 @@ class IntelligenceWorkflow:
         }
         """
         
+        # Shared market context first, so consecutive prompts in a sweep share a prefix
         human_input = f"""
-        Risk Event: {json.dumps(risk_event)}
-        Client Memory: {", ".join(memories)}
         {optimized_market}
+        Risk Event: {_risk_prompt(risk_event)}
+        Client Memory: {", ".join(memories)}
         """
         
         try:
-            response = await self.llm.ainvoke([
+            interpretation = await structured_invoke(self.llm, [
                 SystemMessage(content=system_prompt),
                 HumanMessage(content=human_input)
-            ])
-            
-            content = response.content
-            # Use regex to find the JSON block in case there's conversational filler
-            import re
-            json_match = re.search(r'(\{.*\})', content, re.DOTALL)
-            if json_match:
-                clean_content = json_match.group(1)
-            else:
-                clean_content = content.strip().strip("```json").strip("```")
-            
-            if not clean_content:
-                raise ValueError("Empty response content after cleaning")
-                
-            return json.loads(clean_content)
+            ], RiskInterpretation, lane=lane)
+            return interpretation.model_dump()
         except Exception as e:
-            logger.error(f"Workflow interpretation failed: {e}. Raw content: {response.content if 'response' in locals() else 'N/A'}")
-            return {
-                "headline": f"Risk detected: {risk_event.get('event_type')}",
-                "consequence_if_ignored": "Technical analysis required.",
-                "behavioural_nuance": "N/A",
-                "proactive_thought": f"The {risk_event.get('event_type')} event requires immediate attention. My analysis suggests this could impact client stability. Should we prepare a proactive update?",
-                "suggested_action_type": "dismiss",
-                "error": str(e)
-            }
-
-    async def generate_morning_report(self, clients: List[Dict[str, Any]], market_context: Dict[str, Any]) -> dict:
+            logger.error(f"Workflow interpretation failed: {e}")
+            return fallback_interpretation(risk_event, e)
+
+    async def interpret_risks(self, events: List[dict], market_context: Union[MarketIntelSnapshot, dict] = None, lane: Lane = Lane.SWEEP, batch_size: Optional[int] = None) -> List[dict]:
+        """
+        Batch workflow for Risk Interpretation; returns one interpretation per event, in order.
+        1. One batched memory lookup for all events.
+        2. Findings grouped by client and event type, `batch_size` per LLM request, with
+           the system prompt and market context sent once per request.
+        3. Findings missing or invalid in a batched answer are retried in halves, down to
+           single interpret_risk calls; a failed request falls back without splitting.
+        """
+        if not events:
+            return []
+        batch_size = max(1, batch_size or settings.interpret_batch_size)
+        memories = await self.fetch_memories_many([(e["client_id"], e) for e in events])
+        optimized_market = self._optimize_market_context(market_context)
+
+        def event_memories(i: int) -> Optional[List[str]]:
+            return memories[i] if memories is not None else None
+
+        async def ask_batch(keys: Dict[str, int]) -> str:
+            findings = "\n".join(
+                f"[{key}] Risk Event: {_risk_prompt(events[i])}\n"
+                f"Client Memory: {', '.join(event_memories(i) or ['No prior relevant behavioral history.'])}"
+                for key, i in keys.items()
+            )
+            human_input = f"{optimized_market}\nFindings:\n{findings}"
+            return await invoke_llm(self.batch_llm, [
+                SystemMessage(content=BATCH_RISK_SYSTEM_PROMPT),
+                HumanMessage(content=human_input)
+            ], lane=lane, validate=lambda c: len(parse_batch(c, keys)) == len(keys))
+
+        async def ask_single(i: int) -> dict:
+            return await self.interpret_risk(events[i]["client_id"], events[i], market_context, memories=event_memories(i), lane=lane)
+
+        results, requests = await interpret_in_batches(events, batch_size, ask_batch, ask_single)
+        logger.info(f"Interpreted {len(events)} risks in {requests} LLM requests (batch size {batch_size})")
+        return results
+
+    async def generate_morning_report(self, clients: List[Dict[str, Any]], market_context: Union[MarketIntelSnapshot, Dict[str, Any]]) -> dict:
         """
         Workflow for Morning Intelligence:
         1. Optimize global market context.
@@ -160,18 +224,11 @@ class IntelligenceWorkflow:
         """
         
         try:
-            response = await self.llm.ainvoke([
+            report = await structured_invoke(self.llm, [
                 SystemMessage(content=system_prompt),
                 HumanMessage(content=human_input)
-            ])
-            content = response.content
-            import re
-            json_match = re.search(r'(\{.*\})', content, re.DOTALL)
-            if json_match:
-                clean_content = json_match.group(1)
-            else:
-                clean_content = content.strip().strip("```json").strip("```")
-            return json.loads(clean_content)
+            ], MorningReport, lane=Lane.SWEEP)
+            return report.model_dump()
         except Exception as e:
             logger.error(f"Workflow morning report failed: {e}")
             return {"error": str(e)}
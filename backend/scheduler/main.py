@@ -4,11 +4,20 @@ from reasoning.heartbeat import run_heartbeat
 from reasoning.sentinel import run_sentinel
 from reasoning.morning_brief import run_morning_analysis
 from reasoning.proactor import run_proactive_briefing
+from api.services.broadcaster import broadcaster
+from api.services.transports import create_transport
+from shared.config import settings
 from shared.logging import setup_logger
 
 logger = setup_logger("scheduler")
 
 async def main():
+    # Publish-only: pushes from sweeps reach browsers through the API workers' listeners
+    broadcaster.use_transport(create_transport(settings.broadcast_transport, settings.database_url))
+    await broadcaster.start(listen=False)
+    if settings.broadcast_transport == "local":
+        logger.warning("broadcast_transport=local: scheduler pushes will not reach API subscribers")
+    
     scheduler = AsyncIOScheduler()
     
     # 1. Market Sentinel: Every 5 minutes
@@ -31,6 +40,8 @@ async def main():
             await asyncio.sleep(1)
     except (KeyboardInterrupt, SystemExit):
         logger.info("Stopping scheduler...")
+    finally:
+        await broadcaster.stop()
 
 if __name__ == "__main__":
     try:
@@ -11,6 +11,50 @@ class Settings(BaseSettings):
     groq_api_key: str
     groq_model: str = "llama-3.1-8b-instant"
     
+    # Database
+    db_max_workers: int = 16
+    database_url: Optional[str] = None  # direct Postgres connection, used for LISTEN/NOTIFY
+    
+    # Live stream fan-out: "local" (single process) or "postgres" (LISTEN/NOTIFY across workers)
+    broadcast_transport: str = "local"
+    
+    # Risk interpretation: findings packed into one LLM request by sweeps (1 = one request each)
+    interpret_batch_size: int = 8
+    
+    # Memory search: HNSW candidate list size (higher = better recall, slower)
+    memory_ef_search: int = 40
+    embedding_cache_size: int = 4096
+    embedding_cache_ttl_seconds: int = 86400
+    
+    # Embeddings: "remote" (HuggingFace inference endpoint) or "onnx" (local CPU, needs onnxruntime)
+    embedding_backend: str = "remote"
+    embedding_onnx_file: str = "onnx/model.onnx"  # "onnx/model_quint8_avx2.onnx" for the int8 model
+    embedding_model_dir: Optional[str] = None  # local copy of all-MiniLM-L6-v2; fetched from the Hub otherwise
+    embedding_batch_size: int = 32
+    
+    # LLM response cache for temperature-0 calls (SQLite; defaults to the temp dir)
+    llm_cache_enabled: bool = True
+    llm_cache_path: Optional[str] = None
+    llm_cache_ttl_seconds: int = 604800
+    llm_cache_max_entries: int = 10000
+    
+    # LLM execution, shared by every call in a process. Defaults are the Groq free-tier
+    # limits for llama-3.1-8b-instant; split them between the API and scheduler processes
+    llm_requests_per_minute: int = 30
+    llm_tokens_per_minute: int = 6000
+    llm_max_concurrency: int = 8
+    llm_max_retries: int = 4
+    proactor_concurrency: int = 2  # meeting briefs prepared at once (DB, tools and embeddings included)
+    proactor_max_per_cycle: int = 4  # briefs per 15-minute run; the rest wait for later runs
+    
+    # Market data: "yahoo" (live yahooquery + DuckDuckGo) or "replay" (recorded file, offline)
+    market_data_provider: str = "yahoo"
+    market_data_replay_path: Optional[str] = None  # JSON lines or Parquet recording
+    market_data_replay_latency_ms: float = 0.0  # simulated network latency per replayed call
+    price_cache_ttl_seconds: int = 120
+    market_data_timeout_seconds: float = 5.0  # per quote request; late symbols are left out
+    market_intel_ttl_seconds: int = 300  # shared intel snapshot (indices, sectors, headlines)
+    
     # App
     debug: bool = False
     cors_origins: str 
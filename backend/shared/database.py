@@ -1,11 +1,36 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable
 from supabase import create_client, Client
 from shared.config import settings
 from shared.logging import setup_logger
 
 logger = setup_logger("db")
 
+@dataclass
+class BulkResult:
+    """Outcome of a chunked bulk write: rows the server returned, plus the rows that failed and why."""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    failed: List[Dict[str, Any]] = field(default_factory=list)  # [{"row": {...}, "error": "..."}]
+    requests: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 class SupabaseManager:
+    """
+    Thin wrapper over the synchronous supabase-py client.
+    Every method has an awaitable `a*` twin that runs the blocking PostgREST call on a
+    bounded thread pool, so async routes and jobs never stall the event loop.
+    """
     def __init__(self):
         url = settings.supabase_url
         key = settings.supabase_service_role_key
@@ -17,15 +42,84 @@ class SupabaseManager:
         except Exception as e:
             logger.error(f"Failed to connect to Supabase: {e}")
             raise
+        self._executor = ThreadPoolExecutor(max_workers=settings.db_max_workers, thread_name_prefix="supabase")
+
+    # ─── ASYNC OFFLOAD ───────────────────────────────────────
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs a blocking callable on the bounded DB thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def aexecute(self, query) -> Any:
+        """Awaitable `.execute()` for any supabase query or RPC builder."""
+        return await self.run(query.execute)
+
+    async def aget_all(self, table: str, columns: str = "*") -> List[Dict[str, Any]]:
+        return await self.run(self.get_all, table, columns)
+
+    async def aselect_all(self, table: str, columns: str = "*", filters: Optional[Dict[str, Any]] = None, page_size: int = 1000) -> List[Dict[str, Any]]:
+        return await self.run(self.select_all, table, columns, filters, page_size)
+
+    async def aget_by_id(self, table: str, id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+        return await self.run(self.get_by_id, table, id, columns)
+
+    async def ainsert(self, table: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.run(self.insert, table, data)
+
+    async def aupdate(self, table: str, id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self.run(self.update, table, id, data)
+
+    async def adelete(self, table: str, id: str) -> None:
+        return await self.run(self.delete, table, id)
+
+    async def aget_by_ids(self, table: str, ids: List[str], columns: str = "*", chunk_size: int = 200) -> Dict[str, Dict[str, Any]]:
+        return await self.run(self.get_by_ids, table, ids, columns, chunk_size)
+
+    async def ainsert_many(self, table: str, rows: List[Dict[str, Any]], chunk_size: int = 500) -> BulkResult:
+        return await self.run(self.insert_many, table, rows, chunk_size)
+
+    async def aupsert_many(self, table: str, rows: List[Dict[str, Any]], on_conflict: str = "id", ignore_duplicates: bool = False, chunk_size: int = 500) -> BulkResult:
+        return await self.run(self.upsert_many, table, rows, on_conflict, ignore_duplicates, chunk_size)
+
+    async def aupdate_many(self, table: str, rows: List[Dict[str, Any]], key: str = "id", chunk_size: int = 500) -> BulkResult:
+        return await self.run(self.update_many, table, rows, key, chunk_size)
+
+    async def ainsert_open_events(self, rows: List[Dict[str, Any]], chunk_size: int = 500) -> BulkResult:
+        return await self.run(self.insert_open_events, rows, chunk_size)
+
+    # ─── SYNC API ────────────────────────────────────────────
 
     def get_all(self, table: str, columns: str = "*") -> List[Dict[str, Any]]:
+        """Every row of `table` (paged); [] if the read fails. Use select_all to have failures raise."""
         try:
-            response = self.client.table(table).select(columns).execute()
-            return response.data
-        except Exception as e:
-            logger.error(f"get_all failed for table {table}: {e}")
+            return self.select_all(table, columns)
+        except Exception:
             return []
 
+    def select_all(self, table: str, columns: str = "*", filters: Optional[Dict[str, Any]] = None, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Fetches every matching row in pages of `page_size`.
+        PostgREST caps a single response at max-rows, so large books must be paged.
+        Raises if any page fails: sweeps must not mistake a partial read for an empty table.
+        """
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        try:
+            while True:
+                query = self.client.table(table).select(columns)
+                for column, value in (filters or {}).items():
+                    query = query.eq(column, value)
+                response = query.order("id").range(start, start + page_size - 1).execute()
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < page_size:
+                    return rows
+                start += page_size
+        except Exception as e:
+            logger.error(f"select_all failed for table {table} after {len(rows)} rows: {e}")
+            raise
+
     def get_by_id(self, table: str, id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
         try:
             response = self.client.table(table).select(columns).eq("id", id).execute()
@@ -56,5 +150,94 @@ class SupabaseManager:
         except Exception as e:
             logger.error(f"delete failed for table {table}, id {id}: {e}")
 
+    # ─── BULK API ────────────────────────────────────────────
+
+    def get_by_ids(self, table: str, ids: List[str], columns: str = "*", chunk_size: int = 200) -> Dict[str, Dict[str, Any]]:
+        """Fetches many rows by id with one `in.(...)` request per chunk. Returns { id: row }."""
+        found = {}
+        for chunk in _chunks(list(dict.fromkeys(ids)), chunk_size):
+            try:
+                response = self.client.table(table).select(columns).in_("id", chunk).execute()
+                for row in response.data or []:
+                    found[row["id"]] = row
+            except Exception as e:
+                logger.error(f"get_by_ids failed for table {table} ({len(chunk)} ids): {e}")
+        return found
+
+    def insert_many(self, table: str, rows: List[Dict[str, Any]], chunk_size: int = 500) -> BulkResult:
+        """Inserts rows with one request per chunk; a failing chunk is retried row by row to isolate bad rows."""
+        return self._write_chunks(table, rows, chunk_size, lambda q, chunk: q.insert(chunk), "insert_many")
+
+    def upsert_many(self, table: str, rows: List[Dict[str, Any]], on_conflict: str = "id", ignore_duplicates: bool = False, chunk_size: int = 500) -> BulkResult:
+        """
+        Upserts rows with one request per chunk, resolving conflicts on `on_conflict`.
+        With ignore_duplicates=True conflicting rows are skipped and not returned.
+        """
+        return self._write_chunks(
+            table, rows, chunk_size,
+            lambda q, chunk: q.upsert(chunk, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates),
+            "upsert_many",
+        )
+
+    def insert_open_events(self, rows: List[Dict[str, Any]], chunk_size: int = 500) -> BulkResult:
+        """
+        Inserts open risk events via the `insert_open_risk_events` RPC (ON CONFLICT DO NOTHING
+        on the open (client_id, event_type) index). Keys that already have an open event, or
+        appear earlier in the batch, are skipped atomically, so `rows` holds only new events.
+        """
+        return self._write_chunks(
+            "risk_events", rows, chunk_size,
+            lambda _, chunk: self.client.rpc("insert_open_risk_events", {"events": chunk if isinstance(chunk, list) else [chunk]}),
+            "insert_open_events",
+        )
+
+    def update_many(self, table: str, rows: List[Dict[str, Any]], key: str = "id", chunk_size: int = 500) -> BulkResult:
+        """
+        Applies partial updates to many rows. Each row carries its `key` plus the columns to set.
+        Rows sharing an identical payload are sent as a single `update ... where key in (...)`,
+        so uniform refreshes (e.g. most clients scoring 0 vulnerability) collapse to a few requests.
+        """
+        result = BulkResult()
+        groups: Dict[str, List[Any]] = {}
+        payloads: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            payload = {k: v for k, v in row.items() if k != key}
+            signature = json.dumps(payload, sort_keys=True, default=str)
+            payloads[signature] = payload
+            groups.setdefault(signature, []).append(row[key])
+
+        for signature, keys in groups.items():
+            payload = payloads[signature]
+            for chunk in _chunks(keys, chunk_size):
+                result.requests += 1
+                try:
+                    response = self.client.table(table).update(payload).in_(key, chunk).execute()
+                    result.rows.extend(response.data or [])
+                except Exception as e:
+                    logger.error(f"update_many failed for table {table} ({len(chunk)} rows): {e}")
+                    result.failed.extend({"row": {key: k, **payload}, "error": str(e)} for k in chunk)
+        return result
+
+    def _write_chunks(self, table: str, rows: List[Dict[str, Any]], chunk_size: int, build: Callable, op: str) -> BulkResult:
+        result = BulkResult()
+        for chunk in _chunks(rows, chunk_size):
+            result.requests += 1
+            try:
+                response = build(self.client.table(table), chunk).execute()
+                result.rows.extend(response.data or [])
+                continue
+            except Exception as e:
+                logger.warning(f"{op} chunk of {len(chunk)} failed for table {table}, retrying row by row: {e}")
+            for row in chunk:
+                result.requests += 1
+                try:
+                    response = build(self.client.table(table), row).execute()
+                    result.rows.extend(response.data or [])
+                except Exception as e:
+                    result.failed.append({"row": row, "error": str(e)})
+        if result.failed:
+            logger.error(f"{op} for table {table}: {len(result.failed)}/{len(rows)} rows failed")
+        return result
+
 # Global instance
 db_manager = SupabaseManager()
@@ -1,20 +1,209 @@
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from shared.logging import setup_logger
+
+try:
+    from langchain_huggingface import HuggingFaceEndpointEmbeddings
+except ImportError:
+    HuggingFaceEndpointEmbeddings = None
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    ort = None
+    Tokenizer = None
+
+logger = setup_logger("embeddings")
+
+MODEL_REPO = "sentence-transformers/all-MiniLM-L6-v2"
+# all-MiniLM-L6-v2 was trained on 256 word pieces; longer inputs are truncated like sentence-transformers does
+MAX_TOKENS = 256
 
 _embeddings_client = None
 
-def get_embeddings_client():
-    """Lazy-load the embeddings client (API-based) to avoid initializing on every import."""
-    global _embeddings_client
-    if _embeddings_client is None:
+class OnnxEmbeddings:
+    """
+    all-MiniLM-L6-v2 on CPU through ONNX Runtime, with the same embed_query /
+    embed_documents interface as the LangChain clients. Reproduces the
+    sentence-transformers pipeline (mean pooling over the attention mask, then L2
+    normalisation) and runs texts in batches of `batch_size`, sorted by length so
+    each batch pads as little as possible.
+
+    `model_file` picks the graph inside the model repo, e.g. "onnx/model.onnx" (fp32) or
+    "onnx/model_quint8_avx2.onnx" (int8). `model_dir` points at a local copy of the repo;
+    without it the two files are fetched from the Hugging Face Hub once and cached.
+    """
+
+    def __init__(self, model_file: str = "onnx/model.onnx", model_dir: Optional[str] = None, batch_size: int = 32, threads: int = 0):
+        if ort is None or Tokenizer is None:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx needs the onnxruntime and tokenizers packages")
+        model_path, tokenizer_path = _model_files(model_file, model_dir)
+        self.batch_size = max(1, batch_size)
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=MAX_TOKENS)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX embedding model {model_path}")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                vectors[i] = vector
+        return vectors
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, feeds)[0]
+        return _mean_pool_normalise(token_embeddings, attention_mask).tolist()
+
+def _mean_pool_normalise(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    mask = attention_mask[..., None].astype(np.float32)
+    pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return pooled / np.clip(norms, 1e-12, None)
+
+def _model_files(model_file: str, model_dir: Optional[str]) -> Tuple[str, str]:
+    if model_dir:
+        return os.path.join(model_dir, model_file), os.path.join(model_dir, "tokenizer.json")
+    from huggingface_hub import hf_hub_download
+    return hf_hub_download(MODEL_REPO, model_file), hf_hub_download(MODEL_REPO, "tokenizer.json")
+
+def create_embeddings_client(backend: str):
+    """Builds the embedding backend named by EMBEDDING_BACKEND: "remote" or "onnx"."""
+    from shared.config import settings
+    if backend == "remote":
+        if HuggingFaceEndpointEmbeddings is None:
+            raise RuntimeError("EMBEDDING_BACKEND=remote needs the langchain-huggingface package")
         # Using HuggingFace Inference API for embeddings (requires HUGGINGFACEHUB_API_TOKEN)
         # This keeps the package size small by avoiding local model downloads/torch.
-        _embeddings_client = HuggingFaceEndpointEmbeddings(
-            model="sentence-transformers/all-MiniLM-L6-v2",
+        return HuggingFaceEndpointEmbeddings(
+            model=MODEL_REPO,
             task="feature-extraction",
         )
+    if backend == "onnx":
+        return OnnxEmbeddings(
+            model_file=settings.embedding_onnx_file,
+            model_dir=settings.embedding_model_dir,
+            batch_size=settings.embedding_batch_size,
+        )
+    raise ValueError(f"Unknown embedding backend: {backend!r} (expected 'remote' or 'onnx')")
+
+def get_embeddings_client():
+    """Lazy-load the configured embeddings client to avoid initializing on every import."""
+    global _embeddings_client
+    if _embeddings_client is None:
+        from shared.config import settings
+        _embeddings_client = create_embeddings_client(settings.embedding_backend)
     return _embeddings_client
 
+def _embed_documents(texts: List[str]) -> List[List[float]]:
+    return get_embeddings_client().embed_documents(texts)
+
+class EmbeddingCache:
+    """
+    Process-wide LRU cache of text embeddings, keyed by a hash of the text.
+    Risk reasons repeat across clients ("Mandate Drift: ..."), so a sweep embeds each
+    distinct text once, and only the misses of a batch go to the inference endpoint,
+    in a single request.
+    """
+
+    def __init__(self, embed_documents: Callable[[List[str]], List[List[float]]], max_entries: int = 4096, ttl_seconds: float = 86400.0):
+        self.embed_documents = embed_documents
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectors: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()  # key -> (stored_at, vector)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for `texts` in input order; uncached distinct texts are embedded in one request."""
+        keys = [self.key(t) for t in texts]
+        found: Dict[str, List[float]] = {}
+        now = time.monotonic()
+        with self._lock:
+            for k in keys:
+                entry = self._vectors.get(k)
+                if entry and now - entry[0] < self.ttl_seconds:
+                    self._vectors.move_to_end(k)
+                    found[k] = entry[1]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        missing = {k: t.strip() for k, t in zip(keys, texts) if k not in found}
+        if missing:
+            self.requests += 1
+            vectors = self.embed_documents(list(missing.values()))
+            stored_at = time.monotonic()
+            with self._lock:
+                for k, vector in zip(missing, vectors):
+                    found[k] = vector
+                    self._vectors[k] = (stored_at, vector)
+                    self._vectors.move_to_end(k)
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+        return [found[k] for k in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "requests": self.requests,
+            "cached_texts": len(self._vectors),
+        }
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Lazy-load the process-wide cache from settings."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        from shared.config import settings
+        _embedding_cache = EmbeddingCache(
+            _embed_documents,
+            max_entries=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl_seconds,
+        )
+    return _embedding_cache
+
 def generate_embedding(text: str) -> list[float]:
-    """Generate a 384-dimensional vector embedding for the given text via API."""
-    client = get_embeddings_client()
-    return client.embed_query(text)
+    """Generate a 384-dimensional vector embedding for the given text via API (cached)."""
+    return get_embedding_cache().embed(text)
+
+def generate_embeddings(texts: list[str]) -> list[list[float]]:
+    """Generate embeddings for many texts in input order, one API request for the cache misses."""
+    if not texts:
+        return []
+    return get_embedding_cache().embed_many(texts)
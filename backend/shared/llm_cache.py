@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from shared.logging import setup_logger
+
+logger = setup_logger("llm_cache")
+
+# Prompts are indented triple-quoted strings; layout differences must not change the key
+_WHITESPACE = re.compile(r"\s+")
+
+SCHEMA = """
+create table if not exists llm_cache (
+  key text primary key,
+  model text not null,
+  response text not null,
+  tokens integer not null default 0,
+  latency_ms real not null default 0,
+  created_at real not null,
+  last_hit_at real not null
+);
+create index if not exists llm_cache_last_hit_at on llm_cache (last_hit_at);
+"""
+
+# The API, scheduler and MCP processes share one cache file; writers wait this long for the lock
+_BUSY_TIMEOUT_SECONDS = 5.0
+# Hit times are only needed for eviction order, so they are written in batches
+_HIT_FLUSH_SIZE = 100
+
+def _normalise(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+def _message_parts(message: Any) -> Dict[str, str]:
+    role = getattr(message, "type", None) or (message.get("role") if isinstance(message, dict) else "")
+    content = getattr(message, "content", None)
+    if content is None and isinstance(message, dict):
+        content = message.get("content", "")
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, default=str)
+    return {"role": str(role), "content": _normalise(content)}
+
+def _llm_params(llm: Any) -> Dict[str, Any]:
+    """The generation settings that change the output, for the cache key."""
+    return {
+        "model": getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__,
+        "temperature": getattr(llm, "temperature", None),
+        "max_tokens": getattr(llm, "max_tokens", None),
+        "model_kwargs": getattr(llm, "model_kwargs", None) or {},  # e.g. JSON mode
+    }
+
+def canonical_json(value: Any) -> str:
+    """Stable JSON for prompt inputs: sorted keys, so equal inputs give equal prompts."""
+    return json.dumps(value, sort_keys=True, default=str)
+
+class LLMCache:
+    """
+    Persistent cache of deterministic (temperature 0) LLM responses in SQLite, keyed on
+    the model settings plus the whitespace-normalised messages. Entries expire after
+    `ttl_seconds`; beyond `max_entries` the least recently hit ones are evicted.
+    Non-zero temperature calls always go to the model.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 86400, max_entries: int = 10_000, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        # WAL lets readers in other processes carry on while one of them writes
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending_hits: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+        self.latency_saved_ms = 0.0
+
+    @staticmethod
+    def key(params: Dict[str, Any], messages: List[Any]) -> str:
+        payload = canonical_json({"params": params, "messages": [_message_parts(m) for m in messages]})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "select response, tokens, latency_ms, created_at from llm_cache where key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, tokens, latency_ms, created_at = row
+            if now - created_at >= self.ttl_seconds:
+                self._conn.execute("delete from llm_cache where key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.tokens_saved += tokens
+            self.latency_saved_ms += latency_ms
+            self._pending_hits[key] = now
+            if len(self._pending_hits) >= _HIT_FLUSH_SIZE:
+                self._flush_hits()
+            return response
+
+    def _flush_hits(self):
+        """Best-effort write of batched hit times; on a locked database they are dropped."""
+        hits, self._pending_hits = self._pending_hits, {}
+        if not hits:
+            return
+        try:
+            self._conn.executemany("update llm_cache set last_hit_at = ? where key = ?", [(t, k) for k, t in hits.items()])
+            self._conn.commit()
+        except sqlite3.Error as e:
+            self._conn.rollback()
+            logger.warning(f"Skipped recording {len(hits)} LLM cache hit times: {e}")
+
+    def put(self, key: str, model: str, response: str, tokens: int = 0, latency_ms: float = 0.0):
+        now = time.time()
+        with self._lock:
+            # Pending hit times first, so eviction sees the real recency order
+            self._flush_hits()
+            self._conn.execute(
+                "insert or replace into llm_cache (key, model, response, tokens, latency_ms, created_at, last_hit_at) "
+                "values (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, tokens, latency_ms, now, now),
+            )
+            self.stores += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        expired = self._conn.execute("delete from llm_cache where created_at <= ?", (now - self.ttl_seconds,)).rowcount
+        count = self._conn.execute("select count(*) from llm_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "delete from llm_cache where key in (select key from llm_cache order by last_hit_at asc limit ?)",
+                (overflow,),
+            )
+        self.evictions += expired + max(0, overflow)
+
+    async def ainvoke(
+        self,
+        llm: Any,
+        messages: List[Any],
+        validate: Optional[Callable[[str], bool]] = None,
+        invoke: Optional[Callable[[List[Any]], Awaitable[Any]]] = None,
+    ) -> str:
+        """
+        Returns the response text for `messages`, from the cache when possible. Only
+        responses that pass `validate` (e.g. parse as JSON) are stored, so a malformed
+        answer is retried on the next call instead of being replayed. Misses go through
+        `invoke` (default `llm.ainvoke`).
+        """
+        invoke = invoke or llm.ainvoke
+        params = _llm_params(llm)
+        if not self.enabled or params["temperature"] not in (0, 0.0):
+            self.bypassed += 1
+            response = await invoke(messages)
+            return response.content
+
+        key = self.key(params, messages)
+        try:
+            cached = await asyncio.to_thread(self.get, key)
+        except Exception as e:
+            # e.g. "database is locked" by another process: fall through to the model
+            logger.error(f"LLM cache lookup failed: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        response = await invoke(messages)
+        latency_ms = (time.perf_counter() - started) * 1000
+        content = response.content
+        if validate is None or validate(content):
+            usage = getattr(response, "usage_metadata", None) or {}
+            try:
+                await asyncio.to_thread(self.put, key, str(params["model"]), content, int(usage.get("total_tokens") or 0), latency_ms)
+            except Exception as e:
+                logger.error(f"Failed to store LLM response in cache: {e}")
+        return content
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("select count(*) from llm_cache").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "tokens_saved": self.tokens_saved,
+            "latency_saved_ms": round(self.latency_saved_ms, 1),
+        }
+
+_llm_cache: Optional[LLMCache] = None
+
+def get_llm_cache() -> LLMCache:
+    """Lazy-load the process-wide cache from settings."""
+    global _llm_cache
+    if _llm_cache is None:
+        from shared.config import settings
+        path = settings.llm_cache_path or os.path.join(tempfile.gettempdir(), "atlas_llm_cache.sqlite3")
+        _llm_cache = LLMCache(
+            path, ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_entries=settings.llm_cache_max_entries, enabled=settings.llm_cache_enabled
+        )
+        logger.info(f"LLM cache at {path}")
+    return _llm_cache
@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from shared.llm_cache import get_llm_cache
+from shared.logging import setup_logger
+
+logger = setup_logger("llm_executor")
+
+T = TypeVar("T")
+
+class Lane(IntEnum):
+    """Priority lanes; a free slot always goes to the lowest lane with a waiter."""
+    CHAT = 0      # an advisor is waiting on the response
+    SWEEP = 1     # heartbeat and morning brief interpretations
+    PROACTOR = 2  # speculative meeting briefs
+
+class _Bucket:
+    """Token bucket holding up to one minute's allowance, refilled continuously."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        return max(0.0, (amount - self.level) / self.rate)
+
+def estimate_tokens(messages: List[Any], max_tokens: Optional[int] = None) -> int:
+    """Rough prompt size (~4 characters per token) plus the completion allowance."""
+    chars = sum(len(str(getattr(m, "content", None) or (m.get("content", "") if isinstance(m, dict) else m))) for m in messages)
+    return chars // 4 + (max_tokens or 512)
+
+def _rate_limit_delay(error: Exception) -> Optional[float]:
+    """Seconds the provider asked us to wait if `error` is a 429, 0 if it gave no hint, else None."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429 and type(error).__name__ != "RateLimitError":
+        return None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+class LLMExecutor:
+    """
+    Shared gate for LLM calls. Admits calls under a requests-per-minute and a
+    tokens-per-minute bucket and a concurrency cap, serving lanes in priority order.
+    Tokens are reserved from an estimate and settled against the reported usage.
+    429s pause admission for everyone and are retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._requests = _Bucket(requests_per_minute)
+        self._tokens = _Bucket(tokens_per_minute)
+        self._waiters: list = []  # heap of (lane, seq, tokens, future)
+        self._seq = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.completed = {lane.name.lower(): 0 for lane in Lane}
+        self.rate_limited = 0
+        self.failed = 0
+        self.tokens_used = 0  # as reported by the provider (or the reservation when it reports none)
+
+    def _reserve(self, tokens: int) -> int:
+        # A reservation above the bucket size could never be admitted
+        return max(1, min(int(tokens), int(self._tokens.capacity)))
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self.max_concurrency:
+                return  # the next release dispatches again
+            wait = max(self._paused_until - now, self._requests.wait_for(1), self._tokens.wait_for(tokens))
+            if wait > 0:
+                # Strict priority: lower lanes wait behind the head even if they would fit
+                self._timer = future.get_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._requests.level -= 1
+            self._tokens.level -= tokens
+            self._active += 1
+            future.set_result(None)
+
+    async def _acquire(self, lane: Lane, tokens: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(lane), next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(tokens, 0)  # admitted as the caller went away
+            raise
+
+    def _release(self, reserved: int, used: int):
+        self._active -= 1
+        self._tokens.refill(time.monotonic())
+        # Settle the reservation; usage above it leaves the bucket in debt
+        self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - used)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane: Lane, tokens: int):
+        """Holds one admission for a block that calls the model itself (e.g. a streaming agent run)."""
+        reserved = self._reserve(tokens)
+        await self._acquire(lane, reserved)
+        try:
+            yield
+        finally:
+            self._release(reserved, reserved)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        lane: Lane = Lane.SWEEP,
+        tokens: int = 512,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """Runs `call` once admitted, retrying 429s; `usage` reads the tokens actually spent from its result."""
+        reserved = self._reserve(tokens)
+        for attempt in itertools.count():
+            await self._acquire(lane, reserved)
+            used = reserved
+            delay = None
+            try:
+                result = await call()
+                if usage is not None:
+                    used = usage(result) or reserved
+                self.tokens_used += used
+                self.completed[lane.name.lower()] += 1
+                return result
+            except Exception as e:
+                retry_after = _rate_limit_delay(e)
+                if retry_after is None or attempt >= self.max_retries:
+                    self.failed += 1
+                    raise
+                used = 0  # rejected before generating anything
+                self.rate_limited += 1
+                delay = max(retry_after, random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                logger.warning(f"LLM rate limited ({lane.name.lower()} lane), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            finally:
+                self._release(reserved, used)
+            await asyncio.sleep(delay)
+
+    async def ainvoke(self, llm: Any, messages: List[Any], lane: Lane = Lane.SWEEP) -> Any:
+        return await self.run(
+            lambda: llm.ainvoke(messages),
+            lane=lane,
+            tokens=estimate_tokens(messages, getattr(llm, "max_tokens", None)),
+            usage=lambda response: (getattr(response, "usage_metadata", None) or {}).get("total_tokens"),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._tokens.refill(now)
+        queued = {lane.name.lower(): 0 for lane in Lane}
+        for lane, _, _, future in self._waiters:
+            if not future.done():
+                queued[Lane(lane).name.lower()] += 1
+        return {
+            "active": self._active,
+            "queued": queued,
+            "completed": dict(self.completed),
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+            "tokens_used": self.tokens_used,
+            "tokens_available": int(self._tokens.level),
+            "paused_for_s": round(max(0.0, self._paused_until - now), 1),
+        }
+
+_llm_executor: Optional[LLMExecutor] = None
+
+def get_llm_executor() -> LLMExecutor:
+    """Lazy-load the process-wide executor from settings."""
+    global _llm_executor
+    if _llm_executor is None:
+        from shared.config import settings
+        _llm_executor = LLMExecutor(
+            settings.llm_requests_per_minute, settings.llm_tokens_per_minute,
+            settings.llm_max_concurrency, max_retries=settings.llm_max_retries
+        )
+    return _llm_executor
+
+async def invoke_llm(llm: Any, messages: List[Any], lane: Lane = Lane.SWEEP, validate: Optional[Callable[[str], bool]] = None) -> str:
+    """Response text for `messages`: from the LLM cache, else through the executor in `lane`."""
+    return await get_llm_cache().ainvoke(
+        llm, messages, validate=validate,
+        invoke=lambda msgs: get_llm_executor().ainvoke(llm, msgs, lane)
+    )
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from shared.logging import setup_logger
+
+logger = setup_logger("market_intel")
+
+def render_market_context(market_intel: Optional[Dict[str, Any]]) -> str:
+    """
+    Renders market intel as the prompt's market section: only high-signal headlines and
+    indicators, to cut token usage and noise.
+    """
+    if not market_intel:
+        return "No market context available."
+
+    indices = market_intel.get("indices", {})
+    sectors = market_intel.get("sectors", {})
+    news = market_intel.get("news_headlines", [])
+    geo = market_intel.get("geopolitical_context", [])
+
+    context_str = "Latest Market Intelligence:\n"
+    if indices:
+        context_str += f"- Indices: FTSE 100 ({indices.get('ftse_100')}), FTSE 250 ({indices.get('ftse_250')})\n"
+
+    if sectors:
+        perf_str = ", ".join([f"{s}: {v*100:+.1f}%" for s, v in sectors.items()])
+        context_str += f"- Sector Performance: {perf_str}\n"
+
+    if news:
+        context_str += "- Key Headlines: " + " | ".join(news[:3]) + "\n"
+
+    if geo:
+        context_str += "- Geopolitical Context: " + " | ".join(geo[:2]) + "\n"
+
+    return context_str
+
+def is_degraded(market_intel: Optional[Dict[str, Any]]) -> bool:
+    """Whether a fetch came back without the FTSE 100 level or without any headlines."""
+    if not market_intel:
+        return True
+    return (market_intel.get("indices") or {}).get("ftse_100") is None or not market_intel.get("news_headlines")
+
+@dataclass(frozen=True)
+class MarketIntelSnapshot:
+    """One fetch of market intel plus its rendered prompt context, shared by reference."""
+    version: str  # content hash: identical intel keeps the same version across refreshes
+    intel: Dict[str, Any]
+    context: str
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_intel(cls, intel: Dict[str, Any]) -> "MarketIntelSnapshot":
+        # fetched_at differs on every fetch and would make every version unique
+        stable = {k: v for k, v in intel.items() if k != "fetched_at"}
+        version = hashlib.sha256(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+        return cls(version=version, intel=intel, context=render_market_context(intel))
+
+def market_context_text(market_context: Union[MarketIntelSnapshot, Dict[str, Any], None]) -> str:
+    """Prompt text for a snapshot (rendered once, at fetch time) or a raw intel dict."""
+    if isinstance(market_context, MarketIntelSnapshot):
+        return market_context.context
+    return render_market_context(market_context)
+
+class MarketIntelService:
+    """
+    Process-wide market intel snapshot. `fetch` (the Yahoo + news round trips) runs at
+    most once per `ttl_seconds`; concurrent callers during a refresh share the same fetch.
+    A failed or degraded fetch keeps serving the last good snapshot (or, with none, the
+    degraded one) and is retried after `degraded_ttl_seconds`.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[Dict[str, Any]]], ttl_seconds: float = 300.0, degraded_ttl_seconds: float = 30.0):
+        self._fetch = fetch
+        self.ttl_seconds = ttl_seconds
+        self.degraded_ttl_seconds = degraded_ttl_seconds
+        self._snapshot: Optional[MarketIntelSnapshot] = None
+        self._good = False  # whether the current snapshot came from a complete fetch
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.degraded = 0
+        self.reused = 0  # external fetches avoided
+
+    def _fresh(self) -> bool:
+        return self._snapshot is not None and time.monotonic() < self._expires_at
+
+    async def _refresh(self) -> MarketIntelSnapshot:
+        try:
+            self.fetches += 1
+            try:
+                intel = await self._fetch()
+            except Exception as e:
+                logger.error(f"Market intel fetch failed: {e}")
+                intel = {}
+            if is_degraded(intel):
+                self.degraded += 1
+                self._expires_at = time.monotonic() + self.degraded_ttl_seconds
+                if self._good:
+                    logger.warning("Degraded market intel fetch, keeping the previous snapshot")
+                    return self._snapshot
+                self._snapshot = MarketIntelSnapshot.from_intel(intel)
+                return self._snapshot
+            previous = self._snapshot.version if self._snapshot else None
+            self._snapshot = MarketIntelSnapshot.from_intel(intel)
+            self._good = True
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            if self._snapshot.version != previous:
+                logger.info(f"Market intel snapshot {self._snapshot.version}")
+            return self._snapshot
+        finally:
+            self._inflight = None
+
+    async def get(self) -> MarketIntelSnapshot:
+        if self._fresh():
+            self.reused += 1
+            return self._snapshot
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._refresh())
+        else:
+            self.reused += 1
+        # Shielded: a caller timing out must not cancel the fetch other callers wait on
+        return await asyncio.shield(self._inflight)
+
+    def invalidate(self):
+        """Forces the next get() to fetch, e.g. after the sentinel sees an abnormal move."""
+        # The snapshot itself is kept as the fallback should that fetch come back degraded
+        self._expires_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "fetches": self.fetches,
+            "degraded_fetches": self.degraded,
+            "fetches_avoided": self.reused,
+            "version": snapshot.version if snapshot else None,
+            "age_s": round(time.monotonic() - snapshot.fetched_at, 1) if snapshot else None,
+        }
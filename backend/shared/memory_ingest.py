@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from shared.embeddings import get_embeddings_client
+from shared.logging import setup_logger
+
+logger = setup_logger("memory_ingest")
+
+# (client_id, content, source_reference, metadata)
+MemoryItem = Tuple[str, str, str, Optional[Dict[str, Any]]]
+
+MAX_ERRORS = 20
+
+@dataclass
+class IngestStats:
+    rows: int = 0
+    failed: int = 0
+    batches: int = 0
+    skipped: int = 0  # items already ingested according to the checkpoint
+    elapsed_s: float = 0.0
+    errors: List[str] = field(default_factory=list)  # first MAX_ERRORS messages
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_s if self.elapsed_s else 0.0
+
+class _Checkpoint:
+    """
+    Progress of a run as batch indices: everything below `next_batch` is done, plus the
+    batches in `completed` that finished out of order. Written atomically after each batch.
+    """
+
+    def __init__(self, path: Optional[str], batch_size: int):
+        self.path = path
+        self.batch_size = batch_size
+        self.next_batch = 0
+        self.completed: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("batch_size") != batch_size:
+                raise ValueError(f"Checkpoint {path} was written with batch_size={state.get('batch_size')}, not {batch_size}")
+            self.next_batch = state.get("next_batch", 0)
+            self.completed = set(state.get("completed", []))
+
+    def is_done(self, index: int) -> bool:
+        return index < self.next_batch or index in self.completed
+
+    def mark(self, index: int):
+        self.completed.add(index)
+        while self.next_batch in self.completed:
+            self.completed.discard(self.next_batch)
+            self.next_batch += 1
+        if self.path:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"batch_size": self.batch_size, "next_batch": self.next_batch, "completed": sorted(self.completed)}, f)
+            os.replace(tmp, self.path)
+
+async def ingest_memories(
+    items: Iterable[MemoryItem],
+    batch_size: int = 256,
+    concurrency: int = 4,
+    checkpoint_path: Optional[str] = None,
+    insert_chunk_size: int = 500,
+    log_every: int = 50,
+) -> IngestStats:
+    """
+    Streams memories into behavioural_memory. Items are read lazily in batches of
+    `batch_size`; each batch is embedded in one request and inserted in chunks, with at
+    most `concurrency` batches in flight. Embeddings bypass the shared embedding cache,
+    which a bulk load would flush of the risk-reason vectors the sweeps reuse.
+
+    With `checkpoint_path`, finished batches are recorded and skipped on the next run,
+    so an interrupted load resumes where it stopped. `items` must then yield the same
+    sequence on every run, and `batch_size` must not change.
+    """
+    from shared.database import db_manager
+    checkpoint = _Checkpoint(checkpoint_path, batch_size)
+    embed_documents = get_embeddings_client().embed_documents
+    stats = IngestStats()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+
+    async def run_batch(index: int, batch: List[MemoryItem]):
+        try:
+            embeddings = await asyncio.to_thread(embed_documents, [content for _, content, _, _ in batch])
+            rows = [
+                {"client_id": client_id, "content": content, "source_reference": source, "metadata": metadata or {}, "embedding": embedding}
+                for (client_id, content, source, metadata), embedding in zip(batch, embeddings)
+            ]
+            result = await db_manager.ainsert_many("behavioural_memory", rows, chunk_size=insert_chunk_size)
+            stats.rows += len(result.rows)
+            stats.failed += len(result.failed)
+            stats.errors.extend(f["error"] for f in result.failed[:MAX_ERRORS - len(stats.errors)])
+            # Rows rejected by the database would be rejected again, so the batch counts as done
+            checkpoint.mark(index)
+        except Exception as e:
+            # Left out of the checkpoint so the next run retries it
+            logger.error(f"Memory batch {index} ({len(batch)} items) failed: {e}")
+            stats.failed += len(batch)
+            if len(stats.errors) < MAX_ERRORS:
+                stats.errors.append(str(e))
+        finally:
+            semaphore.release()
+        stats.batches += 1
+        if stats.batches % log_every == 0:
+            elapsed = time.perf_counter() - started
+            logger.info(f"Ingested {stats.rows:,} memories ({stats.failed:,} failed) in {elapsed:.1f}s, {stats.rows / elapsed:,.0f} rows/s")
+
+    tasks = set()
+    iterator = iter(items)
+    for index in itertools.count():
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            break
+        if checkpoint.is_done(index):
+            stats.skipped += len(batch)
+            continue
+        await semaphore.acquire()
+        task = asyncio.create_task(run_batch(index, batch))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    stats.elapsed_s = time.perf_counter() - started
+    logger.info(
+        f"Memory ingestion complete: {stats.rows:,} rows, {stats.failed:,} failed, {stats.skipped:,} skipped "
+        f"in {stats.elapsed_s:.1f}s ({stats.rows_per_second:,.0f} rows/s)"
+    )
+    return stats
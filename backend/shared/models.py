@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any
 from pydantic import BaseModel, Field, EmailStr
 from uuid import UUID
 
@@ -96,3 +96,38 @@ class HeartbeatLog(BaseModel):
     risks_found: int = 0
     result_summary: str = ""
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+# Shapes the LLM workflows must return, validated by shared.structured_output
+
+class RiskInterpretation(BaseModel):
+    headline: str
+    consequence_if_ignored: str
+    behavioural_nuance: str
+    proactive_thought: str
+    suggested_action_type: Literal["draft_email", "dismiss"]
+
+class BookSummaryCard(BaseModel):
+    title: str
+    bullets: List[str]
+
+class MorningReport(BaseModel):
+    book_summary_card: BookSummaryCard
+    market_summary: str
+    critical_news: List[str]
+    proactive_thought: str
+    suggested_morning_actions: List[str]
+
+class MeetingBriefContent(BaseModel):
+    client_summary: str
+    portfolio_performance: str
+    priority_strategic_talking_point: str
+    proactive_thought: str
+    key_asset_allocation: List[str]
+    tax_opportunities: List[str]
+    recent_life_events_or_memories: List[str]
+    suggested_agenda_items: List[str]
+    compliance_reminders: List[str]
+
+class DraftContent(BaseModel):
+    subject: str
+    body: str
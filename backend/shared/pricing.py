@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from shared.logging import setup_logger
+
+logger = setup_logger("pricing")
+
+class PriceService:
+    """
+    Process-wide quote cache shared by the custodian and the market data tools, in front
+    of a market data provider (installed by mcp_server.market_data.get_market_data_provider).
+    Every distinct ticker is fetched in one multi-symbol request per TTL window, and
+    tickers that only resolve with the London `.L` suffix are remembered so the
+    fallback request is paid once, not once per holding. A ticker already being fetched
+    by another thread is waited on (up to `inflight_wait_seconds`) rather than re-requested.
+    """
+
+    def __init__(self, ttl_seconds: float = 120.0, provider: Any = None, inflight_wait_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self.inflight_wait_seconds = inflight_wait_seconds
+        self.provider = provider  # anything with `available` and fetch_quotes(symbols)
+        self._quotes: Dict[str, Tuple[float, Optional[Dict[str, float]]]] = {}  # ticker -> (fetched_at, quote)
+        self._resolved: Dict[str, str] = {}  # ticker -> Yahoo symbol that actually priced it
+        self._inflight: Dict[str, threading.Event] = {}  # ticker -> set when its fetch finishes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    @property
+    def available(self) -> bool:
+        return self.provider is not None and self.provider.available
+
+    def use_provider(self, provider: Any):
+        """Switches the quote source; cached quotes from the previous one are dropped."""
+        with self._lock:
+            self.provider = provider
+            self._quotes.clear()
+            self._resolved.clear()
+
+    def prefetch(self, tickers: Iterable[str]) -> None:
+        """Fetches every ticker that isn't fresh in the cache, in at most two requests."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            wanted = {t for t in tickers if t and t not in self._quotes}
+            waiting = {self._inflight[t] for t in wanted if t in self._inflight}
+            stale = sorted(t for t in wanted if t not in self._inflight)
+            done = threading.Event()
+            for ticker in stale:
+                self._inflight[ticker] = done
+        try:
+            if stale:
+                self._fetch_stale(stale)
+        finally:
+            with self._lock:
+                for ticker in stale:
+                    self._inflight.pop(ticker, None)
+            done.set()
+        for event in waiting:
+            event.wait(self.inflight_wait_seconds)
+
+    def in_flight(self, ticker: str) -> bool:
+        """Whether a fetch for `ticker` is running in some thread."""
+        return ticker in self._inflight
+
+    def _fetch_stale(self, stale: List[str]):
+        """Prices `stale` in at most two requests and caches every outcome, misses included."""
+        # 1. Known or bare symbols in one request. Keyed by ticker: "X" resolved to "X.L"
+        # and a stale "X.L" share a symbol, and both must be stored
+        symbols = {t: self._resolved.get(t, t) for t in stale}
+        found = self._fetch_many(sorted(set(symbols.values())))
+
+        # 2. Unresolved bare tickers retried once with the LSE suffix
+        retry = {
+            t: f"{t}.L" for t in stale
+            if symbols[t] not in found and t not in self._resolved
+            and not t.endswith(".L") and not t.startswith("^")
+        }
+        found_l = self._fetch_many(sorted(set(retry.values()))) if retry else {}
+
+        fetched_at = time.monotonic()
+        with self._lock:
+            for ticker, symbol in symbols.items():
+                if symbol in found:
+                    self._resolved[ticker] = symbol
+                    self._quotes[ticker] = (fetched_at, found[symbol])
+            for ticker, symbol in retry.items():
+                if symbol in found_l:
+                    self._resolved[ticker] = symbol
+                    self._quotes[ticker] = (fetched_at, found_l[symbol])
+            # Negative-cache unpriceable tickers so they aren't re-requested per holding
+            for ticker in stale:
+                self._quotes.setdefault(ticker, (fetched_at, None))
+
+    def get_quote(self, ticker: str) -> Optional[Dict[str, float]]:
+        """Returns {"close", "prev_close"?} for a ticker, fetching it on a cache miss."""
+        if not ticker:
+            return None
+        entry = self._quotes.get(ticker)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        with self._lock:
+            self._quotes.pop(ticker, None)
+        self.prefetch([ticker])
+        entry = self._quotes.get(ticker)
+        return entry[1] if entry else None
+
+    def peek(self, ticker: str) -> Tuple[bool, Optional[Dict[str, float]]]:
+        """(cached, quote) without fetching; a cached quote is None for unpriceable tickers."""
+        entry = self._quotes.get(ticker)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return True, entry[1]
+        return False, None
+
+    def get_price(self, ticker: str) -> Optional[float]:
+        quote = self.get_quote(ticker)
+        return quote["close"] if quote else None
+
+    def get_change(self, ticker: str) -> Optional[float]:
+        """Fractional change between the last two closes."""
+        return quote_change(self.get_quote(ticker))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "requests": self.requests,
+            "cached_tickers": len(self._quotes),
+            "london_suffixed": sum(1 for t, s in self._resolved.items() if s != t),
+        }
+
+    def _evict(self, now: float):
+        expired = [t for t, (fetched_at, _) in self._quotes.items() if now - fetched_at >= self.ttl_seconds]
+        for ticker in expired:
+            del self._quotes[ticker]
+
+    def _fetch_many(self, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+        if not symbols or not self.available:
+            return {}
+        self.requests += 1
+        try:
+            return self.provider.fetch_quotes(symbols)
+        except Exception as e:
+            logger.debug(f"Price fetch failed for {len(symbols)} symbols: {e}")
+            return {}
+
+def quote_change(quote: Optional[Dict[str, float]]) -> Optional[float]:
+    """Fractional change between a quote's last two closes."""
+    if not quote or not quote.get("prev_close"):
+        return None
+    return (quote["close"] - quote["prev_close"]) / quote["prev_close"]
+
+_price_service: Optional[PriceService] = None
+
+def get_price_service() -> PriceService:
+    """Lazy-load the process-wide quote cache from settings."""
+    global _price_service
+    if _price_service is None:
+        from shared.config import settings
+        _price_service = PriceService(
+            ttl_seconds=settings.price_cache_ttl_seconds, inflight_wait_seconds=settings.market_data_timeout_seconds
+        )
+    return _price_service
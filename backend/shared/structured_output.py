@@ -0,0 +1,157 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+from shared.llm_executor import Lane, invoke_llm
+from shared.logging import setup_logger
+
+logger = setup_logger("structured_output")
+
+M = TypeVar("M", bound=BaseModel)
+
+# ChatGroq model_kwargs for JSON mode: the provider only returns syntactically valid JSON
+JSON_MODE = {"response_format": {"type": "json_object"}}
+
+_decoder = json.JSONDecoder()
+
+class StructuredOutputError(ValueError):
+    """The completion could not be turned into the expected shape, even after repair."""
+
+def extract_json_object(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    The first JSON object in `text`, or None. JSON-mode output decodes at the first
+    brace; otherwise each '{' is tried with raw_decode, which stops at the end of the
+    object, so code fences and trailing prose (even with braces) are ignored.
+    """
+    if not text:
+        return None
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+def _check(model: Type[M], data: Dict[str, Any]) -> Tuple[Optional[M], List[str]]:
+    """The validated model, or the top-level fields that failed validation."""
+    try:
+        return model.model_validate(data), []
+    except ValidationError as e:
+        fields = {str(err["loc"][0]) for err in e.errors() if err["loc"] and err["loc"][0] in model.model_fields}
+        return None, sorted(fields or model.model_fields)
+
+def validates_as(model: Type[BaseModel]) -> Callable[[str], bool]:
+    """Cache validator: only completions that fully validate against `model` are stored."""
+    def check(content: str) -> bool:
+        data = extract_json_object(content)
+        return data is not None and not _check(model, data)[1]
+    return check
+
+def _approx_tokens(*texts: str) -> int:
+    return sum(len(t) for t in texts) // 4
+
+def _message_text(messages: List[Any]) -> str:
+    return " ".join(str(getattr(m, "content", None) or (m.get("content", "") if isinstance(m, dict) else m)) for m in messages)
+
+def _failed_generation(error: Exception) -> Optional[str]:
+    """Groq rejects invalid JSON-mode output with a 400 that still carries the generation."""
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        failed = (body.get("error") or body).get("failed_generation")
+        if isinstance(failed, str):
+            return failed
+    return None
+
+def _repair_prompt(model: Type[BaseModel], fields: List[str]) -> str:
+    schema = model.model_json_schema()
+    subset = {"properties": {f: schema["properties"][f] for f in fields}, "required": fields}
+    if "$defs" in schema:
+        subset["$defs"] = schema["$defs"]
+    return (
+        f"Your previous answer had missing or invalid values for: {', '.join(fields)}. "
+        f"Return a JSON object containing ONLY those fields, following this JSON schema: {json.dumps(subset)}"
+    )
+
+class StructuredOutputStats:
+    """Counters for structured calls; wasted tokens are estimated at ~4 characters per token."""
+
+    def __init__(self):
+        self.calls = 0
+        self.first_pass = 0
+        self.repaired = 0
+        self.failed = 0
+        self.repair_calls = 0
+        self.wasted_tokens = 0
+
+    def stats(self) -> Dict[str, Any]:
+        successes = self.first_pass + self.repaired
+        return {
+            "calls": self.calls,
+            "first_pass": self.first_pass,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "repair_calls": self.repair_calls,
+            "wasted_tokens": self.wasted_tokens,
+            "wasted_tokens_per_success": round(self.wasted_tokens / successes, 1) if successes else 0.0,
+        }
+
+structured_output_stats = StructuredOutputStats()
+
+async def structured_invoke(
+    llm: Any,
+    messages: List[Any],
+    model: Type[M],
+    lane: Lane = Lane.SWEEP,
+    max_repairs: int = 1,
+) -> M:
+    """
+    Calls the model and returns its answer validated as `model`. When some fields are
+    missing or invalid, only those fields are asked for again (with the first answer in
+    context) and merged in, instead of discarding the whole completion.
+    """
+    stats = structured_output_stats
+    stats.calls += 1
+    prompt_text = _message_text(messages)
+    try:
+        content = await invoke_llm(llm, messages, lane=lane, validate=validates_as(model))
+    except Exception as e:
+        content = _failed_generation(e)
+        if content is None:
+            raise
+
+    data = extract_json_object(content) or {}
+    result, fields = _check(model, data)
+    if result is not None:
+        stats.first_pass += 1
+        return result
+    if not data:
+        # Nothing usable: the whole first call was wasted
+        stats.wasted_tokens += _approx_tokens(prompt_text, content or "")
+
+    for _ in range(max_repairs):
+        repair_messages = [
+            *messages,
+            {"role": "assistant", "content": content or ""},
+            {"role": "user", "content": _repair_prompt(model, fields)},
+        ]
+        stats.repair_calls += 1
+        try:
+            repair = await invoke_llm(llm, repair_messages, lane=lane, validate=lambda c: extract_json_object(c) is not None)
+        except Exception as e:
+            repair = _failed_generation(e)
+            if repair is None:
+                raise
+        stats.wasted_tokens += _approx_tokens(_message_text(repair_messages), repair or "")
+        patch = extract_json_object(repair) or {}
+        data.update({f: patch[f] for f in fields if f in patch})
+        result, fields = _check(model, data)
+        if result is not None:
+            stats.repaired += 1
+            return result
+
+    stats.failed += 1
+    logger.error(f"Structured output for {model.__name__} still invalid after {max_repairs} repair(s): {fields}")
+    raise StructuredOutputError(f"{model.__name__} fields still invalid: {', '.join(fields)}")
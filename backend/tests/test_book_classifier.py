@@ -0,0 +1,119 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from reasoning.classifiers import RiskClassifier, collapse_findings
+from reasoning.book_classifier import BookClassifier, DEFAULT_RULES
+
+SECTORS = ["Technology", "Energy", "Financials", "Healthcare", "Utilities", "Real Estate"]
+
+SNAPSHOT = {"sector_performance": {"Technology": -0.035, "Energy": -0.012, "Financials": 0.004, "Healthcare": -0.05, "Utilities": 0}}
+
+SCALAR = {
+    "market": lambda c, p, s: RiskClassifier.classify_market_risk(p, s),
+    "tax": lambda c, p, s: RiskClassifier.classify_tax_opportunity(c, p),
+    "pension": lambda c, p, s: RiskClassifier.classify_pension_allowance(c),
+    "compliance": lambda c, p, s: RiskClassifier.classify_compliance_exposure(p),
+    "behavioural": lambda c, p, s: RiskClassifier.classify_behavioural_risk(c, s),
+}
+
+def _synthetic_pair(rng: random.Random):
+    holdings = [
+        {"sector": rng.choice(SECTORS), "exposure_percentage": rng.choice([0.05, 0.1, 0.15, 0.2, 0.25, 0.31])}
+        for _ in range(rng.randint(0, 8))
+    ]
+    if rng.random() < 0.1:
+        holdings.append({"exposure_percentage": 0.4})  # no sector -> "Unknown"
+    client = {
+        "tax_profile": {
+            "isa_allowance_remaining": rng.choice([0, 5000, 5001, 20000]),
+            "estimated_gross_income": rng.choice([50000, 200000, 200001, 260000, 300000, 380000]),
+        },
+        "behavioural_profile": {
+            "panic_score": rng.randint(0, 10),
+            "sensitivity_sector": rng.choice(SECTORS + ["Materials"]),
+        },
+    }
+    if rng.random() < 0.1:
+        client["behavioural_profile"] = {}
+    portfolio = {
+        "holdings": holdings,
+        "cash_balance_gbp": rng.choice([0, 10000, 10001, 50000]),
+        "unrealized_gains_gbp": rng.choice([0, 2400, 2401, 9000]),
+        "target_risk_score": rng.choice([2, 3, 4, 5, 7]),
+        "current_risk_score": rng.choice([2, 2.5, 3.5, 4, 5.2, 6.3, 9]),
+    }
+    return client, portfolio
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_book_classifier_matches_scalar_rules(seed):
+    rng = random.Random(seed)
+    pairs = [_synthetic_pair(rng) for _ in range(2000)]
+    vector = BookClassifier.classify_book(pairs, SNAPSHOT)
+    for (client, portfolio), findings in zip(pairs, vector):
+        expected = [f for f in (SCALAR[r](client, portfolio, SNAPSHOT) for r in DEFAULT_RULES) if f]
+        assert findings == expected
+
+def test_rule_order_is_caller_defined():
+    client = {"tax_profile": {"isa_allowance_remaining": 20000, "estimated_gross_income": 380000}}
+    portfolio = {"holdings": [], "cash_balance_gbp": 50000}
+    [findings] = BookClassifier.classify_book([(client, portfolio)], {}, rules=("pension", "tax"))
+    assert [f["deterministic_classification"].get("income") for f in findings] == [380000, None]
+
+def test_empty_book():
+    assert BookClassifier.classify_book([], SNAPSHOT) == []
+
+def test_exclude_matches_sweep_dedup():
+    rng = random.Random(11)
+    pairs = [_synthetic_pair(rng) for _ in range(1000)]
+    for i, (client, _) in enumerate(pairs):
+        client["id"] = f"c{i}"
+    open_keys = {(f"c{i}", etype) for i in range(0, 1000, 3) for etype in ("market_risk", "tax_opportunity")}
+
+    # Reference: the per-finding dedup loop run_heartbeat used to run
+    expected = []
+    seen = set(open_keys)
+    for client, portfolio in pairs:
+        kept = []
+        for rule in DEFAULT_RULES:
+            finding = SCALAR[rule](client, portfolio, SNAPSHOT)
+            if finding and (client["id"], finding["event_type"]) not in seen:
+                seen.add((client["id"], finding["event_type"]))
+                kept.append(finding)
+        expected.append(kept)
+
+    assert BookClassifier.classify_book(pairs, SNAPSHOT, exclude=open_keys) == expected
+
+@pytest.mark.parametrize("seed", [4, 5])
+def test_multi_matches_single_pass_evaluate(seed):
+    rng = random.Random(seed)
+    pairs = [_synthetic_pair(rng) for _ in range(2000)]
+    vector = BookClassifier.classify_book(pairs, SNAPSHOT, multi=True)
+    for (client, portfolio), findings in zip(pairs, vector):
+        assert findings == RiskClassifier.evaluate(client, portfolio, SNAPSHOT)
+
+def test_evaluate_reports_every_breach_and_collapse_keeps_the_most_severe():
+    client = {"tax_profile": {"isa_allowance_remaining": 20000, "estimated_gross_income": 380000}}
+    portfolio = {
+        "holdings": [
+            {"sector": "Technology", "exposure_percentage": 0.35},
+            {"sector": "Energy", "exposure_percentage": 0.5},
+            {"sector": "Healthcare", "exposure_percentage": 0.15},
+        ],
+        "cash_balance_gbp": 50000,
+        "unrealized_gains_gbp": 9000,
+    }
+    findings = RiskClassifier.evaluate(client, portfolio, SNAPSHOT)
+    market = [f for f in findings if f["event_type"] == "market_risk"]
+    assert [f["deterministic_classification"]["sector"] for f in market] == ["Technology", "Energy", "Healthcare"]
+    # ISA, CGT and pension taper all fire under tax_opportunity
+    assert sum(f["event_type"] == "tax_opportunity" for f in findings) == 3
+    assert all(0 <= f["deterministic_classification"]["severity"] <= 1 for f in findings)
+
+    collapsed = collapse_findings(findings)
+    assert [f["event_type"] for f in collapsed] == ["market_risk", "tax_opportunity"]
+    lead = collapsed[0]
+    assert lead["deterministic_classification"]["sector"] == "Energy"
+    assert lead["urgency"] == "high"
+    assert len(lead["deterministic_classification"]["related_findings"]) == 2
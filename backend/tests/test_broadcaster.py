@@ -0,0 +1,136 @@
+import asyncio
+import json
+import pytest
+from api.services.broadcaster import EventBroadcaster, UPDATE
+from api.services import deltas
+from api.services.transports import create_transport, encode_envelope, MAX_NOTIFY_BYTES
+
+def _drain(queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+def test_update_pings_coalesce_until_consumed():
+    async def scenario():
+        b = EventBroadcaster(max_queue_size=8)
+        q = await b.connect()
+        for _ in range(5):
+            await b.broadcast(UPDATE)
+        assert _drain(q) == [UPDATE]
+        await b.broadcast(UPDATE)
+        assert _drain(q) == [UPDATE]
+        assert b.stats()["coalesced"] == 4
+    asyncio.run(scenario())
+
+def test_full_queue_collapses_to_single_update():
+    async def scenario():
+        b = EventBroadcaster(max_queue_size=3)
+        slow = await b.connect()
+        fast = await b.connect()
+        for i in range(10):
+            await b.broadcast({"n": i})
+            _drain(fast)
+        assert slow.qsize() <= 3
+        assert UPDATE in _drain(slow)
+        stats = b.stats()
+        assert stats["dropped"] > 0
+        assert stats["subscribers"] == 2
+    asyncio.run(scenario())
+
+def test_disconnect_keeps_counters_and_is_idempotent():
+    async def scenario():
+        b = EventBroadcaster(max_queue_size=1)
+        q = await b.connect()
+        await b.broadcast({"a": 1})
+        await b.broadcast({"b": 2})
+        b.disconnect(q)
+        b.disconnect(q)
+        stats = b.stats()
+        assert stats["subscribers"] == 0
+        assert stats["dropped"] == 2
+    asyncio.run(scenario())
+
+def test_local_transport_round_trip_records_latency():
+    async def scenario():
+        b = EventBroadcaster()
+        q = await b.connect()
+        await b.start()
+        await b.broadcast({"type": "ping"})
+        assert _drain(q) == ['{"type": "ping"}']
+        stats = b.stats()
+        assert stats["transport"] == "local"
+        assert stats["received_remote"] == 0
+        assert stats["max_delivery_latency_ms"] >= 0.0
+        await b.stop()
+    asyncio.run(scenario())
+
+def test_oversized_envelope_is_rejected_for_notify():
+    assert encode_envelope({"message": "update"}) is not None
+    assert encode_envelope({"message": "x" * (MAX_NOTIFY_BYTES + 1)}) is None
+
+def test_create_transport_validates_configuration():
+    assert create_transport("local").name == "local"
+    with pytest.raises(ValueError):
+        create_transport("postgres", None)
+    with pytest.raises(ValueError):
+        create_transport("redis")
+
+def test_resolver_turns_deltas_into_subscriber_payloads_in_order():
+    async def scenario():
+        b = EventBroadcaster()
+        seen = []
+
+        async def resolver(delta):
+            await asyncio.sleep(0.01 if delta["n"] == 0 else 0)
+            seen.append(delta["n"])
+            return {"type": delta["type"], "n": delta["n"], "cards": []}
+
+        b.set_resolver(resolver)
+        q = await b.connect()
+        await b.start()
+        for n in range(3):
+            await b.broadcast({"type": "event_created", "n": n})
+        await b.broadcast(UPDATE)  # plain pings bypass the resolver
+        assert await q.get() == UPDATE
+        payloads = [json.loads(await q.get()) for _ in range(3)]
+        assert [p["n"] for p in payloads] == [0, 1, 2] == seen
+        await b.stop()
+    asyncio.run(scenario())
+
+def test_resolver_failure_falls_back_to_refetch():
+    async def scenario():
+        b = EventBroadcaster()
+        resyncs = []
+
+        async def resolver(delta):
+            raise RuntimeError("db down")
+
+        b.set_resolver(resolver, on_resync=lambda: resyncs.append(True))
+        q = await b.connect()
+        await b.start()
+        await b.broadcast({"type": "event_created", "ids": ["a"]})
+        assert await asyncio.wait_for(q.get(), 1) == UPDATE
+        assert resyncs == [True]
+        assert b.stats()["resolve_errors"] == 1
+        await b.stop()
+    asyncio.run(scenario())
+
+def test_publish_delta_chunks_ids_and_skips_empty_event_deltas(monkeypatch):
+    sent = []
+
+    async def fake_broadcast(message):
+        sent.append(message)
+
+    monkeypatch.setattr(deltas.broadcaster, "broadcast", fake_broadcast)
+
+    async def scenario():
+        await deltas.publish_delta(deltas.EVENT_CREATED, [str(i) for i in range(deltas.IDS_PER_MESSAGE + 5)])
+        await deltas.publish_delta(deltas.EVENT_RESOLVED, [])
+        await deltas.publish_delta(deltas.BRIEF_READY, client_id="c1")
+    asyncio.run(scenario())
+
+    assert [len(m["ids"]) for m in sent] == [deltas.IDS_PER_MESSAGE, 5, 0]
+    assert sent[-1] == {"type": "brief_ready", "ids": [], "client_id": "c1"}
+    with pytest.raises(ValueError):
+        asyncio.run(deltas.publish_delta("update"))
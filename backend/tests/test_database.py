@@ -0,0 +1,105 @@
+import pytest
+
+pytest.importorskip("supabase")
+from shared.database import SupabaseManager
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.request = {"table": table}
+
+    def insert(self, rows):
+        self.request.update(op="insert", rows=rows)
+        return self
+
+    def update(self, payload):
+        self.request.update(op="update", payload=payload)
+        return self
+
+    def in_(self, column, values):
+        self.request.update(column=column, values=list(values))
+        return self
+
+    def execute(self):
+        return self.client.answer(self.request)
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.request = {"rpc": name, **params}
+
+    def execute(self):
+        return self.client.answer(self.request)
+
+class FakeClient:
+    """Records each request; a write containing a row with "bad" set fails as a whole."""
+
+    def __init__(self):
+        self.requests = []
+        self.open_keys = set()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
+
+    def answer(self, request):
+        self.requests.append(request)
+        if "rpc" in request:
+            created = []
+            for event in request["events"]:
+                key = (event["client_id"], event["event_type"])
+                if key not in self.open_keys:
+                    self.open_keys.add(key)
+                    created.append(dict(event, id=f"e{len(self.open_keys)}"))
+            return FakeResponse(created)
+        if request["op"] == "update":
+            return FakeResponse([{"id": k, **request["payload"]} for k in request["values"]])
+        rows = request["rows"] if isinstance(request["rows"], list) else [request["rows"]]
+        if any(row.get("bad") for row in rows):
+            raise RuntimeError("violates check constraint")
+        return FakeResponse(rows)
+
+def _manager():
+    manager = SupabaseManager.__new__(SupabaseManager)
+    manager.client = FakeClient()
+    return manager
+
+def test_update_many_groups_identical_payloads_into_in_updates():
+    manager = _manager()
+    rows = [{"id": i, "vulnerability_score": 0.0} for i in (1, 2, 4)] + [{"id": 3, "vulnerability_score": 0.8}]
+    result = manager.update_many("clients", rows, chunk_size=2)
+    assert [(r["payload"], r["values"]) for r in manager.client.requests] == [
+        ({"vulnerability_score": 0.0}, [1, 2]),
+        ({"vulnerability_score": 0.0}, [4]),
+        ({"vulnerability_score": 0.8}, [3]),
+    ]
+    assert result.requests == 3 and result.ok and len(result.rows) == 4
+
+def test_failed_chunk_is_retried_row_by_row():
+    manager = _manager()
+    rows = [{"n": 1}, {"n": 2, "bad": True}, {"n": 3}, {"n": 4}]
+    result = manager.insert_many("heartbeat_logs", rows, chunk_size=3)
+    # The first chunk fails, then its three rows go one at a time; the second chunk succeeds
+    assert result.requests == 5
+    assert result.rows == [{"n": 1}, {"n": 3}, {"n": 4}]
+    assert [f["row"] for f in result.failed] == [{"n": 2, "bad": True}]
+
+def test_insert_open_events_returns_only_the_events_it_claimed():
+    manager = _manager()
+    manager.client.open_keys.add(("c1", "market_risk"))
+    rows = [
+        {"client_id": "c1", "event_type": "market_risk"},
+        {"client_id": "c1", "event_type": "tax_opportunity"},
+        {"client_id": "c2", "event_type": "market_risk"},
+        {"client_id": "c2", "event_type": "market_risk"},
+    ]
+    result = manager.insert_open_events(rows)
+    assert manager.client.requests == [{"rpc": "insert_open_risk_events", "events": rows}]
+    assert [(r["client_id"], r["event_type"]) for r in result.rows] == [("c1", "tax_opportunity"), ("c2", "market_risk")]
+    assert result.requests == 1 and result.ok
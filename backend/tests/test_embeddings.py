@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from shared.embeddings import EmbeddingCache, OnnxEmbeddings, _mean_pool_normalise
+
+class FakeEndpoint:
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, texts):
+        self.requests.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+def test_batch_embeds_each_distinct_miss_once_in_input_order():
+    endpoint = FakeEndpoint()
+    cache = EmbeddingCache(endpoint)
+    vectors = cache.embed_many(["Mandate Drift", " Mandate Drift ", "ISA allowance", "Mandate Drift"])
+    assert endpoint.requests == [["Mandate Drift", "ISA allowance"]]
+    assert vectors == [[13.0, 1.0], [13.0, 1.0], [13.0, 1.0], [13.0, 1.0]]
+    # Only the new text is requested on the next batch
+    cache.embed_many(["ISA allowance", "CGT exposure"])
+    assert endpoint.requests[1] == ["CGT exposure"]
+    assert cache.stats()["requests"] == 2
+
+def test_lru_evicts_least_recently_used():
+    endpoint = FakeEndpoint()
+    cache = EmbeddingCache(endpoint, max_entries=2)
+    cache.embed("a")
+    cache.embed("bb")
+    cache.embed("a")  # refreshes "a"
+    cache.embed("ccc")
+    assert cache.stats()["cached_texts"] == 2
+    cache.embed("a")
+    cache.embed("bb")
+    assert endpoint.requests == [["a"], ["bb"], ["ccc"], ["bb"]]
+
+def test_expired_vectors_are_re_embedded(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("shared.embeddings.time.monotonic", lambda: clock[0])
+    endpoint = FakeEndpoint()
+    cache = EmbeddingCache(endpoint, ttl_seconds=60)
+    cache.embed("a")
+    clock[0] += 59
+    cache.embed("a")
+    clock[0] += 2
+    cache.embed("a")
+    assert endpoint.requests == [["a"], ["a"]]
+
+def test_mean_pool_ignores_padding_and_normalises():
+    tokens = np.array([
+        [[5.0, 2.0], [3.0, 4.0], [100.0, 100.0]],  # last token is padding
+        [[0.0, 2.0], [0.0, 0.0], [0.0, 0.0]],
+    ])
+    mask = np.array([[1, 1, 0], [1, 0, 0]])
+    pooled = _mean_pool_normalise(tokens, mask)
+    np.testing.assert_allclose(pooled, [[0.8, 0.6], [0.0, 1.0]])
+    np.testing.assert_allclose(np.linalg.norm(pooled, axis=1), [1.0, 1.0])
+
+def test_embed_documents_batches_by_length_and_restores_order():
+    model = OnnxEmbeddings.__new__(OnnxEmbeddings)
+    model.batch_size = 2
+    batches = []
+
+    def embed_batch(texts):
+        batches.append(texts)
+        return [[float(len(t))] for t in texts]
+
+    model._embed_batch = embed_batch
+    texts = ["dddd", "a", "ccc", "bb", "eeeee"]
+    assert model.embed_documents(texts) == [[4.0], [1.0], [3.0], [2.0], [5.0]]
+    assert batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+def test_onnx_backend_needs_onnxruntime(monkeypatch):
+    monkeypatch.setattr("shared.embeddings.ort", None)
+    with pytest.raises(RuntimeError):
+        OnnxEmbeddings()
@@ -0,0 +1,97 @@
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+from shared.llm_cache import LLMCache
+from shared.structured_output import extract_json_object
+
+class FakeLLM:
+    def __init__(self, temperature=0, reply='{"headline": "ok"}'):
+        self.model_name = "fake-model"
+        self.temperature = temperature
+        self.max_tokens = 100
+        self.reply = reply
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=self.reply, usage_metadata={"total_tokens": 42})
+
+def _messages(system="  You are Atlas.\n    Be brief. ", human="Risk: {}"):
+    return [{"role": "system", "content": system}, {"role": "user", "content": human}]
+
+def test_identical_prompts_hit_regardless_of_layout():
+    cache = LLMCache(":memory:")
+    llm = FakeLLM()
+
+    async def scenario():
+        first = await cache.ainvoke(llm, _messages())
+        second = await cache.ainvoke(llm, _messages(system="You are Atlas. Be brief."))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == '{"headline": "ok"}'
+    assert llm.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["tokens_saved"]) == (1, 1, 42)
+
+def test_different_inputs_or_model_settings_miss():
+    cache = LLMCache(":memory:")
+    llm, other = FakeLLM(), FakeLLM()
+    other.max_tokens = 500
+
+    async def scenario():
+        await cache.ainvoke(llm, _messages(human="Risk: {\"a\": 1}"))
+        await cache.ainvoke(llm, _messages(human="Risk: {\"a\": 2}"))
+        await cache.ainvoke(other, _messages(human="Risk: {\"a\": 1}"))
+
+    asyncio.run(scenario())
+    assert llm.calls == 2 and other.calls == 1
+
+def test_sampled_calls_and_invalid_responses_are_not_stored():
+    cache = LLMCache(":memory:")
+    creative, broken = FakeLLM(temperature=0.7), FakeLLM(reply="Sorry, I can't do that")
+
+    async def scenario():
+        for _ in range(2):
+            await cache.ainvoke(creative, _messages())
+            await cache.ainvoke(broken, _messages(human="other"), validate=lambda c: extract_json_object(c) is not None)
+
+    asyncio.run(scenario())
+    assert creative.calls == 2 and broken.calls == 2
+    assert cache.stats()["entries"] == 0 and cache.stats()["bypassed"] == 2
+
+def test_expired_entries_miss(monkeypatch):
+    cache = LLMCache(":memory:", ttl_seconds=60)
+    clock = [1000.0]
+    monkeypatch.setattr("shared.llm_cache.time.time", lambda: clock[0])
+    cache.put("k", "fake-model", "cached")
+    clock[0] += 59
+    assert cache.get("k") == "cached"
+    clock[0] += 2
+    assert cache.get("k") is None
+
+def test_size_cap_evicts_least_recently_hit(monkeypatch):
+    cache = LLMCache(":memory:", max_entries=2)
+    clock = [1000.0]
+    monkeypatch.setattr("shared.llm_cache.time.time", lambda: clock[0])
+    for key in ("a", "b"):
+        clock[0] += 1
+        cache.put(key, "fake-model", key)
+    clock[0] += 1
+    assert cache.get("a") == "a"
+    clock[0] += 1
+    cache.put("c", "fake-model", "c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" and cache.get("c") == "c"
+    assert cache.stats()["evictions"] == 1
+
+def test_failed_lookup_falls_through_to_the_model(monkeypatch):
+    cache = LLMCache(":memory:")
+    llm = FakeLLM()
+
+    def locked(key):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(cache, "get", locked)
+    assert asyncio.run(cache.ainvoke(llm, _messages())) == '{"headline": "ok"}'
+    assert llm.calls == 1
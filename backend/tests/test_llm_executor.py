@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from shared.llm_executor import Lane, LLMExecutor
+
+class RateLimitError(Exception):
+    status_code = 429
+
+def _executor(**overrides):
+    options = dict(requests_per_minute=600, tokens_per_minute=60_000, max_concurrency=1, base_delay=0.001, max_delay=0.01)
+    options.update(overrides)
+    return LLMExecutor(**options)
+
+def test_free_slots_go_to_the_highest_priority_lane():
+    executor = _executor()
+    order = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            await release.wait()
+
+        async def record(name):
+            order.append(name)
+
+        holder = asyncio.create_task(executor.run(hold, lane=Lane.SWEEP))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(executor.run(lambda name=name: record(name), lane=lane))
+            for name, lane in (("proactor", Lane.PROACTOR), ("sweep", Lane.SWEEP), ("chat", Lane.CHAT))
+        ]
+        await asyncio.sleep(0)
+        assert executor.stats()["queued"] == {"chat": 1, "sweep": 1, "proactor": 1}
+        release.set()
+        await asyncio.gather(holder, *queued)
+
+    asyncio.run(scenario())
+    assert order == ["chat", "sweep", "proactor"]
+
+def test_rate_limited_calls_are_retried():
+    executor = _executor()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError("429 Too Many Requests")
+        return "ok"
+
+    assert asyncio.run(executor.run(flaky)) == "ok"
+    assert len(attempts) == 3
+    assert executor.stats()["rate_limited"] == 2
+
+def test_other_errors_and_exhausted_retries_propagate():
+    executor = _executor(max_retries=1)
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    async def always_limited():
+        attempts.append(1)
+        raise RateLimitError("429")
+
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run(broken))
+    assert len(attempts) == 1
+    with pytest.raises(RateLimitError):
+        asyncio.run(executor.run(always_limited))
+    assert len(attempts) == 3
+    assert executor.stats()["failed"] == 2
+
+def test_token_budget_holds_calls_until_usage_is_settled():
+    executor = _executor(tokens_per_minute=1000, max_concurrency=4)
+
+    async def call():
+        return "done"
+
+    async def scenario():
+        # The reservation is refunded down to the reported usage, leaving room for the next call
+        await executor.run(call, tokens=1000, usage=lambda _: 100)
+        await executor.run(call, tokens=800, usage=lambda _: 800)
+        blocked = asyncio.create_task(executor.run(call, tokens=500))
+        await asyncio.sleep(0.05)
+        assert not blocked.done() and executor.stats()["queued"]["sweep"] == 1
+        blocked.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await blocked
+        assert executor.stats()["queued"]["sweep"] == 0
+
+    asyncio.run(scenario())
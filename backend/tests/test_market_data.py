@@ -0,0 +1,43 @@
+import pytest
+from mcp_server.market_data import ReplayProvider, create_market_data_provider, write_recording
+
+def _recording(tmp_path):
+    path = tmp_path / "market.jsonl"
+    write_recording(
+        str(path),
+        {
+            0: {"^FTSE": {"close": 8000.0, "prev_close": 7990.0}},
+            1: {"^FTSE": {"close": 7800.0, "prev_close": 8000.0}},
+        },
+        {0: [{"query": "geopolitical events UK markets", "title": "Trade talks stall"}, {"title": "BoE holds rates"}]},
+    )
+    return str(path)
+
+def test_replay_serves_recorded_ticks_in_order(tmp_path):
+    provider = ReplayProvider(_recording(tmp_path))
+    assert provider.fetch_quotes(["^FTSE"])["^FTSE"] == {"close": 8000.0, "prev_close": 7990.0}
+    assert provider.advance() == 1
+    assert provider.fetch_quotes(["^FTSE"])["^FTSE"]["close"] == 7800.0
+    assert provider.advance() == 0  # wraps
+    assert provider.calls == 2
+
+def test_unrecorded_symbols_get_stable_synthetic_quotes(tmp_path):
+    provider = ReplayProvider(_recording(tmp_path))
+    first = provider.fetch_quotes(["VOD.L", "AZN.L"])
+    assert set(first) == {"VOD.L", "AZN.L"}
+    assert ReplayProvider(_recording(tmp_path)).fetch_quotes(["VOD.L"])["VOD.L"] == first["VOD.L"]
+    strict = ReplayProvider(_recording(tmp_path), synthesize_missing=False)
+    assert strict.fetch_quotes(["VOD.L"]) == {}
+
+def test_headlines_match_their_query_or_apply_to_any(tmp_path):
+    provider = ReplayProvider(_recording(tmp_path))
+    geo = provider.search_news("geopolitical events UK markets", 5)
+    assert [h["title"] for h in geo] == ["Trade talks stall", "BoE holds rates"]
+    assert [h["title"] for h in provider.search_news("UK financial market news today", 5)] == ["BoE holds rates"]
+    assert set(geo[0]) == {"title", "body", "source", "date", "url"}
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError):
+        create_market_data_provider("bloomberg")
+    with pytest.raises(ValueError):
+        create_market_data_provider("replay")
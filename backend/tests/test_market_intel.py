@@ -0,0 +1,100 @@
+import asyncio
+from shared.market_intel import MarketIntelService, MarketIntelSnapshot, market_context_text
+
+INTEL = {
+    "indices": {"ftse_100": 8100.5, "ftse_250": 20000.1},
+    "sectors": {"Energy": 0.012},
+    "news_headlines": ["BoE holds rates"],
+    "geopolitical_context": [],
+    "fetched_at": "2026-01-01T07:30:00+00:00",
+}
+
+def _service(ttl_seconds=300.0):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return dict(INTEL, fetched_at=f"t{len(calls)}")
+
+    return MarketIntelService(fetch, ttl_seconds=ttl_seconds), calls
+
+def test_concurrent_callers_share_one_fetch():
+    service, calls = _service()
+
+    async def scenario():
+        first = await asyncio.gather(*(service.get() for _ in range(5)))
+        later = await service.get()
+        return first, later
+
+    first, later = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(snapshot is first[0] for snapshot in first) and later is first[0]
+    assert service.stats()["fetches_avoided"] == 5
+
+def test_expired_snapshot_refetches_with_a_stable_version():
+    service, calls = _service(ttl_seconds=0)
+
+    async def scenario():
+        return await service.get(), await service.get()
+
+    first, second = asyncio.run(scenario())
+    assert len(calls) == 2 and first is not second
+    # Only the fetch time changed, so the content version is the same
+    assert first.version == second.version
+
+def test_snapshot_context_is_rendered_once_and_matches_the_dict_path():
+    snapshot = MarketIntelSnapshot.from_intel(INTEL)
+    assert market_context_text(snapshot) is snapshot.context
+    assert snapshot.context == market_context_text(INTEL)
+    assert "FTSE 100 (8100.5)" in snapshot.context and "Energy: +1.2%" in snapshot.context
+    assert market_context_text(None) == "No market context available."
+
+def test_degraded_fetch_keeps_the_last_good_snapshot_and_retries_soon(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("shared.market_intel.time.monotonic", lambda: clock[0])
+    answers = [INTEL, dict(INTEL, news_headlines=[]), RuntimeError("yahoo down"), dict(INTEL, fetched_at="t4")]
+
+    async def fetch():
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    service = MarketIntelService(fetch, ttl_seconds=300, degraded_ttl_seconds=30)
+
+    async def scenario():
+        good = await service.get()
+        clock[0] += 301
+        kept = await service.get()  # no headlines
+        clock[0] += 29
+        cached = await service.get()
+        clock[0] += 2
+        failed = await service.get()  # fetch raises
+        clock[0] += 31
+        return good, kept, cached, failed, await service.get()
+
+    good, kept, cached, failed, refreshed = asyncio.run(scenario())
+    assert kept is good and cached is good and failed is good
+    assert refreshed.intel["fetched_at"] == "t4"
+    assert service.stats()["fetches"] == 4 and service.stats()["degraded_fetches"] == 2
+
+def test_degraded_fetch_without_a_good_snapshot_is_cached_briefly(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("shared.market_intel.time.monotonic", lambda: clock[0])
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return dict(INTEL, indices={"ftse_100": None, "ftse_250": None})
+
+    service = MarketIntelService(fetch, ttl_seconds=300, degraded_ttl_seconds=30)
+
+    async def scenario():
+        await service.get()
+        await service.get()
+        clock[0] += 31
+        return await service.get()
+
+    snapshot = asyncio.run(scenario())
+    assert len(calls) == 2 and snapshot.intel["indices"]["ftse_100"] is None
@@ -0,0 +1,29 @@
+import json
+import pytest
+from shared.memory_ingest import _Checkpoint
+
+def test_out_of_order_batches_resume_without_repeats(tmp_path):
+    path = str(tmp_path / "ingest.json")
+    checkpoint = _Checkpoint(path, batch_size=100)
+    for index in (0, 2, 3):
+        checkpoint.mark(index)
+    assert (checkpoint.next_batch, checkpoint.completed) == (1, {2, 3})
+
+    # An interrupted run leaves batch 1 to retry and skips the ones after it
+    resumed = _Checkpoint(path, batch_size=100)
+    assert [i for i in range(5) if not resumed.is_done(i)] == [1, 4]
+    resumed.mark(1)
+    with open(path) as f:
+        assert json.load(f) == {"batch_size": 100, "next_batch": 4, "completed": []}
+
+def test_batch_size_mismatch_is_rejected(tmp_path):
+    path = str(tmp_path / "ingest.json")
+    _Checkpoint(path, batch_size=100).mark(0)
+    with pytest.raises(ValueError):
+        _Checkpoint(path, batch_size=200)
+
+def test_without_a_path_nothing_is_written(tmp_path):
+    checkpoint = _Checkpoint(None, batch_size=10)
+    checkpoint.mark(0)
+    assert checkpoint.is_done(0) and not checkpoint.is_done(1)
+    assert list(tmp_path.iterdir()) == []
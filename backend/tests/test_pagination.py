@@ -0,0 +1,41 @@
+import pytest
+from api.services.pagination import clamp_limit, encode_cursor, decode_cursor, keyset_filter, is_after, sort_key
+
+def test_cursor_round_trip():
+    row = {"id": "7f1c0e1e-0000-4000-8000-000000000001", "created_at": "2025-01-10T09:30:00.12345+00:00"}
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], row["id"])
+
+def test_decode_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_clamp_limit():
+    assert clamp_limit(None) == 50
+    assert clamp_limit(0) == 50
+    assert clamp_limit(-5) == 1
+    assert clamp_limit(10_000) == 200
+
+def test_keyset_filter_breaks_ties_on_id():
+    expr = keyset_filter("2025-01-10T09:30:00+00:00", "abc")
+    assert expr == 'created_at.lt."2025-01-10T09:30:00+00:00",and(created_at.eq."2025-01-10T09:30:00+00:00",id.lt."abc")'
+
+def test_is_after_orders_like_postgres_descending():
+    cursor = ("2025-01-10T09:30:00.5+00:00", "m")
+    # Older timestamp, including a shorter fractional part PostgREST trims trailing zeros from
+    assert is_after(sort_key({"created_at": "2025-01-10T09:30:00+00:00", "id": "z"}), cursor)
+    assert is_after(sort_key({"created_at": "2025-01-10T09:30:00.25+00:00", "id": "z"}), cursor)
+    # Same timestamp falls back to id
+    assert is_after(sort_key({"created_at": "2025-01-10T09:30:00.5+00:00", "id": "a"}), cursor)
+    assert not is_after(sort_key({"created_at": "2025-01-10T09:30:00.5+00:00", "id": "z"}), cursor)
+    assert not is_after(sort_key({"created_at": "2025-01-10T09:30:00.75+00:00", "id": "a"}), cursor)
+
+def test_is_after_compares_instants_not_spellings():
+    cursor = ("2025-01-10T09:30:00.500000Z", "m")
+    # Same instant in another offset: tie broken on id
+    assert is_after(sort_key({"created_at": "2025-01-10T10:30:00.5+01:00", "id": "a"}), cursor)
+    # Lexically smaller but later
+    assert not is_after(sort_key({"created_at": "2025-01-10T08:31:00+00:00", "id": "a"}), ("2025-01-10T09:30:00+01:00", "m"))
+
+def test_decode_rejects_malformed_timestamp():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor({"id": "abc", "created_at": "yesterday"}))
@@ -0,0 +1,78 @@
+import threading
+import time
+from shared.pricing import PriceService
+
+class FakeProvider:
+    available = True
+
+    def __init__(self, quotes, gate=None):
+        self.quotes = quotes
+        self.gate = gate
+        self.requests = []
+
+    def fetch_quotes(self, symbols):
+        self.requests.append(list(symbols))
+        if self.gate:
+            self.gate.wait(5)
+        return {s: self.quotes[s] for s in symbols if s in self.quotes}
+
+def _clock(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("shared.pricing.time.monotonic", lambda: clock[0])
+    return clock
+
+def test_quotes_are_reused_until_the_ttl_expires(monkeypatch):
+    clock = _clock(monkeypatch)
+    provider = FakeProvider({"AZN.L": {"close": 100.0, "prev_close": 98.0}})
+    prices = PriceService(ttl_seconds=60, provider=provider)
+    assert prices.get_price("AZN.L") == 100.0
+    clock[0] += 59
+    assert prices.get_change("AZN.L") == (100.0 - 98.0) / 98.0
+    clock[0] += 2
+    prices.get_price("AZN.L")
+    assert provider.requests == [["AZN.L"], ["AZN.L"]]
+    assert (prices.hits, prices.misses) == (1, 2)
+
+def test_london_suffix_is_resolved_once_and_shared_with_the_suffixed_ticker(monkeypatch):
+    clock = _clock(monkeypatch)
+    provider = FakeProvider({"VOD.L": {"close": 70.0}})
+    prices = PriceService(ttl_seconds=60, provider=provider)
+    assert prices.get_price("VOD") == 70.0
+    assert provider.requests == [["VOD"], ["VOD.L"]]
+    clock[0] += 61
+    # "VOD" now goes straight to "VOD.L", and the same batch's "VOD.L" is priced too
+    prices.prefetch(["VOD", "VOD.L"])
+    assert provider.requests[2:] == [["VOD.L"]]
+    assert prices.peek("VOD") == (True, {"close": 70.0}) and prices.peek("VOD.L") == (True, {"close": 70.0})
+
+def test_unpriceable_tickers_are_negative_cached(monkeypatch):
+    clock = _clock(monkeypatch)
+    provider = FakeProvider({})
+    prices = PriceService(ttl_seconds=60, provider=provider)
+    assert prices.get_price("GONE") is None
+    assert prices.get_price("GONE") is None
+    assert provider.requests == [["GONE"], ["GONE.L"]]
+    assert prices.peek("GONE") == (True, None)
+    clock[0] += 61
+    prices.get_price("GONE")
+    assert len(provider.requests) == 4
+
+def test_a_ticker_being_fetched_is_waited_on_not_requested_again():
+    gate = threading.Event()
+    provider = FakeProvider({"BP.L": {"close": 5.0}}, gate=gate)
+    prices = PriceService(ttl_seconds=60, provider=provider)
+    first = threading.Thread(target=prices.prefetch, args=(["BP.L"],))
+    first.start()
+    while not prices.in_flight("BP.L"):
+        pass
+    result = []
+    second = threading.Thread(target=lambda: result.append(prices.get_price("BP.L")))
+    second.start()
+    while not prices.misses:
+        pass
+    time.sleep(0.05)  # let the second lookup reach the in-flight check
+    gate.set()
+    first.join(5)
+    second.join(5)
+    assert result == [5.0]
+    assert provider.requests == [["BP.L"]]
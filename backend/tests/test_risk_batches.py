@@ -0,0 +1,78 @@
+import asyncio
+import json
+from reasoning.risk_batches import interpret_in_batches
+
+def _interpretation(headline: str, **extra) -> dict:
+    return {
+        "headline": headline,
+        "consequence_if_ignored": "c",
+        "behavioural_nuance": "b",
+        "proactive_thought": "p",
+        "suggested_action_type": "dismiss",
+        **extra,
+    }
+
+def _events():
+    # Deliberately unsorted: batches are formed by (client_id, event_type)
+    return [
+        {"client_id": "c2", "event_type": "tax_opportunity"},
+        {"client_id": "c1", "event_type": "market_risk"},
+        {"client_id": "c2", "event_type": "market_risk"},
+        {"client_id": "c1", "event_type": "tax_opportunity"},
+    ]
+
+class FakeModel:
+    """Answers batches by event index; in its first answer, `drop` and `invalid` leave findings out or malformed."""
+
+    def __init__(self, events, drop=(), invalid=(), fail=False):
+        self.events = events
+        self.drop, self.invalid, self.fail = set(drop), set(invalid), fail
+        self.batches, self.singles = [], []
+
+    async def ask_batch(self, keys):
+        self.batches.append(sorted(keys.values()))
+        if self.fail:
+            raise RuntimeError("429 retries exhausted")
+        first = len(self.batches) == 1
+        items = []
+        for key, i in keys.items():
+            if first and i in self.drop:
+                continue
+            item = dict(_interpretation(f"batched {i}"), key=key)
+            if first and i in self.invalid:
+                item["suggested_action_type"] = "shout"
+            items.append(item)
+        return json.dumps({"interpretations": items})
+
+    async def ask_single(self, i):
+        self.singles.append(i)
+        return _interpretation(f"single {i}")
+
+def _run(model, batch_size):
+    return asyncio.run(interpret_in_batches(model.events, batch_size, model.ask_batch, model.ask_single))
+
+def test_batches_group_by_client_and_type_and_map_keys_back():
+    events = _events()
+    model = FakeModel(events)
+    results, requests = _run(model, batch_size=2)
+    assert model.batches == [[1, 3], [0, 2]]  # c1's findings together, then c2's
+    assert [r["headline"] for r in results] == ["batched 0", "batched 1", "batched 2", "batched 3"]
+    assert requests == 2 and model.singles == []
+
+def test_partial_answer_retries_only_the_missing_findings():
+    events = _events()
+    model = FakeModel(events, drop={0}, invalid={2, 3})
+    results, requests = _run(model, batch_size=4)
+    # Sorted order is 1, 3, 2, 0, so the missing findings 3, 2, 0 split into [3, 2] and [0]
+    assert model.batches == [[0, 1, 2, 3], [2, 3]]
+    assert model.singles == [0]
+    assert [r["headline"] for r in results] == ["single 0", "batched 1", "batched 2", "batched 3"]
+    assert requests == 3
+
+def test_failed_request_falls_back_without_splitting():
+    events = _events()
+    model = FakeModel(events, fail=True)
+    results, requests = _run(model, batch_size=4)
+    assert requests == 1 and model.singles == []
+    assert all("429 retries exhausted" in r["error"] for r in results)
+    assert results[0]["headline"] == "Risk detected: tax_opportunity"
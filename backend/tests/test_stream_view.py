@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+
+pytest.importorskip("supabase")
+from api.services.stream_view import StreamView, _ViewState
+
+CLIENTS = {f"c{i}": {"id": f"c{i}", "first_name": "Client", "last_name": str(i), "behavioural_profile": {}} for i in range(5)}
+PORTFOLIOS = {cid: {"id": f"p-{cid}", "client_id": cid, "holdings": [{"name": "Gilts", "exposure_percentage": 1.0}]} for cid in CLIENTS}
+
+def _event(n, event_type="market_risk", urgency="medium", **extra):
+    return {
+        "id": f"e{n}",
+        "client_id": f"c{n % 5}",
+        "event_type": event_type,
+        "urgency": urgency,
+        "status": "open",
+        "deterministic_classification": {"reason": "threshold breached"},
+        "ai_interpretation": None,
+        "created_at": f"2026-03-01T09:{n:02d}:00+00:00",
+        **extra,
+    }
+
+def _view():
+    view = StreamView()
+    view._state = _ViewState(clients=dict(CLIENTS), portfolios=dict(PORTFOLIOS))
+    view._built_at = time.monotonic()
+    return view
+
+def _event_ids(page):
+    return [card["id"] for message in page["stream"] for card in message["cards"] if not card["isDraft"]]
+
+def test_render_pages_newest_first_and_resumes_after_the_cursor():
+    view = _view()
+
+    async def scenario():
+        await view.apply_events([_event(n, "tax_opportunity" if n % 2 else "market_risk") for n in range(5)])
+        pages, cursor = [], None
+        while True:
+            page = await view.render(limit=2, cursor=cursor)
+            pages.append(_event_ids(page))
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        tab_page = await view.render(filter="tax_opportunity", limit=5)
+        return pages, tab_page
+
+    pages, tab_page = asyncio.run(scenario())
+    assert sorted(sum(pages, [])) == ["e0", "e1", "e2", "e3", "e4"]
+    assert [sorted(p) for p in pages] == [["e3", "e4"], ["e1", "e2"], ["e0"]]
+    assert sorted(_event_ids(tab_page)) == ["e1", "e3"] and tab_page["next_cursor"] is None
+
+def test_apply_and_remove_keep_entries_and_tab_counts_in_step():
+    view = _view()
+
+    async def scenario():
+        await view.apply_events([_event(1, urgency="high"), _event(2), _event(3, "tax_opportunity", urgency="critical")])
+        first = await view.render()
+        # Re-applying a row replaces it rather than counting it twice
+        await view.apply_events([_event(1, urgency="high"), _event(2, status="resolved")])
+        view.remove_event("e3")
+        view.remove_event("missing")
+        return first, await view.render()
+
+    first, second = asyncio.run(scenario())
+    assert first["tabs"][0] == {"key": "all", "label": "All", "count": 3, "highCount": 2}
+    assert {t["key"]: t["count"] for t in first["tabs"][1:]} == {"market_risk": 2, "tax_opportunity": 1}
+    assert _event_ids(second) == ["e1"]
+    assert second["tabs"] == [
+        {"key": "all", "label": "All", "count": 1, "highCount": 1},
+        {"key": "market_risk", "label": "Market Risk", "count": 1, "highCount": 1},
+    ]
+    assert view._state.tab_counts == {"market_risk": {"total": 1, "high": 1, "critical": 0}}
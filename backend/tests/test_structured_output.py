@@ -0,0 +1,52 @@
+import asyncio
+import pytest
+from pydantic import BaseModel
+from typing import List, Literal
+from shared import structured_output
+from shared.structured_output import StructuredOutputError, extract_json_object, structured_invoke
+
+class Card(BaseModel):
+    headline: str
+    bullets: List[str]
+    action: Literal["draft_email", "dismiss"]
+
+def test_extract_ignores_fences_and_trailing_braces():
+    text = 'Here you go:\n```json\n{"headline": "a {b}", "n": [1, 2]}\n```\nNote: {not json}'
+    assert extract_json_object(text) == {"headline": "a {b}", "n": [1, 2]}
+    assert extract_json_object('{"broken": } then {"ok": true}') == {"ok": True}
+    assert extract_json_object("no json here") is None
+
+def _fake_llm(monkeypatch, replies):
+    calls = []
+
+    async def fake_invoke_llm(llm, messages, lane=None, validate=None):
+        calls.append(messages)
+        return replies[len(calls) - 1]
+
+    monkeypatch.setattr(structured_output, "invoke_llm", fake_invoke_llm)
+    monkeypatch.setattr(structured_output, "structured_output_stats", structured_output.StructuredOutputStats())
+    return calls
+
+def test_only_invalid_fields_are_requested_again(monkeypatch):
+    calls = _fake_llm(monkeypatch, [
+        '{"headline": "Rates up", "bullets": ["a"], "action": "Draft Email"}',
+        '{"action": "draft_email", "headline": "ignored"}',
+    ])
+    card = asyncio.run(structured_invoke(None, [{"role": "user", "content": "go"}], Card))
+    assert card == Card(headline="Rates up", bullets=["a"], action="draft_email")
+    assert len(calls) == 2 and "action" in calls[1][-1]["content"] and "bullets" not in calls[1][-1]["content"]
+    stats = structured_output.structured_output_stats.stats()
+    assert (stats["first_pass"], stats["repaired"], stats["repair_calls"]) == (0, 1, 1)
+    assert stats["wasted_tokens_per_success"] > 0
+
+def test_valid_first_answer_costs_nothing_extra(monkeypatch):
+    calls = _fake_llm(monkeypatch, ['{"headline": "h", "bullets": [], "action": "dismiss"}'])
+    asyncio.run(structured_invoke(None, [{"role": "user", "content": "go"}], Card))
+    assert len(calls) == 1
+    assert structured_output.structured_output_stats.stats()["wasted_tokens"] == 0
+
+def test_unrepairable_output_raises(monkeypatch):
+    _fake_llm(monkeypatch, ["I cannot help with that", '{"headline": 3}'])
+    with pytest.raises(StructuredOutputError):
+        asyncio.run(structured_invoke(None, [{"role": "user", "content": "go"}], Card))
+    assert structured_output.structured_output_stats.stats()["failed"] == 1
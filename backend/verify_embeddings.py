@@ -12,10 +12,16 @@ def verify_client():
         client = get_embeddings_client()
         print(f"Client initialized: {type(client)}")
         from langchain_huggingface import HuggingFaceEndpointEmbeddings
+        from shared.embeddings import OnnxEmbeddings
         if isinstance(client, HuggingFaceEndpointEmbeddings):
             print("SUCCESS: Client is HuggingFaceEndpointEmbeddings (API-based)")
+        elif isinstance(client, OnnxEmbeddings):
+            print("SUCCESS: Client is OnnxEmbeddings (local CPU)")
         else:
             print(f"FAILURE: Client is of type {type(client)}")
+            return
+        vector = client.embed_query("Concentration Risk: 45% exposure to Energy.")
+        print(f"Embedding dimension: {len(vector)}")
     except Exception as e:
         print(f"Error during client initialization: {e}")
 
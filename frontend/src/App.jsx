@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback, useMemo } from 'react';
+import React, { useState, useEffect, useCallback, useMemo, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import {
     Shield, AlertTriangle, Calendar, Sparkles, MoreVertical,
@@ -9,6 +9,7 @@ import {
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm';
 import DetailPanel from './components/DetailPanel';
+import { applyStreamDelta } from './streamDelta';
 
 const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
@@ -31,7 +32,11 @@ function App() {
     const [selectedCard, setSelectedCard] = useState(null);
     const [isDrawerOpen, setIsDrawerOpen] = useState(false);
     const [streamMessages, setStreamMessages] = useState([]);
+    const streamMessagesRef = useRef(streamMessages);
+    streamMessagesRef.current = streamMessages;
     const [streamTabs, setStreamTabs] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [liveStrip, setLiveStrip] = useState(null);
     const [heartbeatStatus, setHeartbeatStatus] = useState(null);
     const [loading, setLoading] = useState(true);
@@ -45,6 +50,7 @@ function App() {
             const data = await res.json();
             if (data.stream) setStreamMessages(data.stream);
             if (data.tabs) setStreamTabs(data.tabs);
+            setNextCursor(data.next_cursor || null);
         } catch (err) {
             console.error('Failed to fetch stream:', err);
         } finally {
@@ -52,6 +58,23 @@ function App() {
         }
     }, []);
 
+    // Fetch the next keyset page and append it
+    const loadMoreStream = useCallback(async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const res = await fetch(`${API_BASE}/stream?filter=all&cursor=${encodeURIComponent(nextCursor)}`);
+            const data = await res.json();
+            if (data.stream) setStreamMessages(prev => [...prev, ...data.stream]);
+            if (data.tabs) setStreamTabs(data.tabs);
+            setNextCursor(data.next_cursor || null);
+        } catch (err) {
+            console.error('Failed to fetch more stream items:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    }, [nextCursor]);
+
     // Fetch live strip data
     const fetchLiveStrip = useCallback(async () => {
         try {
@@ -93,7 +116,27 @@ function App() {
                 console.log('SSE push received: data updated');
                 fetchStream();
                 fetchLiveStrip(); // Fetch strip too as risk counts might have changed
+                return;
             }
+
+            // Typed delta: patch the rendered stream in place, refetch only if it can't be
+            let delta;
+            try {
+                delta = JSON.parse(event.data);
+            } catch {
+                return;
+            }
+            if (delta.type !== 'snapshot_changed') {
+                const next = applyStreamDelta(streamMessagesRef.current, delta);
+                if (next === null) {
+                    fetchStream();
+                } else {
+                    streamMessagesRef.current = next;
+                    setStreamMessages(next);
+                    if (delta.tabs) setStreamTabs(delta.tabs);
+                }
+            }
+            if (!delta.type?.startsWith('draft_')) fetchLiveStrip();
         };
 
         eventSource.onerror = (err) => {
@@ -470,6 +513,17 @@ function App() {
                                 </React.Fragment>
                             ))
                         )}
+                        {!loading && nextCursor && (
+                            <div className="flex justify-center py-6">
+                                <button
+                                    className="text-[11px] font-bold text-[#667085] uppercase tracking-wider"
+                                    onClick={loadMoreStream}
+                                    disabled={loadingMore}
+                                >
+                                    {loadingMore ? 'Loading…' : 'Load more'}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 </main>
 
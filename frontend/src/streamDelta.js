@@ -0,0 +1,93 @@
+// Applies a typed /stream/live delta to the rendered stream messages in place.
+// Returns the new message list, or null when the change can't be patched locally
+// and the caller should refetch /stream instead.
+
+const KEEP_WHEN_EMPTY = new Set(['heartbeat', 'morning_intelligence', 'atlas']);
+
+const withoutCards = (messages, predicate) =>
+    messages
+        .map(m => {
+            const cards = (m.cards || []).filter(c => !predicate(c));
+            if (cards.length === (m.cards || []).length) return m;
+            const eventCards = cards.filter(c => !c.isDraft).length;
+            return { ...m, cards, ...(m.clientCount ? { clientCount: eventCards } : {}) };
+        })
+        .filter(m => KEEP_WHEN_EMPTY.has(m.type) || (m.cards || []).length > 0);
+
+const upsertEventItem = (messages, item) => {
+    if (item.kind === 'master') return null;
+
+    // Replace an existing card (e.g. new interpretation) where it already sits
+    const existing = messages.find(m => (m.cards || []).some(c => c.id === item.id));
+    if (existing) {
+        return messages.map(m => m !== existing ? m : {
+            ...m,
+            cards: m.cards.flatMap(c => {
+                if (c.isDraft && c.risk_event_id === item.id) return [];
+                return c.id === item.id ? item.cards : [c];
+            }),
+        });
+    }
+
+    if (item.kind === 'morning_card') {
+        const brief = messages.find(m => m.type === 'morning_intelligence');
+        if (!brief) return null;
+        return messages.map(m => m === brief ? { ...m, cards: [...(m.cards || []), ...item.cards] } : m);
+    }
+
+    // Join the open group for this event type, or start a new one at the top
+    const group = messages.find(m => m.type === item.event_type && (m.cards || []).length > 0);
+    if (group) {
+        return messages.map(m => m !== group ? m : {
+            ...m,
+            cards: [...item.cards, ...m.cards],
+            clientCount: (m.clientCount || 1) + 1,
+        });
+    }
+    const pinned = messages.filter(m => m.type === 'morning_intelligence');
+    const rest = messages.filter(m => m.type !== 'morning_intelligence');
+    return [...pinned, item.message, ...rest];
+};
+
+export function applyStreamDelta(messages, delta) {
+    switch (delta.type) {
+        case 'event_created':
+        case 'event_updated':
+        case 'brief_ready': {
+            let next = messages;
+            for (const item of delta.items || []) {
+                next = upsertEventItem(next, item);
+                if (next === null) return null;
+            }
+            return next;
+        }
+        case 'event_resolved': {
+            const ids = new Set(delta.ids || []);
+            return withoutCards(messages, c => ids.has(c.id) || (c.isDraft && ids.has(c.risk_event_id)));
+        }
+        case 'draft_created':
+        case 'draft_updated':
+        case 'draft_approved':
+        case 'draft_rejected': {
+            let next = messages;
+            for (const draft of delta.drafts || []) {
+                // Drop whatever draft card the event showed, then attach the current one
+                next = withoutCards(next, c => c.isDraft && (c.id === draft.id || c.risk_event_id === draft.event_id));
+                if (draft.card) {
+                    next = next.map(m => {
+                        const idx = (m.cards || []).findIndex(c => c.id === draft.event_id);
+                        if (idx === -1) return m;
+                        const cards = [...m.cards];
+                        cards.splice(idx + 1, 0, draft.card);
+                        return { ...m, cards };
+                    });
+                }
+            }
+            return next;
+        }
+        case 'snapshot_changed':
+            return messages;
+        default:
+            return null;
+    }
+}
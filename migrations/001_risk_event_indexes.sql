@@ -0,0 +1,41 @@
+-- Secondary indexes for the hot read paths. Safe to re-run.
+-- Apply once to existing databases (Supabase SQL editor or psql); fresh installs get
+-- the same indexes from supabase_schema.sql.
+
+-- At most one open event per (client, event_type). Older duplicates raised before the
+-- sweeps deduplicated in-process are closed so the unique index can be built.
+UPDATE risk_events
+SET status = 'auto_resolved', resolved_at = now()
+WHERE id IN (
+  select id from (
+    select
+      risk_events.id,
+      row_number() over (
+        partition by risk_events.client_id, risk_events.event_type
+        order by risk_events.created_at desc, risk_events.id desc
+      ) as rank
+    from risk_events
+    where risk_events.status = 'open'
+  ) as ranked
+  where ranked.rank > 1
+);
+
+-- Sweep dedup: WHERE client_id = ? AND event_type = ? AND status = 'open'
+CREATE UNIQUE INDEX IF NOT EXISTS risk_events_open_client_type_key
+  ON risk_events (client_id, event_type)
+  WHERE status = 'open';
+
+-- Stream and live strip: WHERE status = 'open' ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS risk_events_status_created_at_idx
+  ON risk_events (status, created_at DESC, id DESC);
+
+-- Live strip "last sweep": WHERE sweep_type = ? ORDER BY created_at DESC LIMIT 1
+CREATE INDEX IF NOT EXISTS heartbeat_logs_sweep_type_created_at_idx
+  ON heartbeat_logs (sweep_type, created_at DESC);
+
+-- Foreign keys (Postgres does not index the referencing side)
+CREATE INDEX IF NOT EXISTS portfolios_client_id_idx ON portfolios (client_id);
+CREATE INDEX IF NOT EXISTS behavioural_memory_client_id_idx ON behavioural_memory (client_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS meeting_briefs_client_id_idx ON meeting_briefs (client_id, meeting_timestamp DESC);
+CREATE INDEX IF NOT EXISTS draft_actions_risk_event_id_idx ON draft_actions (risk_event_id);
+CREATE INDEX IF NOT EXISTS draft_actions_client_id_idx ON draft_actions (client_id);
@@ -0,0 +1,22 @@
+-- Requires 001_risk_event_indexes.sql (the ON CONFLICT target is its partial unique index).
+
+-- Set-based risk event dedup (heartbeat and morning brief sweeps). Inserts every
+-- finding whose (client_id, event_type) has no open event and returns only the rows
+-- it created; concurrent sweeps race on the unique index instead of a read-then-write.
+CREATE OR REPLACE FUNCTION insert_open_risk_events(events jsonb)
+RETURNS SETOF risk_events
+LANGUAGE sql VOLATILE
+AS $$
+  insert into risk_events (client_id, event_type, urgency, deterministic_classification, ai_interpretation, model_version, status)
+  select e.client_id, e.event_type, e.urgency, e.deterministic_classification, e.ai_interpretation, e.model_version, 'open'
+  from jsonb_to_recordset(events) as e(
+    client_id uuid,
+    event_type text,
+    urgency text,
+    deterministic_classification jsonb,
+    ai_interpretation jsonb,
+    model_version text
+  )
+  on conflict (client_id, event_type) where status = 'open' do nothing
+  returning *;
+$$;
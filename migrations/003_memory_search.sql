@@ -0,0 +1,85 @@
+-- Approximate nearest-neighbour index and batched search for behavioural_memory.
+-- Requires pgvector >= 0.5 (HNSW). Building the index on a large table takes a while;
+-- raise maintenance_work_mem for the session first if the build spills to disk.
+
+CREATE INDEX IF NOT EXISTS behavioural_memory_embedding_hnsw_idx
+  ON behavioural_memory USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- match_memory gains optional client_id_filter / ef_search arguments; drop the old
+-- signature so PostgREST does not see two overloads
+DROP FUNCTION IF EXISTS match_memory(vector, float, int, uuid);
+
+-- pgvector Similarity Search RPC. Per-client searches are served by the client_id index
+-- (a client has tens of memories, so the exact scan is cheap and has perfect recall);
+-- unfiltered searches walk the HNSW index with `ef_search` candidates.
+CREATE OR REPLACE FUNCTION match_memory (
+  query_embedding vector(384),
+  match_threshold float,
+  match_count int,
+  client_id_filter uuid DEFAULT NULL,
+  ef_search int DEFAULT 40
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  similarity float
+)
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+  PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  IF client_id_filter IS NULL THEN
+    RETURN QUERY
+    select bm.id, bm.content, 1 - (bm.embedding <=> query_embedding) as similarity
+    from behavioural_memory bm
+    where bm.embedding <=> query_embedding < 1 - match_threshold
+    order by bm.embedding <=> query_embedding
+    limit match_count;
+  ELSE
+    RETURN QUERY
+    select bm.id, bm.content, 1 - (bm.embedding <=> query_embedding) as similarity
+    from behavioural_memory bm
+    where bm.client_id = client_id_filter
+      and bm.embedding <=> query_embedding < 1 - match_threshold
+    order by bm.embedding <=> query_embedding
+    limit match_count;
+  END IF;
+END;
+$$;
+
+-- Top `match_count` memories for each of N (client_id, embedding) queries in one round trip.
+-- queries: [{"client_id": "<uuid>", "embedding": [384 floats]}, ...]; query_index is 0-based.
+CREATE OR REPLACE FUNCTION match_memory_many (
+  queries jsonb,
+  match_threshold float,
+  match_count int,
+  ef_search int DEFAULT 40
+)
+RETURNS TABLE (
+  query_index int,
+  client_id uuid,
+  id uuid,
+  content text,
+  similarity float
+)
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+  PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  RETURN QUERY
+  select (q.ordinality - 1)::int, q.client_id, m.id, m.content, 1 - m.distance
+  from (
+    select (e.value->>'client_id')::uuid as client_id, (e.value->>'embedding')::vector(384) as embedding, e.ordinality
+    from jsonb_array_elements(queries) with ordinality as e(value, ordinality)
+  ) as q
+  cross join lateral (
+    select bm.id, bm.content, bm.embedding <=> q.embedding as distance
+    from behavioural_memory bm
+    where bm.client_id = q.client_id
+      and bm.embedding <=> q.embedding < 1 - match_threshold
+    order by bm.embedding <=> q.embedding
+    limit match_count
+  ) as m
+  order by q.ordinality, m.distance;
+END;
+$$;
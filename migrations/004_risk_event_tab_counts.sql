@@ -0,0 +1,24 @@
+-- Creates the RPC behind the GET /stream tab counters. Safe to re-run.
+-- Without it the API counts tabs in memory after every stream view rebuild.
+
+-- Open risk event counts per action-cluster tab (GET /stream tabs)
+CREATE OR REPLACE FUNCTION risk_event_tab_counts()
+RETURNS TABLE (
+  event_type text,
+  total bigint,
+  high bigint,
+  critical bigint
+)
+LANGUAGE sql STABLE
+AS $$
+  select
+    risk_events.event_type,
+    count(*) as total,
+    count(*) filter (where risk_events.urgency in ('high', 'critical')) as high,
+    count(*) filter (where risk_events.urgency = 'critical') as critical
+  from risk_events
+  where
+    risk_events.status = 'open'
+    and coalesce((risk_events.deterministic_classification->>'is_master_brief')::boolean, false) = false
+  group by risk_events.event_type;
+$$;
@@ -0,0 +1,22 @@
+-- Creates the RPC behind the GET /live-strip counters. Safe to re-run.
+-- Without it the API falls back to counting open events row by row.
+
+-- Live strip counters in one round trip (GET /live-strip)
+CREATE OR REPLACE FUNCTION live_strip_counts(since timestamptz)
+RETURNS TABLE (
+  open_risks bigint,
+  clients_impacted bigint,
+  meetings_today bigint
+)
+LANGUAGE sql STABLE
+AS $$
+  select
+    open_events.open_risks,
+    open_events.clients_impacted,
+    (select count(*) from meeting_briefs where meeting_briefs.created_at >= since) as meetings_today
+  from (
+    select count(*) as open_risks, count(distinct risk_events.client_id) as clients_impacted
+    from risk_events
+    where risk_events.status = 'open'
+  ) as open_events;
+$$;
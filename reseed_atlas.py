@@ -1,9 +1,10 @@
+import argparse
 import asyncio
 import uuid
 import random
 from datetime import datetime, timezone, timedelta
 from backend.shared.database import db_manager
-from backend.shared.embeddings import generate_embedding
+from backend.shared.memory_ingest import ingest_memories
 
 # --- 20 Realistic UK Client Personas ---
 CLIENTS = [
@@ -62,6 +63,40 @@ ASSETS = [
     {"name": "Unilever", "ticker": "ULVR.L", "sector": "Consumer Staples", "price": 38.5}
 ]
 
+# Building blocks for synthetic memories (--memories), e.g. for load testing memory search
+MEMORY_TEMPLATES = [
+    "{name} called after the {sector} sell-off worried about {topic}.",
+    "{name} asked whether to move more of the portfolio into {sector} given {topic}.",
+    "Review meeting: {name} is comfortable with volatility but wants clarity on {topic}.",
+    "{name} mentioned {topic} twice during the call and prefers email follow-ups.",
+    "{name} reacted badly to last quarter's {sector} drawdown and requested a risk review.",
+]
+MEMORY_TOPICS = ["pension tapering", "ISA allowance", "CGT on the rebalance", "inheritance planning",
+                 "school fees", "retirement income", "ESG screening", "cash drag", "currency exposure"]
+MEMORY_SECTORS = ["Technology", "Energy", "Financials", "Healthcare", "Materials", "Consumer Staples"]
+
+def synthetic_memories(client_ids: list, count: int, seed: int = 7):
+    """Yields `count` deterministic (client_id, content, source, metadata) items; same input, same sequence."""
+    rng = random.Random(seed)
+    client_ids = sorted(client_ids)
+    for i in range(count):
+        content = rng.choice(MEMORY_TEMPLATES).format(
+            name="The client", sector=rng.choice(MEMORY_SECTORS), topic=rng.choice(MEMORY_TOPICS)
+        )
+        yield client_ids[i % len(client_ids)], content, "Synthetic Load", {"synthetic": True, "n": i}
+
+async def seed_memories(count: int, checkpoint: str = None, batch_size: int = 256, concurrency: int = 4):
+    """Streams `count` synthetic memories over the existing clients. Re-run with the same checkpoint to resume."""
+    client_ids = [c["id"] for c in db_manager.select_all("clients", "id")]
+    if not client_ids:
+        print("❌ atlas: no clients to attach memories to; run a full reseed first.")
+        return
+    print(f"\n🧠 atlas: streaming {count:,} synthetic memories over {len(client_ids)} clients...")
+    stats = await ingest_memories(
+        synthetic_memories(client_ids, count), batch_size=batch_size, concurrency=concurrency, checkpoint_path=checkpoint
+    )
+    print(f"   {stats.rows:,} stored, {stats.failed:,} failed, {stats.skipped:,} already loaded, {stats.rows_per_second:,.0f} rows/s")
+
 async def seed_data():
     print("🚀 atlas: clearing all tables...")
     tables = ["risk_events", "draft_actions", "behavioural_memory", "meeting_briefs", "market_snapshots", "portfolios", "clients"]
@@ -84,6 +119,7 @@ async def seed_data():
     })
 
     print("\n👤 atlas: seeding 20 elite client personas...")
+    memories = []
     for c_data in CLIENTS:
         client_id = str(uuid.uuid4())
         
@@ -162,13 +198,10 @@ async def seed_data():
             "last_updated": datetime.now(timezone.utc).isoformat()
         })
         
-        # 3. Memory
-        try:
-            emb = generate_embedding(c_data["memory"])
-            db_manager.insert("behavioural_memory", {
-                "client_id": client_id, "content": c_data["memory"], "source_reference": "Annual Review", "embedding": emb
-            })
-        except: pass
+        # 3. Memory (embedded and inserted in bulk below)
+        memories.append((client_id, c_data["memory"], "Annual Review", None))
+
+    await ingest_memories(memories)
 
     # Seeding meetings
     for i in range(3):
@@ -180,5 +213,17 @@ async def seed_data():
 
     print("\n✅ atlas: HIGH-SIGNAL DATABASE RESET COMPLETE.")
 
+async def main(args):
+    if not args.memories_only:
+        await seed_data()
+    if args.memories:
+        await seed_memories(args.memories, args.checkpoint, args.batch_size, args.concurrency)
+
 if __name__ == "__main__":
-    asyncio.run(seed_data())
+    parser = argparse.ArgumentParser(description="Reset the Atlas database with demo personas, optionally plus bulk synthetic memories.")
+    parser.add_argument("--memories", type=int, default=0, help="synthetic memories to load after seeding, e.g. 1000000")
+    parser.add_argument("--memories-only", action="store_true", help="keep existing data and only load synthetic memories")
+    parser.add_argument("--checkpoint", default=None, help="resume file for --memories; re-run with --memories-only to continue")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
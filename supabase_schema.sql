@@ -132,28 +132,157 @@ CREATE TABLE IF NOT EXISTS market_impact_reports (
     created_at TIMESTAMPTZ DEFAULT now()
 );
 
--- pgvector Similarity Search RPC
+-- Indexes (see migrations/001_risk_event_indexes.sql for existing databases)
+-- At most one open event per (client, event_type); also serves the sweep dedup lookup
+CREATE UNIQUE INDEX IF NOT EXISTS risk_events_open_client_type_key
+  ON risk_events (client_id, event_type)
+  WHERE status = 'open';
+CREATE INDEX IF NOT EXISTS risk_events_status_created_at_idx
+  ON risk_events (status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS heartbeat_logs_sweep_type_created_at_idx
+  ON heartbeat_logs (sweep_type, created_at DESC);
+CREATE INDEX IF NOT EXISTS portfolios_client_id_idx ON portfolios (client_id);
+CREATE INDEX IF NOT EXISTS behavioural_memory_client_id_idx ON behavioural_memory (client_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS meeting_briefs_client_id_idx ON meeting_briefs (client_id, meeting_timestamp DESC);
+CREATE INDEX IF NOT EXISTS draft_actions_risk_event_id_idx ON draft_actions (risk_event_id);
+CREATE INDEX IF NOT EXISTS draft_actions_client_id_idx ON draft_actions (client_id);
+CREATE INDEX IF NOT EXISTS behavioural_memory_embedding_hnsw_idx
+  ON behavioural_memory USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- pgvector Similarity Search RPC. Per-client searches are served by the client_id index
+-- (a client has tens of memories, so the exact scan is cheap and has perfect recall);
+-- unfiltered searches walk the HNSW index with `ef_search` candidates.
 CREATE OR REPLACE FUNCTION match_memory (
   query_embedding vector(384),
   match_threshold float,
   match_count int,
-  client_id_filter uuid
+  client_id_filter uuid DEFAULT NULL,
+  ef_search int DEFAULT 40
+)
+RETURNS TABLE (
+  id uuid,
+  content text,
+  similarity float
+)
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+  PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  IF client_id_filter IS NULL THEN
+    RETURN QUERY
+    select bm.id, bm.content, 1 - (bm.embedding <=> query_embedding) as similarity
+    from behavioural_memory bm
+    where bm.embedding <=> query_embedding < 1 - match_threshold
+    order by bm.embedding <=> query_embedding
+    limit match_count;
+  ELSE
+    RETURN QUERY
+    select bm.id, bm.content, 1 - (bm.embedding <=> query_embedding) as similarity
+    from behavioural_memory bm
+    where bm.client_id = client_id_filter
+      and bm.embedding <=> query_embedding < 1 - match_threshold
+    order by bm.embedding <=> query_embedding
+    limit match_count;
+  END IF;
+END;
+$$;
+
+-- Top `match_count` memories for each of N (client_id, embedding) queries in one round trip.
+-- queries: [{"client_id": "<uuid>", "embedding": [384 floats]}, ...]; query_index is 0-based.
+CREATE OR REPLACE FUNCTION match_memory_many (
+  queries jsonb,
+  match_threshold float,
+  match_count int,
+  ef_search int DEFAULT 40
 )
 RETURNS TABLE (
+  query_index int,
+  client_id uuid,
   id uuid,
   content text,
   similarity float
 )
+LANGUAGE plpgsql VOLATILE
+AS $$
+BEGIN
+  PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+  RETURN QUERY
+  select (q.ordinality - 1)::int, q.client_id, m.id, m.content, 1 - m.distance
+  from (
+    select (e.value->>'client_id')::uuid as client_id, (e.value->>'embedding')::vector(384) as embedding, e.ordinality
+    from jsonb_array_elements(queries) with ordinality as e(value, ordinality)
+  ) as q
+  cross join lateral (
+    select bm.id, bm.content, bm.embedding <=> q.embedding as distance
+    from behavioural_memory bm
+    where bm.client_id = q.client_id
+      and bm.embedding <=> q.embedding < 1 - match_threshold
+    order by bm.embedding <=> q.embedding
+    limit match_count
+  ) as m
+  order by q.ordinality, m.distance;
+END;
+$$;
+
+-- Open risk event counts per action-cluster tab (GET /stream tabs)
+CREATE OR REPLACE FUNCTION risk_event_tab_counts()
+RETURNS TABLE (
+  event_type text,
+  total bigint,
+  high bigint,
+  critical bigint
+)
 LANGUAGE sql STABLE
 AS $$
   select
-    behavioural_memory.id,
-    behavioural_memory.content,
-    1 - (behavioural_memory.embedding <=> query_embedding) as similarity
-  from behavioural_memory
-  where 
-    behavioural_memory.client_id = client_id_filter
-    and 1 - (behavioural_memory.embedding <=> query_embedding) > match_threshold
-  order by (behavioural_memory.embedding <=> query_embedding) asc
-  limit match_count;
+    risk_events.event_type,
+    count(*) as total,
+    count(*) filter (where risk_events.urgency in ('high', 'critical')) as high,
+    count(*) filter (where risk_events.urgency = 'critical') as critical
+  from risk_events
+  where
+    risk_events.status = 'open'
+    and coalesce((risk_events.deterministic_classification->>'is_master_brief')::boolean, false) = false
+  group by risk_events.event_type;
+$$;
+
+-- Live strip counters in one round trip (GET /live-strip)
+CREATE OR REPLACE FUNCTION live_strip_counts(since timestamptz)
+RETURNS TABLE (
+  open_risks bigint,
+  clients_impacted bigint,
+  meetings_today bigint
+)
+LANGUAGE sql STABLE
+AS $$
+  select
+    open_events.open_risks,
+    open_events.clients_impacted,
+    (select count(*) from meeting_briefs where meeting_briefs.created_at >= since) as meetings_today
+  from (
+    select count(*) as open_risks, count(distinct risk_events.client_id) as clients_impacted
+    from risk_events
+    where risk_events.status = 'open'
+  ) as open_events;
+$$;
+
+-- Set-based risk event dedup (heartbeat and morning brief sweeps). Inserts every
+-- finding whose (client_id, event_type) has no open event and returns only the rows
+-- it created; concurrent sweeps race on the unique index instead of a read-then-write.
+CREATE OR REPLACE FUNCTION insert_open_risk_events(events jsonb)
+RETURNS SETOF risk_events
+LANGUAGE sql VOLATILE
+AS $$
+  insert into risk_events (client_id, event_type, urgency, deterministic_classification, ai_interpretation, model_version, status)
+  select e.client_id, e.event_type, e.urgency, e.deterministic_classification, e.ai_interpretation, e.model_version, 'open'
+  from jsonb_to_recordset(events) as e(
+    client_id uuid,
+    event_type text,
+    urgency text,
+    deterministic_classification jsonb,
+    ai_interpretation jsonb,
+    model_version text
+  )
+  on conflict (client_id, event_type) where status = 'open' do nothing
+  returning *;
 $$;